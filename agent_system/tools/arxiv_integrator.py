@@ -1,100 +1,358 @@
 """arXiv integration for research monitoring."""
 
 import datetime
+import hashlib
+import json
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import arxiv
+import yaml
+
+from .arxiv_store import (
+    Paper,
+    PaperMatch,
+    PaperStore,
+    RateLimiter,
+    ResponseCache,
+    normalize_id,
+)
+
+# arXiv's API terms ask for no more than one request every three seconds.
+ARXIV_REQUEST_INTERVAL = 3.0
+DEFAULT_DB_PATH = Path(__file__).parent.parent.parent / "metadata" / "arxiv.sqlite3"
+PROMPT_INDEX_PATH = (
+    Path(__file__).parent.parent.parent / "metadata" / "prompt_index.yaml"
+)
+# Format of the columnar JSON copy prompt_library writes next to the index
+# (prompt_index.json); it is only trusted while its source hash matches the YAML.
+PROMPT_INDEX_SIDECAR_VERSION = 1
+# Ids per id_list request; matches arxiv.Client's default page size, so a batch is one request.
+ID_BATCH_SIZE = 100
+
+
+def prompt_tags(index_path: Path = PROMPT_INDEX_PATH) -> list[tuple[str, list | None]]:
+    """(id, tags) of every indexed prompt.
+
+    Reads just those two columns of the JSON sidecar when it is current, and
+    parses the YAML index only when the sidecar is missing or stale.
+    """
+    raw = index_path.read_bytes()
+    try:
+        sidecar = json.loads(index_path.with_suffix(".json").read_bytes())
+    except (OSError, ValueError):
+        sidecar = None
+    if (
+        isinstance(sidecar, dict)
+        and sidecar.get("version") == PROMPT_INDEX_SIDECAR_VERSION
+        and sidecar.get("source_sha256") == hashlib.sha256(raw).hexdigest()
+    ):
+        columns = sidecar["columns"]
+        tags = columns.get("tags") or [None] * sidecar["count"]
+        return list(
+            zip(columns.get("id") or [None] * sidecar["count"], tags, strict=True)
+        )
+    prompts = yaml.load(raw, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or []
+    return [(prompt["id"], prompt.get("tags")) for prompt in prompts]
+
+
+# Shared by every integrator in the process, so concurrent fetches stay polite.
+ARXIV_RATE_LIMITER = RateLimiter(ARXIV_REQUEST_INTERVAL)
 
 
 class ArxivIntegrator:
-    """arXiv API wrapper for research integration."""
+    """arXiv API wrapper for research integration.
 
-    def __init__(self):
-        self.client = arxiv.Client()
+    Query results are cached in SQLite (`db_path`) for `cache_ttl_hours`; a TTL of
+    0 disables the cache. The sync_* methods instead keep harvested papers in a
+    PaperStore in the same database. Every page request waits for the process-wide
+    ARXIV_RATE_LIMITER, and retries are spaced by the same interval. `api_url`
+    points the client at another arXiv-compatible endpoint, such as a local fake
+    server in tests.
+    """
 
-    def search_by_keywords(
-        self, keywords: list[str], max_results: int = 10, days_back: int = 7
-    ) -> list[dict]:
-        """Search arXiv for recent papers by keywords."""
-        query = " AND ".join(f"all:{kw}" for kw in keywords)
+    def __init__(
+        self,
+        db_path: Path | None = None,
+        cache_ttl_hours: float = 12.0,
+        max_workers: int = 4,
+        api_url: str | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
+        self.api_url = api_url
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or ARXIV_RATE_LIMITER
+        self.cache = (
+            ResponseCache(db_path or DEFAULT_DB_PATH, cache_ttl_hours * 3600)
+            if cache_ttl_hours > 0
+            else None
+        )
+        self.store = PaperStore(db_path or DEFAULT_DB_PATH)
+        self._local = threading.local()
+
+    @property
+    def client(self) -> arxiv.Client:
+        """A client per thread: arxiv.Client keeps a requests session that is not shared."""
+        client = getattr(self._local, "client", None)
+        if client is None:
+            # The client's own delay spaces its retries; pages also wait for the
+            # shared limiter in _results().
+            client = self._local.client = arxiv.Client(
+                delay_seconds=self.rate_limiter.interval
+            )
+            if self.api_url:
+                client.query_url_format = self.api_url + "?{}"
+        return client
+
+    def _results(self, search: arxiv.Search) -> Iterator[arxiv.Result]:
+        """client.results(search), waiting for the shared rate limiter before each page.
+
+        The client requests a page when the result before it has been consumed,
+        so every page_size-th result is where a request can happen.
+        """
+        client = self.client
+        results = client.results(search)
+        count = 0
+        while True:
+            if count % client.page_size == 0:
+                self.rate_limiter.wait()
+            result = next(results, None)
+            if result is None:
+                return
+            yield result
+            count += 1
+
+    def _fetch(
+        self, query: str, max_results: int, cutoff_date: datetime.datetime
+    ) -> tuple[list[Paper], bool]:
+        """Page through a newest-first query, stopping at the first paper older than cutoff_date.
+
+        Returns (papers, complete): complete is False when max_results ran out
+        before paging reached cutoff_date, so older matching papers may remain.
+        """
+        # One result past max_results tells a full page apart from a truncated one.
         search = arxiv.Search(
             query=query,
-            max_results=max_results,
+            max_results=max_results + 1,
             sort_by=arxiv.SortCriterion.SubmittedDate,
             sort_order=arxiv.SortOrder.Descending,
         )
 
         results = []
+        for result in self._results(search):
+            if result.published < cutoff_date:
+                # Results are sorted by submission date, so the rest are older
+                # too; stopping here also skips requesting further pages.
+                return results, True
+            if len(results) == max_results:
+                return results, False
+
+            results.append(Paper.from_result(result))
+        return results, True
+
+    def _search(self, query: str, max_results: int, days_back: int) -> list[Paper]:
+        """Run a date-sorted query, serving it from the cache when fresh."""
         cutoff_date = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
             days=days_back
         )
+        key = json.dumps([query, max_results, cutoff_date.date().isoformat()])
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
 
-        for result in self.client.results(search):
-            if result.published < cutoff_date:
-                continue
-
-            results.append(
-                {
-                    "title": result.title,
-                    "authors": [str(author) for author in result.authors],
-                    "published": result.published.isoformat(),
-                    "summary": result.summary,
-                    "pdf_url": result.pdf_url,
-                    "entry_id": result.entry_id,
-                    "categories": result.categories,
-                }
-            )
-
+        results, _ = self._fetch(query, max_results, cutoff_date)
+        if self.cache is not None:
+            self.cache.put(key, results)
         return results
 
+    def sync_query(
+        self, query: str, max_results: int = 100, days_back: int = 7
+    ) -> list[Paper]:
+        """Fetch only what a query published since its last sync; returns the newly stored papers.
+
+        Paging stops at the query's high-water mark (or the `days_back` cutoff,
+        whichever is later), so a daily run costs one small request. A sync cut
+        short by `max_results` stores what it fetched but leaves the mark alone,
+        so the next sync pages back down to it instead of skipping the gap.
+        """
+        cutoff_date = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            days=days_back
+        )
+        mark = self.store.high_water_mark(query)
+        if mark is not None and mark > cutoff_date:
+            # Papers published at exactly the mark may not all have been seen.
+            cutoff_date = mark
+        papers, complete = self._fetch(query, max_results, cutoff_date)
+        return self.store.add_papers(papers, query if complete else None)
+
+    def sync_topics(
+        self,
+        categories: list[str] | None = None,
+        keywords: list[str] | None = None,
+        max_results: int = 100,
+        days_back: int = 7,
+    ) -> dict[str, list[Paper]]:
+        """Concurrent sync_query() for categories and keywords; returns new papers by label."""
+        queries = {category: f"cat:{category}" for category in categories or []}
+        queries.update({keyword: f"all:{keyword}" for keyword in keywords or []})
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                label: executor.submit(self.sync_query, query, max_results, days_back)
+                for label, query in queries.items()
+            }
+            return {label: future.result() for label, future in futures.items()}
+
+    def new_since(self, last_run: datetime.datetime) -> list[Paper]:
+        """Papers harvested by sync_* since last_run, newest publication first."""
+        return self.store.new_since(last_run)
+
+    def papers_by_keywords(
+        self, keywords: list[str], max_results: int = 10, days_back: int = 7
+    ) -> list[Paper]:
+        """search_by_keywords() returning Paper records."""
+        query = " AND ".join(f"all:{kw}" for kw in keywords)
+        return self._search(query, max_results, days_back)
+
+    def papers_by_category(
+        self, category: str, max_results: int = 10, days_back: int = 7
+    ) -> list[Paper]:
+        """search_by_category() returning Paper records."""
+        return self._search(f"cat:{category}", max_results, days_back)
+
+    def papers_by_topic(
+        self,
+        categories: list[str] | None = None,
+        keywords: list[str] | None = None,
+        max_results: int = 10,
+        days_back: int = 7,
+    ) -> dict[str, list[Paper]]:
+        """Fetch several categories and keywords concurrently.
+
+        Mirrors the `research` section of agent_config.yaml: each category and
+        each keyword is one query. Returns results keyed by category or keyword.
+        """
+        jobs = {
+            category: (self.papers_by_category, category)
+            for category in categories or []
+        }
+        jobs.update(
+            {
+                keyword: (self.papers_by_keywords, [keyword])
+                for keyword in keywords or []
+            }
+        )
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                label: executor.submit(method, arg, max_results, days_back)
+                for label, (method, arg) in jobs.items()
+            }
+            return {label: future.result() for label, future in futures.items()}
+
+    def search_by_keywords(
+        self, keywords: list[str], max_results: int = 10, days_back: int = 7
+    ) -> list[dict]:
+        """Search arXiv for recent papers by keywords."""
+        return [
+            paper.to_dict()
+            for paper in self.papers_by_keywords(keywords, max_results, days_back)
+        ]
+
     def search_by_category(
         self, category: str, max_results: int = 10, days_back: int = 7
     ) -> list[dict]:
         """Search arXiv by category (e.g., cs.AI, stat.ML)."""
-        query = f"cat:{category}"
-        search = arxiv.Search(
-            query=query,
-            max_results=max_results,
-            sort_by=arxiv.SortCriterion.SubmittedDate,
-            sort_order=arxiv.SortOrder.Descending,
+        return [
+            paper.to_dict()
+            for paper in self.papers_by_category(category, max_results, days_back)
+        ]
+
+    def search_topics(
+        self,
+        categories: list[str] | None = None,
+        keywords: list[str] | None = None,
+        max_results: int = 10,
+        days_back: int = 7,
+    ) -> dict[str, list[dict]]:
+        """papers_by_topic() with each paper as a dict."""
+        topics = self.papers_by_topic(categories, keywords, max_results, days_back)
+        return {
+            label: [paper.to_dict() for paper in papers]
+            for label, papers in topics.items()
+        }
+
+    def _fetch_ids(self, ids: list[str]) -> list[Paper]:
+        search = arxiv.Search(id_list=ids, max_results=len(ids))
+        return [Paper.from_result(result) for result in self._results(search)]
+
+    def papers_by_id(self, ids: list[str]) -> list[Paper | None]:
+        """Look up many papers, in input order (None for ids arXiv does not know).
+
+        Papers already in the local store are served from it; the rest are
+        fetched in id_list batches of ID_BATCH_SIZE, concurrently, and stored.
+        """
+        known = self.store.get_many(ids)
+        missing = list(
+            dict.fromkeys(normalize_id(i) for i in ids if normalize_id(i) not in known)
         )
+        batches = [
+            missing[i : i + ID_BATCH_SIZE]
+            for i in range(0, len(missing), ID_BATCH_SIZE)
+        ]
+        if batches:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                fetched = [
+                    paper
+                    for batch in executor.map(self._fetch_ids, batches)
+                    for paper in batch
+                ]
+            self.store.add_papers(fetched)
+            known.update((paper.paper_id, paper) for paper in fetched)
+        return [known.get(normalize_id(i)) for i in ids]
 
-        results = []
-        cutoff_date = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+    def get_papers_details(self, ids: list[str]) -> list[dict | None]:
+        """papers_by_id() with each paper as a dict."""
+        return [
+            paper.to_dict() if paper is not None else None
+            for paper in self.papers_by_id(ids)
+        ]
+
+    def get_paper_details(self, paper_id: str) -> dict | None:
+        """Get detailed information about a specific paper."""
+        return self.get_papers_details([paper_id])[0]
+
+    @staticmethod
+    def _published_after(days_back: int | None) -> str:
+        if days_back is None:
+            return ""
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
             days=days_back
         )
+        return cutoff.isoformat()
 
-        for result in self.client.results(search):
-            if result.published < cutoff_date:
-                continue
-
-            results.append(
-                {
-                    "title": result.title,
-                    "authors": [str(author) for author in result.authors],
-                    "published": result.published.isoformat(),
-                    "summary": result.summary,
-                    "pdf_url": result.pdf_url,
-                    "entry_id": result.entry_id,
-                    "categories": result.categories,
-                }
-            )
+    def search_local(
+        self, query: str, limit: int = 20, days_back: int | None = None
+    ) -> list[tuple[float, Paper]]:
+        """Ranked full-text search over stored papers, without a network request.
 
-        return results
+        Papers matching more of the query's words rank higher; (score, paper)
+        pairs come back best first.
+        """
+        return self.store.search(query.split(), limit, self._published_after(days_back))
 
-    def get_paper_details(self, paper_id: str) -> dict | None:
-        """Get detailed information about a specific paper."""
-        search = arxiv.Search(id_list=[paper_id])
-
-        try:
-            result = next(self.client.results(search))
-            return {
-                "title": result.title,
-                "authors": [str(author) for author in result.authors],
-                "published": result.published.isoformat(),
-                "summary": result.summary,
-                "pdf_url": result.pdf_url,
-                "entry_id": result.entry_id,
-                "categories": result.categories,
-            }
-        except StopIteration:
-            return None
+    def relevant_papers(
+        self,
+        days_back: int = 90,
+        limit: int = 20,
+        index_path: Path = PROMPT_INDEX_PATH,
+    ) -> list[PaperMatch]:
+        """Stored papers from the last `days_back` days ranked against the prompt library's tags."""
+        tag_prompts: dict[str, list[str]] = {}
+        for prompt_id, tags in prompt_tags(index_path):
+            for tag in tags or []:
+                tag_prompts.setdefault(str(tag), []).append(prompt_id)
+        return self.store.match_tags(
+            tag_prompts, limit, self._published_after(days_back)
+        )
@@ -0,0 +1,361 @@
+"""Local storage for arXiv papers: the response cache, the paper store and its FTS index.
+
+Nothing here talks to arXiv, so the module does not need the arxiv package.
+"""
+
+import datetime
+import heapq
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, astuple, dataclass, fields
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import arxiv
+
+# bm25() column weights for (title, summary): a term in the title counts ten times as much.
+FTS_WEIGHTS = (10.0, 1.0)
+_VERSION_RE = re.compile(r"v\d+$")
+
+
+def normalize_id(entry_id_or_id: str) -> str:
+    """Version-less arXiv id from an id or entry URL ('http://arxiv.org/abs/2401.00001v2' -> '2401.00001')."""
+    return _VERSION_RE.sub("", entry_id_or_id.rsplit("/abs/", 1)[-1])
+
+
+@dataclass(slots=True)
+class Paper:
+    """One arXiv paper. Supports paper["title"] for code written against the old dicts."""
+
+    entry_id: str
+    title: str
+    authors: list[str]
+    published: str
+    summary: str
+    pdf_url: str
+    categories: list[str]
+
+    @classmethod
+    def from_result(cls, result: "arxiv.Result") -> "Paper":
+        return cls(
+            entry_id=result.entry_id,
+            title=result.title,
+            authors=[str(author) for author in result.authors],
+            published=result.published.isoformat(),
+            summary=result.summary,
+            pdf_url=result.pdf_url,
+            categories=result.categories,
+        )
+
+    @property
+    def paper_id(self) -> str:
+        return normalize_id(self.entry_id)
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+PAPER_COLUMNS = [field.name for field in fields(Paper)]
+
+
+@dataclass(slots=True)
+class PaperMatch:
+    """A paper scored against the prompt library's tags."""
+
+    paper: Paper
+    score: float
+    tags: list[str]
+    prompt_ids: list[str]
+
+
+def fts_query(terms: list[str]) -> str:
+    """FTS5 query matching any of `terms`, each as a phrase of its words.
+
+    Quoting every word keeps user input from being parsed as FTS syntax, and
+    'ml-training' becomes the phrase "ml training".
+    """
+    phrases = []
+    for term in terms:
+        words = re.findall(r"\w+", term.lower())
+        if words:
+            phrases.append('"' + " ".join(words) + '"')
+    return " OR ".join(phrases)
+
+
+class RateLimiter:
+    """Spaces calls to wait() at least `interval` seconds apart across threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ResponseCache:
+    """SQLite cache of arXiv query results, expired after `ttl_seconds`."""
+
+    def __init__(self, path: Path, ttl_seconds: float):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+
+    def get(self, key: str) -> list[Paper] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, payload FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            return None
+        # Stored as rows of field values rather than dicts to keep payloads small.
+        return [Paper(*values) for values in json.loads(row[1])]
+
+    def put(self, key: str, results: list[Paper]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (key, time.time(), json.dumps([astuple(paper) for paper in results])),
+            )
+
+    def clear_expired(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE fetched_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+        return cursor.rowcount
+
+
+class PaperStore:
+    """SQLite store of harvested papers plus a high-water mark per sync query.
+
+    The mark is the publication time of the newest paper a completed sync of a
+    query has returned, so the next sync can stop paging as soon as it reaches
+    older results. Titles and summaries are indexed in an FTS5 table kept
+    current by an insert trigger.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS papers ("
+                "entry_id TEXT PRIMARY KEY, title TEXT, authors TEXT, published TEXT, "
+                "summary TEXT, pdf_url TEXT, categories TEXT, first_seen REAL NOT NULL, "
+                "paper_id TEXT)"
+            )
+            columns = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(papers)")
+            }
+            if "paper_id" not in columns:
+                self._conn.execute("ALTER TABLE papers ADD COLUMN paper_id TEXT")
+                self._conn.executemany(
+                    "UPDATE papers SET paper_id = ? WHERE entry_id = ?",
+                    [
+                        (normalize_id(entry_id), entry_id)
+                        for (entry_id,) in self._conn.execute(
+                            "SELECT entry_id FROM papers"
+                        )
+                    ],
+                )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS papers_first_seen ON papers (first_seen)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS papers_paper_id ON papers (paper_id)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS papers_published ON papers (published)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state "
+                "(query TEXT PRIMARY KEY, high_water TEXT NOT NULL, synced_at REAL NOT NULL)"
+            )
+            has_fts = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'papers_fts'"
+            ).fetchone()
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(title, summary, "
+                "content='papers', content_rowid='rowid', tokenize='porter unicode61')"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN "
+                "INSERT INTO papers_fts (rowid, title, summary) "
+                "VALUES (new.rowid, new.title, new.summary); END"
+            )
+            if not has_fts:
+                # Index papers stored before the FTS table existed.
+                self._conn.execute(
+                    "INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')"
+                )
+
+    @staticmethod
+    def _paper(row: tuple) -> Paper:
+        entry_id, title, authors, published, summary, pdf_url, categories = row
+        return Paper(
+            entry_id,
+            title,
+            json.loads(authors),
+            published,
+            summary,
+            pdf_url,
+            json.loads(categories),
+        )
+
+    def _papers(self, where: str, params: tuple) -> list[Paper]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(PAPER_COLUMNS)} FROM papers WHERE {where}", params
+            ).fetchall()
+        return [self._paper(row) for row in rows]
+
+    def high_water_mark(self, query: str) -> datetime.datetime | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water FROM sync_state WHERE query = ?", (query,)
+            ).fetchone()
+        return datetime.datetime.fromisoformat(row[0]) if row else None
+
+    def add_papers(self, papers: list[Paper], query: str | None = None) -> list[Paper]:
+        """Insert papers not stored yet and advance the query's mark; returns the new ones."""
+        now = time.time()
+        with self._lock, self._conn:
+            new = []
+            for paper in papers:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO papers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        paper.entry_id,
+                        paper.title,
+                        json.dumps(paper.authors),
+                        paper.published,
+                        paper.summary,
+                        paper.pdf_url,
+                        json.dumps(paper.categories),
+                        now,
+                        paper.paper_id,
+                    ),
+                )
+                if cursor.rowcount:
+                    new.append(paper)
+            if query is not None and papers:
+                newest = max(paper.published for paper in papers)
+                self._conn.execute(
+                    "INSERT INTO sync_state VALUES (?, ?, ?) ON CONFLICT (query) DO UPDATE SET "
+                    "high_water = MAX(high_water, excluded.high_water), synced_at = excluded.synced_at",
+                    (query, newest, now),
+                )
+        return new
+
+    def get_many(self, ids: list[str]) -> dict[str, Paper]:
+        """Stored papers by version-less id, for whichever of `ids` are present."""
+        wanted = list(dict.fromkeys(normalize_id(i) for i in ids))
+        found = {}
+        # Stay well under SQLite's bound-parameter limit.
+        for start in range(0, len(wanted), 500):
+            chunk = wanted[start : start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for paper in self._papers(f"paper_id IN ({placeholders})", tuple(chunk)):
+                found[paper.paper_id] = paper
+        return found
+
+    def new_since(self, since: datetime.datetime) -> list[Paper]:
+        """Papers first stored at or after `since`, newest publication first."""
+        return self._papers(
+            "first_seen >= ? ORDER BY published DESC", (since.timestamp(),)
+        )
+
+    def _match(
+        self, query: str, published_after: str, limit: int | None = None
+    ) -> list[tuple]:
+        """(rowid, score) of papers matching an FTS query, best first; higher scores are better."""
+        sql = (
+            f"SELECT papers.rowid, -bm25(papers_fts, {FTS_WEIGHTS[0]}, {FTS_WEIGHTS[1]}) AS score "
+            "FROM papers_fts JOIN papers ON papers.rowid = papers_fts.rowid "
+            "WHERE papers_fts MATCH ? AND papers.published >= ? ORDER BY score DESC"
+        )
+        params = (query, published_after)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _by_rowid(self, rowids: list[int]) -> dict[int, Paper]:
+        placeholders = ", ".join("?" * len(rowids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT rowid, {', '.join(PAPER_COLUMNS)} FROM papers WHERE rowid IN ({placeholders})",
+                rowids,
+            ).fetchall()
+        return {row[0]: self._paper(row[1:]) for row in rows}
+
+    def search(
+        self, terms: list[str], limit: int = 20, published_after: str = ""
+    ) -> list[tuple[float, Paper]]:
+        """Stored papers matching any of `terms`, ranked by BM25 (title weighted over summary)."""
+        query = fts_query(terms)
+        if not query:
+            return []
+        matches = self._match(query, published_after, limit)
+        papers = self._by_rowid([rowid for rowid, _ in matches]) if matches else {}
+        return [(score, papers[rowid]) for rowid, score in matches]
+
+    def match_tags(
+        self,
+        tag_prompts: dict[str, list[str]],
+        limit: int = 20,
+        published_after: str = "",
+    ) -> list[PaperMatch]:
+        """Score stored papers against tags, given the prompt ids that use each tag.
+
+        A paper's score is the sum, over the tags it matches, of the tag's BM25
+        score weighted by log(1 + prompts using the tag), so themes the library
+        covers heavily count for more.
+        """
+        scores: dict[int, float] = {}
+        matched: dict[int, list[str]] = {}
+        for tag, prompt_ids in tag_prompts.items():
+            query = fts_query([tag])
+            if not query:
+                continue
+            weight = math.log1p(len(prompt_ids))
+            for rowid, score in self._match(query, published_after):
+                scores[rowid] = scores.get(rowid, 0.0) + score * weight
+                matched.setdefault(rowid, []).append(tag)
+        best = heapq.nlargest(limit, scores, key=scores.get)
+        papers = self._by_rowid(best) if best else {}
+        return [
+            PaperMatch(
+                paper=papers[rowid],
+                score=scores[rowid],
+                tags=matched[rowid],
+                prompt_ids=sorted(
+                    {pid for tag in matched[rowid] for pid in tag_prompts[tag]}
+                ),
+            )
+            for rowid in best
+        ]
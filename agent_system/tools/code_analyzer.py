@@ -1,96 +1,469 @@
 """Code analysis tools for refactoring."""
 
 import ast
+import hashlib
+import json
+import os
+import re
+import shutil
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from .ignore_rules import IgnoreMatcher
+
+# Bump when the shape of analyze_file() results changes, to discard old cache entries.
+ANALYSIS_VERSION = 2
+RUFF_LINT_ARGS = ["--select", "E,F,I,UP,B,SIM", "--ignore", "E501", "--line-length", "120"]
+RUFF_CONFIG_FILES = ("pyproject.toml", "ruff.toml", ".ruff.toml")
+# "Would reformat: path" (ruff < 0.12) or "path:row:col: code: message" (concise).
+_RUFF_FORMAT_LINE = re.compile(r"^(?:Would reformat: (?P<old>.+)|(?P<path>.+?):\d+:\d+: (?P<code>[\w-]+):)")
+# Below this many files to parse, a process pool costs more to start than it saves.
+MIN_FILES_FOR_POOL = 32
+
+# Nodes that add a decision point to a function's cyclomatic complexity.
+_BRANCH_NODES = (
+    ast.If,
+    ast.IfExp,
+    ast.For,
+    ast.AsyncFor,
+    ast.While,
+    ast.ExceptHandler,
+    ast.Assert,
+    ast.match_case,
+)
+
+# Nodes with nothing below them that the analysis needs; never visited.
+_LEAF_NODES = (
+    ast.Name,
+    ast.Constant,
+    ast.expr_context,
+    ast.operator,
+    ast.unaryop,
+    ast.cmpop,
+    ast.boolop,
+)
+
+
+def _dotted_name(node: ast.expr) -> str | None:
+    """'a.b.c' for a Name/Attribute chain, None for anything else (calls, subscripts...)."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+class _AnalysisVisitor(ast.NodeVisitor):
+    """Collects classes, functions (with spans, complexity and calls) and imports in one pass."""
+
+    _handlers: dict[type, object] = {}
+
+    def __init__(self):
+        self.scope: list[str] = []
+        self.function_stack: list[dict] = []
+        self.classes: list[dict] = []
+        self.functions: list[dict] = []
+        self.imports: list[str] = []
+
+    def _qualname(self, name: str) -> str:
+        return ".".join(self.scope + [name])
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.classes.append(
+            {
+                "name": self._qualname(node.name),
+                "line": node.lineno,
+                "end_line": node.end_lineno,
+                "bases": [_dotted_name(base) or ast.unparse(base) for base in node.bases],
+            }
+        )
+        self.scope.append(node.name)
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def _visit_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        record = {
+            "name": self._qualname(node.name),
+            "line": node.lineno,
+            "end_line": node.end_lineno,
+            "async": isinstance(node, ast.AsyncFunctionDef),
+            "complexity": 1,
+            "calls": [],
+        }
+        self.functions.append(record)
+        self.scope.append(node.name)
+        self.function_stack.append(record)
+        self.generic_visit(node)
+        self.function_stack.pop()
+        self.scope.pop()
+        record["calls"] = sorted(set(record["calls"]))
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if self.function_stack:
+            callee = _dotted_name(node.func)
+            if callee is not None:
+                self.function_stack[-1]["calls"].append(callee)
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        self.imports.extend(alias.name for alias in node.names)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        # Relative imports keep their leading dots: "from . import x" -> ".x".
+        module = "." * node.level + (node.module or "")
+        separator = "" if module.endswith(".") else "."
+        self.imports.extend(f"{module}{separator}{alias.name}" for alias in node.names)
+
+    def visit(self, node: ast.AST) -> None:
+        # NodeVisitor.visit() formats and looks up the method name for every node;
+        # resolve it once per node type instead.
+        method = self._handlers.get(type(node))
+        if method is None:
+            method = self._handlers[type(node)] = vars(_AnalysisVisitor).get(
+                "visit_" + type(node).__name__, _AnalysisVisitor.generic_visit
+            )
+        method(self, node)
+
+    def generic_visit(self, node: ast.AST) -> None:
+        if self.function_stack:
+            record = self.function_stack[-1]
+            if isinstance(node, _BRANCH_NODES):
+                record["complexity"] += 1
+            elif isinstance(node, ast.BoolOp):
+                record["complexity"] += len(node.values) - 1
+            elif isinstance(node, ast.comprehension):
+                record["complexity"] += 1 + len(node.ifs)
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST) and not isinstance(item, _LEAF_NODES):
+                        self.visit(item)
+            elif isinstance(value, ast.AST) and not isinstance(value, _LEAF_NODES):
+                self.visit(value)
+
+
+def analyze_source(source: bytes) -> dict:
+    """Analysis of one module's source; {"error": ...} if it does not parse."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        return {"error": str(e)}
+
+    visitor = _AnalysisVisitor()
+    visitor.visit(tree)
+    return {
+        "classes": [record["name"].rsplit(".", 1)[-1] for record in visitor.classes],
+        "functions": [record["name"].rsplit(".", 1)[-1] for record in visitor.functions],
+        "imports": visitor.imports,
+        "class_details": visitor.classes,
+        "function_details": visitor.functions,
+        "line_count": len(source.splitlines()),
+    }
+
+
+def _analyze_path(path: str) -> tuple[str, dict]:
+    """(sha256, analysis) of a file; runs in worker processes."""
+    with open(path, "rb") as f:
+        source = f.read()
+    return hashlib.sha256(source).hexdigest(), analyze_source(source)
+
 
 class CodeAnalyzer:
-    """Static analysis and refactoring capabilities."""
+    """Static analysis and refactoring capabilities.
 
-    def __init__(self, project_root: Path | None = None):
+    Per-file results are cached in `cache_path` keyed on (path, mtime, sha256):
+    a file whose mtime and size are unchanged is not read, and one whose content
+    hashes the same is not re-parsed. Likewise quality_check() remembers the hash
+    each file had when ruff last found it clean, in `clean_state_path`.
+    """
+
+    def __init__(
+        self,
+        project_root: Path | None = None,
+        cache_path: Path | None = None,
+        jobs: int | None = None,
+    ):
         if project_root is None:
             project_root = Path(__file__).parent.parent.parent
         self.project_root = project_root
+        self.cache_path = cache_path or project_root / "metadata" / "code_analysis_cache.json"
+        self.jobs = jobs or os.cpu_count() or 1
+        self.ignore = IgnoreMatcher(project_root)
+        self.clean_state_path = project_root / "metadata" / "ruff_clean.json"
+        self._cache: dict[str, dict] | None = None
+        self._ruff_command: list[str] | None = None
+
+    def _load_cache(self) -> dict[str, dict]:
+        if self._cache is None:
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            self._cache = data.get("files", {}) if data.get("version") == ANALYSIS_VERSION else {}
+        return self._cache
+
+    def _save_cache(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": ANALYSIS_VERSION, "files": self._cache}))
+        os.replace(tmp_path, self.cache_path)
+
+    def _analyze_paths(self, paths: list[Path], directory: Path | None = None) -> list[dict]:
+        """Cached analysis of each path, in order; only changed files are parsed.
+
+        With `directory`, cache entries under it that are not in `paths` (deleted
+        or now ignored files) are dropped.
+        """
+        cache = self._load_cache()
+        keys = [os.path.abspath(path) for path in paths]
+        results: list[dict | None] = [None] * len(paths)
+        stale: dict[str, tuple[int, int]] = {}
+        changed = False
+        if directory is not None:
+            prefix = os.path.join(os.path.abspath(directory), "")
+            current = set(keys)
+            for key in [k for k in cache if k.startswith(prefix) and k not in current]:
+                del cache[key]
+                changed = True
+        for i, key in enumerate(keys):
+            st = os.stat(key)
+            entry = cache.get(key)
+            if entry is not None and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                results[i] = entry["result"]
+                continue
+            if entry is not None:
+                # Touched but maybe not edited (checkout, formatter no-op): compare content.
+                with open(key, "rb") as f:
+                    if hashlib.sha256(f.read()).hexdigest() == entry["sha256"]:
+                        entry["mtime_ns"], entry["size"] = st.st_mtime_ns, st.st_size
+                        results[i] = entry["result"]
+                        changed = True
+                        continue
+            stale[key] = (st.st_mtime_ns, st.st_size)
+
+        if stale:
+            if self.jobs > 1 and len(stale) >= MIN_FILES_FOR_POOL:
+                with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                    analyzed = list(executor.map(_analyze_path, stale, chunksize=16))
+            else:
+                analyzed = [_analyze_path(key) for key in stale]
+            for key, (sha256, result) in zip(stale, analyzed, strict=True):
+                mtime_ns, size = stale[key]
+                cache[key] = {"mtime_ns": mtime_ns, "size": size, "sha256": sha256, "result": result}
+            changed = True
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    results[i] = cache[key]["result"]
+
+        if changed:
+            self._save_cache()
+        return [{"file": str(path), **result} for path, result in zip(paths, results, strict=True)]
 
     def analyze_file(self, file_path: Path) -> dict:
         """Analyze a Python file."""
-        with open(file_path) as f:
-            content = f.read()
+        return self._analyze_paths([file_path])[0]
+
+    def python_files(self, directory: Path) -> list[Path]:
+        """Python files under directory, skipping what the shared ignore rules exclude."""
+        files = []
+        for dirpath, _, filenames in self.ignore.walk(directory):
+            files.extend(Path(dirpath, name) for name in filenames if name.endswith(".py"))
+        return files
+
+    def analyze_directory(self, directory: Path) -> list[dict]:
+        """Analyze all Python files in a directory."""
+        return self._analyze_paths(self.python_files(directory), directory)
+
+    @property
+    def ruff_command(self) -> list[str]:
+        """The ruff executable, resolved once; `uv run ruff` only as a last resort."""
+        if self._ruff_command is None:
+            venv_ruff = self.project_root / ".venv" / "bin" / "ruff"
+            if venv_ruff.exists():
+                self._ruff_command = [str(venv_ruff)]
+            elif shutil.which("ruff"):
+                self._ruff_command = [shutil.which("ruff")]
+            else:
+                try:
+                    from ruff.__main__ import find_ruff_bin
+
+                    self._ruff_command = [os.fsdecode(find_ruff_bin())]
+                except (ImportError, FileNotFoundError):
+                    self._ruff_command = ["uv", "run", "ruff"]
+        return self._ruff_command
 
+    def _ruff_config_key(self) -> str:
+        """Changes whenever the lint arguments or the project's ruff config change."""
+        digest = hashlib.sha256(json.dumps(RUFF_LINT_ARGS).encode())
+        for name in RUFF_CONFIG_FILES:
+            try:
+                digest.update((self.project_root / name).read_bytes())
+            except OSError:
+                continue
+        return digest.hexdigest()
+
+    def _load_clean_state(self) -> dict:
+        config = self._ruff_config_key()
         try:
-            tree = ast.parse(content)
-        except SyntaxError as e:
-            return {"error": str(e)}
-
-        classes = []
-        functions = []
-        imports = []
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                classes.append(node.name)
-            elif isinstance(node, ast.FunctionDef):
-                functions.append(node.name)
-            elif isinstance(node, ast.Import):
-                for alias in node.names:
-                    imports.append(alias.name)
-            elif isinstance(node, ast.ImportFrom) and node.module:
-                for alias in node.names:
-                    imports.append(f"{node.module}.{alias.name}")
+            with open(self.clean_state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        if state.get("config") != config:
+            state = {"config": config, "lint": {}, "format": {}}
+        return state
 
-        return {
-            "file": str(file_path),
-            "classes": classes,
-            "functions": functions,
-            "imports": imports,
-            "line_count": len(content.splitlines()),
+    def _save_clean_state(self, state: dict) -> None:
+        self.clean_state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.clean_state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(state))
+        os.replace(tmp_path, self.clean_state_path)
+
+    def _display_path(self, path: str) -> str:
+        try:
+            return str(Path(path).relative_to(self.project_root.absolute()))
+        except ValueError:
+            return path
+
+    def quality_check(
+        self, file_paths: list[Path] | None = None, lint: bool = True, format: bool = True
+    ) -> dict:
+        """Run ruff lint and format checks over files changed since they were last clean.
+
+        Files whose content hash matches their last clean result are skipped;
+        the lint and format runs start together, each over its own pending files.
+        Returns {"status", "checked", "skipped", "lint": {file: [finding...]},
+        "format": [file...], "errors": {check: stderr}}.
+        """
+        if file_paths is None:
+            file_paths = self.python_files(self.project_root)
+        hashes = {}
+        for path in file_paths:
+            with open(path, "rb") as f:
+                hashes[os.path.abspath(path)] = hashlib.sha256(f.read()).hexdigest()
+
+        state = self._load_clean_state()
+        checks = [name for name, enabled in (("lint", lint), ("format", format)) if enabled]
+        pending = {
+            name: [key for key, sha256 in hashes.items() if state[name].get(key) != sha256]
+            for name in checks
+        }
+        commands = {
+            "lint": ["check", "--output-format", "json", *RUFF_LINT_ARGS],
+            "format": ["format", "--check"],
+        }
+        # `ruff format --check` has no JSON output before ruff 0.12; newer versions
+        # print one "path:row:col: code: message" line per file with this setting.
+        env = {**os.environ, "RUFF_OUTPUT_FORMAT": "concise"}
+        processes = {
+            name: subprocess.Popen(
+                self.ruff_command + commands[name] + ["--"] + pending[name],
+                cwd=self.project_root,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env=env,
+            )
+            for name in checks
+            if pending[name]
         }
 
-    def analyze_directory(self, directory: Path) -> list[dict]:
-        """Analyze all Python files in a directory."""
-        results = []
-        for py_file in directory.rglob("*.py"):
-            results.append(self.analyze_file(py_file))
-        return results
+        lint_findings: dict[str, list[dict]] = {}
+        needs_format: list[str] = []
+        errors: dict[str, str] = {}
+        for name, process in processes.items():
+            stdout, stderr = process.communicate()
+            if name == "lint":
+                try:
+                    items = json.loads(stdout or "[]")
+                except ValueError:
+                    items = None
+                if process.returncode not in (0, 1) or items is None:
+                    errors[name] = stderr.strip()
+                    continue
+                for item in items:
+                    key = os.path.abspath(os.path.join(self.project_root, item["filename"]))
+                    lint_findings.setdefault(key, []).append(
+                        {
+                            # Older ruff reports syntax errors with a null code.
+                            "rule": item["code"] or "invalid-syntax",
+                            "message": item["message"],
+                            "line": item["location"]["row"],
+                            "column": item["location"]["column"],
+                            "end_line": item["end_location"]["row"],
+                            "end_column": item["end_location"]["column"],
+                            "fixable": item.get("fix") is not None,
+                        }
+                    )
+                failed = lint_findings
+            else:
+                failed = set()
+                for line in stdout.splitlines():
+                    match = _RUFF_FORMAT_LINE.match(line)
+                    if match is None:
+                        continue
+                    path = match["old"] or match["path"]
+                    key = os.path.abspath(os.path.join(self.project_root, path))
+                    failed.add(key)
+                    if match["code"] in (None, "unformatted"):
+                        needs_format.append(key)
+                if process.returncode not in (0, 1) and not failed:
+                    errors[name] = stderr.strip()
+                    continue
+            for key in pending[name]:
+                if key in failed:
+                    state[name].pop(key, None)
+                else:
+                    state[name][key] = hashes[key]
+        if processes:
+            self._save_clean_state(state)
+
+        checked = set().union(*pending.values())
+        if errors:
+            status = "error"
+        elif lint_findings or needs_format:
+            status = "issues_found"
+        else:
+            status = "clean"
+        return {
+            "status": status,
+            "checked": len(checked),
+            "skipped": len(hashes) - len(checked),
+            "lint": {
+                self._display_path(key): sorted(findings, key=lambda f: (f["line"], f["column"]))
+                for key, findings in sorted(lint_findings.items())
+            },
+            "format": sorted(self._display_path(key) for key in needs_format),
+            "errors": errors,
+        }
 
     def lint_check(self, file_paths: list[Path] | None = None) -> dict[str, str]:
         """Run ruff linting."""
-        files = [str(self.project_root)] if file_paths is None else [str(f) for f in file_paths]
-
-        cmd = [
-            "uv",
-            "run",
-            "ruff",
-            "check",
-            "--select",
-            "E,F,I,UP,B,SIM",
-            "--ignore",
-            "E501",
-            "--line-length",
-            "120",
-        ] + files
-
-        result = subprocess.run(
-            cmd, cwd=self.project_root, capture_output=True, text=True
-        )
-
-        if result.returncode == 0:
+        result = self.quality_check(file_paths, format=False)
+        if result["status"] == "clean":
             return {"status": "clean"}
-        else:
-            return {"status": "issues_found", "output": result.stdout}
+        lines = [
+            f"{path}:{finding['line']}:{finding['column']}: {finding['rule']} {finding['message']}"
+            for path, findings in result["lint"].items()
+            for finding in findings
+        ]
+        return {"status": "issues_found", "output": "\n".join(lines + list(result["errors"].values()))}
 
     def format_check(self, file_paths: list[Path] | None = None) -> dict[str, str]:
         """Check code formatting with ruff."""
-        files = [str(self.project_root)] if file_paths is None else [str(f) for f in file_paths]
-
-        cmd = ["uv", "run", "ruff", "format", "--check"] + files
-
-        result = subprocess.run(
-            cmd, cwd=self.project_root, capture_output=True, text=True
-        )
-
-        if result.returncode == 0:
+        result = self.quality_check(file_paths, lint=False)
+        if result["status"] == "clean":
             return {"status": "clean"}
-        else:
-            return {"status": "needs_formatting", "output": result.stdout}
+        lines = [f"Would reformat: {path}" for path in result["format"]]
+        return {"status": "needs_formatting", "output": "\n".join(lines + list(result["errors"].values()))}
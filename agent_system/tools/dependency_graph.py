@@ -0,0 +1,211 @@
+"""Import dependency graph over a project's Python files."""
+
+import os
+from array import array
+from pathlib import Path
+
+from .code_analyzer import CodeAnalyzer
+
+
+def _module_names(path: str, source_roots: list[str]) -> list[str]:
+    """Dotted names a file is importable as, one per source root containing it."""
+    names = []
+    for root in source_roots:
+        rel = os.path.relpath(path, root)
+        if rel.startswith(".."):
+            continue
+        parts = rel[: -len(".py")].split(os.sep)
+        if parts[-1] == "__init__":
+            parts.pop()
+        if parts and all(part.isidentifier() for part in parts):
+            names.append(".".join(parts))
+    return names
+
+
+class DependencyGraph:
+    """Which project files import which, kept as integer-id adjacency arrays.
+
+    Every file gets a stable integer id; `_deps[id]` and `_rdeps[id]` are
+    array('i') of the ids it imports and the ids importing it. Imports are
+    resolved from CodeAnalyzer output against the modules under `source_roots`
+    (the longest dotted prefix that is a project module wins, so "pkg.mod.func"
+    resolves to pkg/mod.py). update_file()/remove_file() patch a single file's
+    edges, re-resolving only the imports its appearance or removal can change.
+    """
+
+    def __init__(
+        self,
+        project_root: Path | None = None,
+        source_roots: list[Path] | None = None,
+        analyzer: CodeAnalyzer | None = None,
+    ):
+        self.analyzer = analyzer or CodeAnalyzer(project_root)
+        self.project_root = Path(self.analyzer.project_root)
+        self.source_roots = [
+            os.path.abspath(root) for root in (source_roots or [self.project_root])
+        ]
+        self._reset()
+
+    def _reset(self) -> None:
+        self._paths: list[str | None] = []
+        self._ids: dict[str, int] = {}
+        self._modules: dict[str, int] = {}
+        self._imports: list[list[str]] = []
+        self._deps: list[array] = []
+        self._rdeps: list[array] = []
+        # Absolute import name -> ids importing it, to find the files whose
+        # resolution changes when a module appears or disappears.
+        self._importers: dict[str, set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _id(self, path: Path | str) -> int | None:
+        return self._ids.get(os.path.abspath(path))
+
+    def _absolute_imports(self, file_id: int, imports: list[str]) -> list[str]:
+        """Imports with relative ones ("..mod.name") made absolute for the importing file."""
+        path = self._paths[file_id]
+        names = _module_names(path, self.source_roots)
+        package = names[0].split(".") if names else []
+        if not path.endswith("__init__.py"):
+            package = package[:-1]
+        absolute = []
+        for name in imports:
+            level = len(name) - len(name.lstrip("."))
+            if level == 0:
+                absolute.append(name)
+            elif level - 1 <= len(package):
+                base = package[: len(package) - (level - 1)]
+                absolute.append(
+                    ".".join(base + [name[level:]] if name[level:] else base)
+                )
+        return absolute
+
+    def _resolve(self, name: str) -> int | None:
+        parts = name.split(".")
+        for end in range(len(parts), 0, -1):
+            target = self._modules.get(".".join(parts[:end]))
+            if target is not None:
+                return target
+        return None
+
+    def _set_edges(self, file_id: int, targets: set[int]) -> None:
+        for target in self._deps[file_id]:
+            if target not in targets:
+                self._rdeps[target].remove(file_id)
+        old = set(self._deps[file_id])
+        for target in targets - old:
+            self._rdeps[target].append(file_id)
+        self._deps[file_id] = array("i", sorted(targets))
+
+    def _link(self, file_id: int) -> None:
+        targets = {self._resolve(name) for name in self._imports[file_id]}
+        targets.discard(None)
+        targets.discard(file_id)
+        self._set_edges(file_id, targets)
+
+    def _relink_importers_of(self, module_names: list[str]) -> None:
+        affected = set()
+        for name, importers in self._importers.items():
+            if any(
+                name == module or name.startswith(module + ".")
+                for module in module_names
+            ):
+                affected |= importers
+        for file_id in affected:
+            self._link(file_id)
+
+    def _add(self, path: str, result: dict) -> int:
+        file_id = self._ids.get(path)
+        if file_id is None:
+            file_id = len(self._paths)
+            self._paths.append(path)
+            self._imports.append([])
+            self._deps.append(array("i"))
+            self._rdeps.append(array("i"))
+            self._ids[path] = file_id
+        for name in self._imports[file_id]:
+            self._importers[name].discard(file_id)
+        imports = self._absolute_imports(file_id, result.get("imports", []))
+        self._imports[file_id] = imports
+        for name in imports:
+            self._importers.setdefault(name, set()).add(file_id)
+        return file_id
+
+    def build(self) -> "DependencyGraph":
+        """(Re)build the graph from the analyzer's cached results for every root."""
+        self._reset()
+        results = []
+        seen = set()
+        for root in self.source_roots:
+            for result in self.analyzer.analyze_directory(Path(root)):
+                path = os.path.abspath(result["file"])
+                if path not in seen:
+                    seen.add(path)
+                    results.append((path, result))
+        for path, result in results:
+            file_id = self._add(path, result)
+            for name in _module_names(path, self.source_roots):
+                self._modules[name] = file_id
+        for file_id in range(len(self._paths)):
+            self._link(file_id)
+        return self
+
+    def update_file(self, path: Path | str) -> None:
+        """Re-analyze one edited or new file and patch its edges."""
+        path = os.path.abspath(path)
+        is_new = path not in self._ids
+        self._add(path, self.analyzer.analyze_file(Path(path)))
+        file_id = self._ids[path]
+        self._link(file_id)
+        if is_new:
+            names = _module_names(path, self.source_roots)
+            for name in names:
+                self._modules[name] = file_id
+            self._relink_importers_of(names)
+
+    def remove_file(self, path: Path | str) -> None:
+        """Drop a deleted file; imports of it re-resolve (to its package, if any)."""
+        file_id = self._id(path)
+        if file_id is None:
+            return
+        names = [name for name, target in self._modules.items() if target == file_id]
+        for name in names:
+            del self._modules[name]
+        self._set_edges(file_id, set())
+        for name in self._imports[file_id]:
+            self._importers[name].discard(file_id)
+        self._imports[file_id] = []
+        del self._ids[self._paths[file_id]]
+        self._paths[file_id] = None
+        self._relink_importers_of(names)
+
+    def _path_list(self, ids) -> list[str]:
+        return sorted(os.path.relpath(self._paths[i], self.project_root) for i in ids)
+
+    def dependencies(self, path: Path | str) -> list[str]:
+        """Project files `path` imports directly."""
+        file_id = self._id(path)
+        return [] if file_id is None else self._path_list(self._deps[file_id])
+
+    def dependents(self, path: Path | str) -> list[str]:
+        """Project files that import `path` directly."""
+        file_id = self._id(path)
+        return [] if file_id is None else self._path_list(self._rdeps[file_id])
+
+    def impact(self, paths: list[Path | str]) -> list[str]:
+        """Every file that imports any of `paths`, directly or transitively."""
+        seen = bytearray(len(self._paths))
+        stack = [file_id for file_id in map(self._id, paths) if file_id is not None]
+        for file_id in stack:
+            seen[file_id] = 1
+        start = set(stack)
+        while stack:
+            for importer in self._rdeps[stack.pop()]:
+                if not seen[importer]:
+                    seen[importer] = 1
+                    stack.append(importer)
+        return self._path_list(
+            i for i in range(len(seen)) if seen[i] and i not in start
+        )
@@ -1,76 +1,304 @@
 """File organization and directory analysis tools."""
 
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
+from .ignore_rules import IgnoreMatcher
+
+# find_duplicates() compares this much of each end of a file before hashing it whole.
+HASH_EDGE_BYTES = 4096
+HASH_WORKERS = 8
+
+
+@dataclass(slots=True)
+class WalkSnapshot:
+    """One pass over a directory tree, with ignored directories pruned.
+
+    Paths are relative to `root`, in sorted walk order; files are
+    (path, size, device, inode, mtime_ns). `dir_sizes` holds the total size of the
+    non-ignored files below each directory (the root is "").
+    """
+
+    root: Path
+    directories: list[str]
+    files: list[tuple[str, int, int, int, int]]
+    dir_sizes: dict[str, int]
+
+
+def _hash_edges(path: Path) -> str | None:
+    """BLAKE2 of the first and last HASH_EDGE_BYTES (the whole file when it is that short)."""
+    try:
+        with open(path, "rb") as f:
+            digest = hashlib.blake2b(f.read(HASH_EDGE_BYTES), digest_size=16)
+            if f.seek(0, os.SEEK_END) > 2 * HASH_EDGE_BYTES:
+                f.seek(-HASH_EDGE_BYTES, os.SEEK_END)
+            else:
+                f.seek(HASH_EDGE_BYTES)
+            digest.update(f.read())
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _hash_full(path: Path) -> str | None:
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def walk_tree(root: Path, matcher: IgnoreMatcher | None = None) -> WalkSnapshot:
+    """Walk `root` once with os.scandir, stat each file once and sum sizes bottom-up.
+
+    Entries `matcher` ignores (by default, the rules for `root` itself) are
+    skipped, and ignored directories are never opened.
+    """
+    if matcher is None:
+        matcher = IgnoreMatcher(root)
+    base = matcher.relative(root)
+    if base is None:
+
+        def ignored(rel: str, is_dir: bool) -> bool:
+            return bool(matcher.base_rules.match(rel.rpartition("/")[2], is_dir))
+
+    else:
+        prefix = base + "/" if base else ""
+
+        def ignored(rel: str, is_dir: bool) -> bool:
+            return matcher.ignored_entry(prefix + rel, is_dir)
+
+    directories: list[str] = []
+    files: list[tuple[str, int, int, int, int]] = []
+    totals = [0]
+    parents = [-1]
+    rel_dirs = [""]
+    stack = [0]
+    while stack:
+        index = stack.pop()
+        rel_dir = rel_dirs[index]
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not ignored(rel, True):
+                        subdirs.append(rel)
+                elif entry.is_file() and not ignored(rel, False):
+                    st = entry.stat()
+                    files.append(
+                        (rel, st.st_size, st.st_dev, st.st_ino, st.st_mtime_ns)
+                    )
+                    totals[index] += st.st_size
+            except OSError:
+                continue
+        for rel in reversed(subdirs):
+            directories.append(rel)
+            rel_dirs.append(rel)
+            totals.append(0)
+            parents.append(index)
+            stack.append(len(rel_dirs) - 1)
+    # Children are always numbered after their parent, so one reverse pass
+    # folds every directory's total into its parent's.
+    for index in range(len(totals) - 1, 0, -1):
+        totals[parents[index]] += totals[index]
+    return WalkSnapshot(
+        root=root,
+        directories=sorted(directories),
+        files=sorted(files),
+        dir_sizes=dict(zip(rel_dirs, totals, strict=True)),
+    )
+
 
 class FileOrganizer:
-    """Directory analysis and organization utilities."""
+    """Directory analysis and organization utilities.
+
+    All analyses share one cached walk per directory (see walk()); call
+    walk(refresh=True) after changing the tree to pick up the changes.
+    """
 
     def __init__(self, project_root: Path | None = None):
         if project_root is None:
             project_root = Path(__file__).parent.parent.parent
         self.project_root = project_root
+        self.ignore = IgnoreMatcher(project_root)
+        self.hash_cache_path = project_root / "metadata" / "file_hash_cache.json"
+        self._snapshots: dict[str, WalkSnapshot] = {}
+        self._hash_cache: dict[str, list[str | None]] | None = None
+
+    def walk(
+        self, directory: Path | None = None, refresh: bool = False
+    ) -> WalkSnapshot:
+        """The cached snapshot of directory (default: project root), walking it if needed."""
+        directory = Path(directory or self.project_root)
+        key = os.path.abspath(directory)
+        if refresh or key not in self._snapshots:
+            self._snapshots[key] = walk_tree(directory, self.ignore)
+        return self._snapshots[key]
 
     def analyze_directory_structure(self) -> dict:
         """Analyze the project directory structure."""
-        structure = {"directories": [], "files": [], "extensions": {}}
-
-        for item in self.project_root.rglob("*"):
-            if item.is_dir():
-                if not self._should_ignore(item):
-                    structure["directories"].append(
-                        str(item.relative_to(self.project_root))
-                    )
-            elif item.is_file() and not self._should_ignore(item):
-                structure["files"].append(str(item.relative_to(self.project_root)))
-                ext = item.suffix
-                structure["extensions"][ext] = (
-                    structure["extensions"].get(ext, 0) + 1
-                )
-
-        return structure
+        snapshot = self.walk()
+        extensions: dict[str, int] = {}
+        for rel, *_ in snapshot.files:
+            ext = os.path.splitext(rel)[1]
+            extensions[ext] = extensions.get(ext, 0) + 1
+        return {
+            "directories": list(snapshot.directories),
+            "files": [rel for rel, *_ in snapshot.files],
+            "extensions": extensions,
+        }
 
     def _should_ignore(self, path: Path) -> bool:
         """Check if path should be ignored."""
-        ignore_dirs = {
-            ".git",
-            "__pycache__",
-            "node_modules",
-            ".venv",
-            "venv",
-            ".env",
-            "current",
-        }
-        ignore_files = {".DS_Store", "*.pyc", ".gitignore"}
+        return self.ignore.is_ignored(path)
 
-        if any(parent.name in ignore_dirs for parent in path.parents):
-            return True
+    def _load_hash_cache(self) -> dict[str, list[str | None]]:
+        if self._hash_cache is None:
+            try:
+                with open(self.hash_cache_path, encoding="utf-8") as f:
+                    self._hash_cache = json.load(f)
+            except (OSError, ValueError):
+                self._hash_cache = {}
+        return self._hash_cache
 
-        if path.name in ignore_dirs or path.name in ignore_files:
-            return True
+    def _save_hash_cache(self) -> None:
+        self.hash_cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.hash_cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._hash_cache))
+        os.replace(tmp_path, self.hash_cache_path)
 
-        return path.suffix in [".pyc", ".pyo"]
+    def find_duplicates(self, directory: Path | None = None) -> dict:
+        """Find files with identical content; returns duplicate sets and wasted bytes.
 
-    def find_duplicates(self, directory: Path | None = None) -> dict[str, list[str]]:
-        """Find files with identical names in different directories."""
+        Candidates are narrowed in stages: equal size, then an equal hash of the
+        first and last HASH_EDGE_BYTES, and only then a full BLAKE2 hash. Hashes
+        run in a thread pool and are cached by (device, inode, mtime, size), so
+        unchanged files are never re-read. Hard links to one inode are a single
+        copy; inodes are only compared within a device, so trees spanning
+        mount points are handled.
+        """
         if directory is None:
             directory = self.project_root
+        directory = Path(directory)
 
-        name_map: dict[str, list[str]] = {}
-        duplicates: dict[str, list[str]] = {}
+        # A file is identified by (st_dev, st_ino); inode numbers repeat across devices.
+        by_size: dict[int, dict[tuple[int, int], list[str]]] = {}
+        stat_keys: dict[tuple[int, int], str] = {}
+        for rel, size, device, inode, mtime_ns in self.walk(directory).files:
+            if size:
+                file_key = (device, inode)
+                by_size.setdefault(size, {}).setdefault(file_key, []).append(rel)
+                stat_keys[file_key] = f"{device}:{inode}:{mtime_ns}:{size}"
+        cache = self._load_hash_cache()
+        used: set[str] = set()
+        changed = False
+
+        def hashes(
+            stage: int, candidates: list[tuple[int, tuple[int, int]]]
+        ) -> dict[tuple[int, int], str]:
+            """Stage 0 (edges) or 1 (full) hash per file, hashing cache misses concurrently."""
+            nonlocal changed
+            result = {}
+            misses = []
+            for size, file_key in candidates:
+                key = stat_keys[file_key]
+                used.add(key)
+                entry = cache.setdefault(key, [None, None])
+                if entry[stage] is None:
+                    misses.append((size, file_key))
+                else:
+                    result[file_key] = entry[stage]
+            if misses:
+                paths = [
+                    directory / by_size[size][file_key][0] for size, file_key in misses
+                ]
+                hash_file = _hash_edges if stage == 0 else _hash_full
+                with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+                    digests = list(executor.map(hash_file, paths))
+                for (_, file_key), digest in zip(misses, digests, strict=True):
+                    if digest is not None:
+                        cache[stat_keys[file_key]][stage] = result[file_key] = digest
+                        changed = True
+            return result
+
+        def split(groups: list[list[tuple]], stage: int) -> list[list[tuple]]:
+            """Regroup each group by its members' stage hash, keeping only collisions."""
+            digests = hashes(stage, [member for group in groups for member in group])
+            result = []
+            for group in groups:
+                by_digest: dict[str, list[tuple]] = {}
+                for member in group:
+                    if member[1] in digests:
+                        by_digest.setdefault(digests[member[1]], []).append(member)
+                result.extend(
+                    members for members in by_digest.values() if len(members) > 1
+                )
+            return result
+
+        groups = split(
+            [
+                [(size, file_key) for file_key in keys]
+                for size, keys in by_size.items()
+                if len(keys) > 1
+            ],
+            0,
+        )
+        # Files no longer than both edges were read whole by the edge hash.
+        groups = [
+            group for group in groups if group[0][0] <= 2 * HASH_EDGE_BYTES
+        ] + split([group for group in groups if group[0][0] > 2 * HASH_EDGE_BYTES], 1)
 
-        for file_path in directory.rglob("*"):
-            if file_path.is_file() and not self._should_ignore(file_path):
-                name = file_path.name
-                if name not in name_map:
-                    name_map[name] = []
-                name_map[name].append(str(file_path))
+        duplicates = []
+        for group in groups:
+            size = group[0][0]
+            paths = sorted(
+                str(directory / rel)
+                for _, file_key in group
+                for rel in by_size[size][file_key]
+            )
+            duplicates.append(
+                {"size": size, "paths": paths, "wasted_bytes": size * (len(group) - 1)}
+            )
+        duplicates.sort(key=lambda d: (-d["wasted_bytes"], d["paths"]))
 
-        for name, paths in name_map.items():
-            if len(paths) > 1:
-                duplicates[name] = paths
+        if os.path.abspath(directory) == os.path.abspath(self.project_root):
+            stale = set(cache) - used
+            for key in stale:
+                del cache[key]
+            changed = changed or bool(stale)
+        if changed:
+            self._save_hash_cache()
+        return {
+            "duplicates": duplicates,
+            "wasted_bytes": sum(d["wasted_bytes"] for d in duplicates),
+        }
+
+    def find_duplicate_names(
+        self, directory: Path | None = None
+    ) -> dict[str, list[str]]:
+        """Find files with identical names in different directories."""
+        if directory is None:
+            directory = self.project_root
 
-        return duplicates
+        name_map: dict[str, list[str]] = {}
+        for rel, *_ in self.walk(directory).files:
+            name_map.setdefault(os.path.basename(rel), []).append(str(directory / rel))
+
+        return {name: paths for name, paths in name_map.items() if len(paths) > 1}
 
     def suggest_organization(self) -> dict[str, list[str]]:
         """Suggest organizational improvements."""
@@ -80,10 +308,10 @@ class FileOrganizer:
             "check_for_orphaned": [],
         }
 
-        for file_path in self.project_root.rglob("*.py"):
-            if self._should_ignore(file_path):
+        for rel, *_ in self.walk().files:
+            if not rel.endswith(".py"):
                 continue
-
+            file_path = self.project_root / rel
             if "util" in file_path.stem.lower() and "utilities" not in str(
                 file_path.parent
             ):
@@ -96,14 +324,9 @@ class FileOrganizer:
         if directory is None:
             directory = self.project_root
 
-        sizes: dict[str, int] = {}
-
-        for item in directory.rglob("*"):
-            if item.is_dir() and not self._should_ignore(item):
-                try:
-                    size = sum(f.stat().st_size for f in item.rglob("*") if f.is_file())
-                    sizes[str(item.relative_to(self.project_root))] = size
-                except (PermissionError, OSError):
-                    continue
-
+        sizes = {
+            os.path.relpath(os.path.join(directory, rel), self.project_root): size
+            for rel, size in self.walk(directory).dir_sizes.items()
+            if rel
+        }
         return dict(sorted(sizes.items(), key=lambda x: x[1], reverse=True))
@@ -0,0 +1,257 @@
+"""Shared ignore rules: defaults, agent_config.yaml and hierarchical .gitignore files."""
+
+import os
+import re
+from pathlib import Path
+
+import yaml
+
+DEFAULT_IGNORE_DIRS = frozenset(
+    {
+        ".git",
+        "__pycache__",
+        "node_modules",
+        ".venv",
+        "venv",
+        ".env",
+        "current",
+    }
+)
+DEFAULT_IGNORE_PATTERNS = ("*.pyc", "*.pyo", ".DS_Store", ".gitignore")
+CONFIG_PATH = Path(__file__).parent.parent / "agent_config.yaml"
+
+
+def _translate(pattern: str) -> str:
+    """Regex for a gitignore glob: * and ? stop at '/', ** crosses directories."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            out.append("(?:.*/)?")
+            i += 3
+        elif (
+            pattern.startswith("**", i)
+            and i + 2 == n
+            and (i == 0 or pattern[i - 1] == "/")
+        ):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            start = i + 1
+            negate = pattern[start : start + 1] in ("!", "^")
+            if negate:
+                start += 1
+            # As in git, a "]" right after "[" or "[!" is a member, so the class
+            # is never empty; without a closing "]" the "[" is literal.
+            end = pattern.find("]", start + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                members = "".join(
+                    "\\" + m if m in "\\[]^" else m for m in pattern[start:end]
+                )
+                out.append(f"[^/{members}]" if negate else f"[{members}]")
+                i = end + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+class RuleSet:
+    """The compiled patterns of one ignore file, matched against paths relative to its directory.
+
+    Without negations every pattern is folded into one regex (one for all
+    entries, one for directories only); with them, the last matching pattern
+    decides, as in git.
+    """
+
+    def __init__(self, lines: list[str]):
+        self.rules: list[tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line.endswith("\\ "):
+                line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate or line.startswith("\\"):
+                # "\!name" and "\#name" are literal names.
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            # A pattern with a slash is anchored to the ignore file's directory;
+            # one without matches a name at any depth.
+            regex = (
+                _translate(line.lstrip("/"))
+                if "/" in line
+                else "(?:.*/)?" + _translate(line)
+            )
+            self.rules.append((re.compile(regex + r"\Z", re.DOTALL), negate, dir_only))
+
+        self.has_negation = any(negate for _, negate, _ in self.rules)
+        if not self.has_negation:
+            any_entry = [
+                rule.pattern for rule, _, dir_only in self.rules if not dir_only
+            ]
+            dirs = [rule.pattern for rule, _, _ in self.rules]
+            self._files_regex = (
+                re.compile("|".join(any_entry), re.DOTALL) if any_entry else None
+            )
+            self._dirs_regex = re.compile("|".join(dirs), re.DOTALL) if dirs else None
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def match(self, rel: str, is_dir: bool) -> bool | None:
+        """True to ignore, False if explicitly re-included, None if no pattern applies."""
+        if not self.has_negation:
+            regex = self._dirs_regex if is_dir else self._files_regex
+            return True if regex is not None and regex.match(rel) else None
+        for regex, negate, dir_only in reversed(self.rules):
+            if (is_dir or not dir_only) and regex.match(rel):
+                return not negate
+        return None
+
+
+def load_config_ignore_dirs(config_path: Path = CONFIG_PATH) -> list[str]:
+    """`directories.ignore_dirs` from agent_config.yaml ([] if absent)."""
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    except OSError:
+        return []
+    return [
+        str(name) for name in (config.get("directories") or {}).get("ignore_dirs") or []
+    ]
+
+
+class IgnoreMatcher:
+    """Decides which paths under `root` the agent tools skip.
+
+    Rules, from lowest to highest precedence: the defaults and the config's
+    `ignore_dirs`, .git/info/exclude, then each directory's .gitignore, deeper
+    files overriding shallower ones. .gitignore files are read lazily, the first
+    time a walk descends into their directory, and compiled once.
+    """
+
+    def __init__(
+        self, root: Path, config_path: Path = CONFIG_PATH, use_gitignore: bool = True
+    ):
+        self.root = os.path.abspath(root)
+        self.use_gitignore = use_gitignore
+        base_lines = [f"{name}/" for name in sorted(DEFAULT_IGNORE_DIRS)]
+        base_lines += list(DEFAULT_IGNORE_PATTERNS)
+        base_lines += [
+            f"{name.strip('/')}/" for name in load_config_ignore_dirs(config_path)
+        ]
+        self.base_rules = RuleSet(base_lines)
+        # Directory (relative to root, "" for root) -> [(prefix length, rules)],
+        # highest precedence first; each directory extends its parent's chain.
+        self._chains: dict[str, list[tuple[int, RuleSet]]] = {}
+
+    def _read_rules(self, path: str) -> RuleSet | None:
+        if not self.use_gitignore:
+            return None
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                rules = RuleSet(f.readlines())
+        except OSError:
+            return None
+        return rules or None
+
+    def _chain(self, dir_rel: str) -> list[tuple[int, RuleSet]]:
+        chain = self._chains.get(dir_rel)
+        if chain is None:
+            if dir_rel:
+                parent = os.path.dirname(dir_rel)
+                chain = list(self._chain(parent))
+                prefix = len(dir_rel) + 1
+            else:
+                chain = [(0, self.base_rules)]
+                exclude = self._read_rules(
+                    os.path.join(self.root, ".git", "info", "exclude")
+                )
+                if exclude is not None:
+                    chain.insert(0, (0, exclude))
+                prefix = 0
+            rules = self._read_rules(os.path.join(self.root, dir_rel, ".gitignore"))
+            if rules is not None:
+                chain.insert(0, (prefix, rules))
+            self._chains[dir_rel] = chain
+        return chain
+
+    def relative(self, path: str | Path) -> str | None:
+        """path relative to root with "/" separators ("" for root), or None when it is outside root."""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel == ".":
+            return ""
+        if rel == ".." or rel.startswith(".." + os.sep):
+            return None
+        return rel.replace(os.sep, "/")
+
+    def ignored_entry(self, rel: str, is_dir: bool) -> bool:
+        """Whether an entry is ignored, given its parent directory is not (for walkers).
+
+        `rel` is relative to root with '/' separators.
+        """
+        for prefix, rules in self._chain(rel.rpartition("/")[0]):
+            decision = rules.match(rel[prefix:], is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+    def is_ignored(self, path: str | Path, is_dir: bool | None = None) -> bool:
+        """Whether path, or any directory above it within root, is ignored.
+
+        Paths outside root are only checked against the default and config rules.
+        """
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        rel = self.relative(path)
+        if rel is None:
+            return bool(self.base_rules.match(Path(path).name, is_dir))
+        if not rel:
+            return False
+        parts = rel.split("/")
+        for end in range(1, len(parts)):
+            if self.ignored_entry("/".join(parts[:end]), True):
+                return True
+        return self.ignored_entry(rel, is_dir)
+
+    def walk(self, directory: Path | None = None):
+        """os.walk() over directory (default root), pruning ignored directories before descending."""
+        top = os.path.abspath(directory or self.root)
+        base = self.relative(top)
+        for dirpath, dirnames, filenames in os.walk(top):
+            if base is None:
+                dirnames[:] = sorted(
+                    d for d in dirnames if not self.base_rules.match(d, True)
+                )
+                filenames[:] = sorted(
+                    f for f in filenames if not self.base_rules.match(f, False)
+                )
+                yield dirpath, dirnames, filenames
+                continue
+            rel_dir = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+            prefix = "" if rel_dir == "." else rel_dir + "/"
+            dirnames[:] = sorted(
+                d for d in dirnames if not self.ignored_entry(prefix + d, True)
+            )
+            filenames[:] = sorted(
+                f for f in filenames if not self.ignored_entry(prefix + f, False)
+            )
+            yield dirpath, dirnames, filenames
@@ -1,17 +1,90 @@
 """Prompt management tools for agent system."""
 
+import json
+import os
 import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
 from pathlib import Path
 
+import prompt_library
+
+from .ignore_rules import IgnoreMatcher
+
+DEFAULT_DAEMON_URL = "http://127.0.0.1:8765"
+
 
 class PromptManager:
-    """Wrapper around scripts/prompt_manager.py for agent operations."""
+    """Wrapper around the prompt_library package for agent operations."""
 
-    def __init__(self, project_root: Path | None = None):
+    def __init__(
+        self,
+        project_root: Path | None = None,
+        daemon_url: str | None = DEFAULT_DAEMON_URL,
+    ):
         if project_root is None:
             project_root = Path(__file__).parent.parent.parent
         self.project_root = project_root
         self.manager_script = self.project_root / "scripts" / "prompt_manager.py"
+        self.daemon_url = daemon_url
+        # Calls into the in-process library pass their own project_root.
+        self.library = prompt_library
+        # Whether the daemon serves this project_root; None until asked.
+        self._daemon_matches: bool | None = None
+
+    def _daemon_request(
+        self,
+        path: str,
+        params: dict | None = None,
+        method: str = "GET",
+        timeout: float | None = 5,
+    ) -> dict | None:
+        """Query the `prompt_manager.py serve` daemon; None if it is not running.
+
+        A daemon serving another checkout is treated as not running. A POST the
+        daemon accepted but did not complete raises RuntimeError instead, since
+        redoing it in-process would race with the daemon.
+        """
+        if not self.daemon_url:
+            return None
+        if self._daemon_matches is None:
+            health = self._daemon_fetch("/health")
+            if health is None:
+                return None
+            self._daemon_matches = os.path.realpath(
+                health.get("project_root", "")
+            ) == os.path.realpath(self.project_root)
+        if not self._daemon_matches:
+            return None
+        return self._daemon_fetch(path, params, method, timeout)
+
+    def _daemon_fetch(
+        self,
+        path: str,
+        params: dict | None = None,
+        method: str = "GET",
+        timeout: float | None = 5,
+    ) -> dict | None:
+        url = self.daemon_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params, doseq=True)
+        request = urllib.request.Request(url, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return {}
+            error = e
+        except urllib.error.URLError:
+            # The request was never sent.
+            return None
+        except (OSError, ValueError) as e:
+            error = e
+        if method == "POST":
+            raise RuntimeError(f"Prompt daemon failed to complete {path}: {error}")
+        return None
 
     def _run_command(self, args: list[str]) -> str:
         """Run prompt_manager.py with given arguments."""
@@ -21,17 +94,73 @@ class PromptManager:
         )
         return result.stdout
 
-    def index(self) -> str:
-        """Generate prompt index."""
-        return self._run_command(["index"])
+    def index(self, full: bool = False, jobs: int = 1) -> dict:
+        """Generate prompt index; returns the run summary and its log lines."""
+        if not full and jobs == 1:
+            # Indexing a large library can take a while; wait for the daemon.
+            response = self._daemon_request("/index", method="POST", timeout=None)
+            if response is not None:
+                return response
+        return self.library.index(full=full, jobs=jobs, project_root=self.project_root)
 
     def new_prompt(self) -> str:
         """Create new prompt using scaffold."""
         return self._run_command(["new-prompt"])
 
-    def search(self, query: str) -> str:
-        """Search prompts."""
-        return self._run_command(["search", query])
+    def search(
+        self,
+        query: str = "",
+        top_k: int = 10,
+        page: int = 1,
+        semantic: bool = False,
+        filters: dict[str, list[str]] | None = None,
+    ) -> dict:
+        """Search prompts; returns 'total', 'page', 'results', 'semantic' and 'facets' counts.
+
+        filters maps facet fields (status, tags, category, sub_category,
+        llm_model_compatibility) to accepted values.
+        """
+        params = {"q": query, "top_k": top_k, "page": page, "semantic": int(semantic)}
+        params.update(
+            {field: values for field, values in (filters or {}).items() if values}
+        )
+        response = self._daemon_request("/search", params)
+        if response is not None:
+            response.pop("text", None)
+            return response
+        return self.library.search(
+            query,
+            top_k=top_k,
+            page=page,
+            semantic=semantic,
+            filters=filters,
+            project_root=self.project_root,
+        )
+
+    def get(self, prompt_id: str) -> dict | None:
+        """Get a prompt's index entry (None if it is not indexed)."""
+        response = self._daemon_request("/prompts/" + urllib.parse.quote(prompt_id))
+        if response is not None:
+            return response or None
+        return self.library.get(prompt_id, project_root=self.project_root)
+
+    def get_body(self, prompt_id: str) -> str:
+        """Get a prompt's Markdown body without front matter (KeyError if unknown)."""
+        return self.library.get_body(prompt_id, project_root=self.project_root)
+
+    def render(self, prompt_id: str, params: dict | None = None) -> str:
+        """Render a prompt body with its declared parameters substituted."""
+        return self.library.render(prompt_id, params, project_root=self.project_root)
+
+    def validate(
+        self, paths: list[str] | None = None, jobs: int = 1
+    ) -> dict[str, dict]:
+        """Validate prompt files; returns {path: {'valid', 'diagnostics', 'messages'}}."""
+        if paths is None and jobs == 1:
+            response = self._daemon_request("/validate")
+            if response is not None:
+                return response
+        return self.library.validate(paths, jobs=jobs, project_root=self.project_root)
 
     def validate_all(self) -> dict[str, bool]:
         """Validate all prompts for YAML front matter."""
@@ -44,37 +173,28 @@ class PromptManager:
             self.project_root / "utilities",
         ]
 
+        ignore = IgnoreMatcher(self.project_root)
         for prompt_dir in prompt_dirs:
             if not prompt_dir.exists():
                 continue
-            for md_file in prompt_dir.rglob("*.md"):
-                results[str(md_file)] = self._validate_front_matter(md_file)
+            for dirpath, _, filenames in ignore.walk(prompt_dir):
+                for name in filenames:
+                    if name.endswith(".md"):
+                        md_file = Path(dirpath, name)
+                        results[str(md_file)] = self._validate_front_matter(md_file)
 
         return results
 
     def _validate_front_matter(self, file_path: Path) -> bool:
-        """Check if file has valid YAML front matter."""
-        import yaml
-
+        """Check if file has front matter without schema errors."""
         try:
-            with open(file_path) as f:
-                content = f.read()
-            if not content.startswith("---"):
-                return False
-            front_matter_end = content.find("---", 3)
-            if front_matter_end == -1:
+            data = self.library.read_front_matter(file_path)
+            if not isinstance(data, dict):
                 return False
-            front_matter = content[3:front_matter_end]
-            data = yaml.safe_load(front_matter)
-            required_fields = [
-                "id",
-                "title",
-                "description",
-                "category",
-                "tags",
-                "version",
-                "status",
-            ]
-            return all(field in data for field in required_fields)
+            rel_path = str(
+                Path(file_path).resolve().relative_to(self.project_root.resolve())
+            )
+            diagnostics = self.library.check_prompt_metadata(data, rel_path)
+            return not self.library.has_errors(diagnostics)
         except Exception:
             return False
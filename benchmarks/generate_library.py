@@ -0,0 +1,148 @@
+"""Synthetic prompt-library generator for benchmarking the prompt_library package."""
+
+import argparse
+import os
+import random
+
+import yaml
+
+CATEGORIES = ["analysis", "trading", "utilities", "development", "content"]
+PROMPTS_PER_SUB_CATEGORY = 50
+WORDS = [
+    "agent",
+    "analysis",
+    "prompt",
+    "code",
+    "review",
+    "security",
+    "data",
+    "trading",
+    "strategy",
+    "model",
+    "pipeline",
+    "retrieval",
+    "context",
+    "reasoning",
+    "summary",
+    "test",
+    "refactor",
+    "deploy",
+    "research",
+    "document",
+    "extraction",
+    "vision",
+    "planning",
+    "metrics",
+    "quality",
+    "optimization",
+    "workflow",
+    "knowledge",
+    "structured",
+    "output",
+    "evaluation",
+    "debugging",
+    "architecture",
+    "requirements",
+]
+MODELS = ["gpt-4o", "claude-3-opus", "gemini-1.5-pro", "llama-3-70b", "any"]
+STATUSES = ["active", "active", "active", "draft", "deprecated"]
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def make_front_matter(rng, prompt_id, category, sub_category):
+    """Builds front matter shaped like the real library's prompts."""
+    metadata = {
+        "id": prompt_id,
+        "title": _words(rng, 4).title(),
+        "description": _words(rng, 25).capitalize() + ".",
+        "category": category,
+        "sub_category": sub_category,
+        "tags": sorted(set(rng.sample(WORDS, rng.randint(3, 7)))),
+        "version": f"{rng.randint(1, 3)}.{rng.randint(0, 9)}.{rng.randint(0, 9)}",
+        "status": rng.choice(STATUSES),
+        "llm_model_compatibility": rng.sample(MODELS, rng.randint(1, 3)),
+        "parameters": [],
+    }
+    for i in range(rng.randint(1, 6)):
+        param = {
+            "name": f"param_{i}",
+            "type": rng.choice(["string", "integer", "boolean"]),
+            "description": _words(rng, 10),
+        }
+        roll = rng.random()
+        if roll < 0.3:
+            param["optional"] = True
+        elif roll < 0.5:
+            param["default"] = _words(rng, 2)
+        metadata["parameters"].append(param)
+    if rng.random() < 0.3:
+        metadata["plan_task"] = _words(rng, 8)
+        metadata["plan_steps"] = [
+            {
+                "title": _words(rng, 3),
+                "details": _words(rng, 15),
+                "agent_name": f"{rng.choice(WORDS)}-agent",
+            }
+            for _ in range(rng.randint(2, 6))
+        ]
+    return metadata
+
+
+def make_body(rng, metadata):
+    """Builds a Markdown body that uses the declared parameters."""
+    lines = [f"# {metadata['title']}", "", "## Role", _words(rng, 40), ""]
+    for param in metadata["parameters"]:
+        lines.append(f"- {param['name']}: {{{{{param['name']}}}}}")
+    lines.append("")
+    for _ in range(rng.randint(3, 12)):
+        lines.extend(["## " + _words(rng, 3).title(), _words(rng, 80), ""])
+    return "\n".join(lines)
+
+
+def generate_library(root, count, seed=0):
+    """
+    Writes `count` prompt files under root, spread over CATEGORIES and
+    numbered sub-categories of PROMPTS_PER_SUB_CATEGORY files each. Every
+    sub-category gets a README.md with the automated list markers.
+    Returns the list of relative prompt paths.
+    """
+    rng = random.Random(seed)
+    paths = []
+    readmes = set()
+    for n in range(count):
+        category = CATEGORIES[n % len(CATEGORIES)]
+        sub_category = f"group_{n // (PROMPTS_PER_SUB_CATEGORY * len(CATEGORIES)):04d}"
+        prompt_id = f"{category}-{sub_category}-prompt-{n:06d}"
+        dir_path = os.path.join(root, category, sub_category)
+        if dir_path not in readmes:
+            os.makedirs(dir_path, exist_ok=True)
+            with open(os.path.join(dir_path, "README.md"), "w", encoding="utf-8") as f:
+                f.write(
+                    f"# {sub_category}\n\n## Available Prompts\n"
+                    "<!-- AUTOMATED_PROMPTS_LIST_START -->\n"
+                    "<!-- AUTOMATED_PROMPTS_LIST_END -->\n"
+                )
+            readmes.add(dir_path)
+
+        metadata = make_front_matter(rng, prompt_id, category, sub_category)
+        front_matter = yaml.dump(metadata, sort_keys=False, default_flow_style=False)
+        file_path_rel = os.path.join(category, sub_category, f"{prompt_id}.md")
+        with open(os.path.join(root, file_path_rel), "w", encoding="utf-8") as f:
+            f.write(f"---\n{front_matter}---\n{make_body(rng, metadata)}")
+        paths.append(file_path_rel)
+    os.makedirs(os.path.join(root, "metadata"), exist_ok=True)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic prompt library.")
+    parser.add_argument("root", help="Directory to create the library in.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of prompts.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generated = generate_library(args.root, args.count, args.seed)
+    print(f"Generated {len(generated)} prompts in {args.root}")
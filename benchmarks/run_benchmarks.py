@@ -0,0 +1,214 @@
+"""Timed scenarios for the prompt_library package over synthetic libraries.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --output bench.json
+    python benchmarks/run_benchmarks.py --sizes 1000 --compare bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+SCRIPT = os.path.join(REPO_ROOT, "scripts", "prompt_manager.py")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from generate_library import WORDS, generate_library  # noqa: E402
+
+import prompt_library  # noqa: E402
+from agent_system.tools.prompt_tools import PromptManager  # noqa: E402
+from prompt_library import core  # noqa: E402
+
+
+def _timed(fn, *args, **kwargs):
+    """Runs fn with its printed output suppressed; returns (seconds, result)."""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+
+def _edit(root, file_path_rel):
+    """Appends a line to a prompt body and bumps its mtime."""
+    path = os.path.join(root, file_path_rel)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"\nEdited at {time.time()}\n")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def run_scenarios(root, paths, jobs=1, queries=200, seed=0):
+    """Runs every scenario against the library at root; returns timings."""
+    pm = prompt_library
+    rng = random.Random(seed)
+    results = {"files": len(paths)}
+
+    elapsed, summary = _timed(pm.generate_prompt_index, full=True, jobs=jobs)
+    results["cold_index"] = {
+        "seconds": elapsed,
+        "files_per_sec": len(paths) / elapsed,
+        "prompts": summary["prompt_count"],
+        "jobs": jobs,
+    }
+
+    elapsed, _ = _timed(pm.generate_prompt_index, jobs=jobs)
+    results["warm_index"] = {"seconds": elapsed}
+
+    _edit(root, rng.choice(paths))
+    elapsed, summary = _timed(pm.generate_prompt_index, jobs=jobs)
+    results["incremental_index"] = {"seconds": elapsed, "reparsed": summary["reparsed"]}
+
+    changed = rng.choice(paths)
+    _edit(root, changed)
+    elapsed, summary = _timed(pm.update_prompt_index, [changed])
+    results["watch_update"] = {"seconds": elapsed, "reparsed": summary["reparsed"]}
+
+    elapsed, _ = _timed(pm.load_prompt_index)
+    results["load_index_sidecar"] = {"seconds": elapsed}
+
+    all_prompts = pm.load_prompt_index()
+    elapsed, _ = _timed(pm.update_category_readmes, all_prompts)
+    results["readme_update_clean"] = {"seconds": elapsed}
+
+    # Simulate one prompt's version changing: exactly one README should be rewritten.
+    changed = dict(rng.choice(all_prompts))
+    changed["version"] = "9.9.9"
+    edited = [changed if p["id"] == changed["id"] else p for p in all_prompts]
+    log = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        pm.update_category_readmes(edited)
+    elapsed = time.perf_counter() - started
+    _timed(pm.update_category_readmes, all_prompts)  # restore
+    results["readme_update_one_change"] = {
+        "seconds": elapsed,
+        "readmes_rewritten": log.getvalue().count("Updated "),
+    }
+
+    samples = []
+    for _ in range(queries):
+        query = " ".join(rng.sample(WORDS, rng.randint(1, 2)))
+        samples.append(_timed(pm.find_prompts, query)[0])
+    results["search"] = _percentiles(samples)
+
+    # The same query through PromptManager: one CLI process per call, as the
+    # wrapper used to run it, against the in-process library it calls now.
+    manager = PromptManager(project_root=Path(root), daemon_url=None)
+    subprocess_samples = []
+    in_process_samples = []
+    for _ in range(max(2, queries // 10)):
+        query = " ".join(rng.sample(WORDS, rng.randint(1, 2)))
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, SCRIPT, "--project-root", root, "search", query],
+            capture_output=True,
+            check=True,
+        )
+        subprocess_samples.append(time.perf_counter() - started)
+        in_process_samples.append(_timed(manager.search, query)[0])
+    results["search_subprocess"] = _percentiles(subprocess_samples)
+    results["search_in_process"] = _percentiles(in_process_samples)
+
+    samples = []
+    prompt_ids = [p["id"] for p in all_prompts]
+    for _ in range(queries):
+        prompt = pm.get(rng.choice(prompt_ids))
+        params = {
+            p["name"]: "value"
+            for p in prompt.get("parameters", [])
+            if "default" not in p and not p.get("optional")
+        }
+        samples.append(_timed(pm.render, prompt["id"], params)[0])
+    results["render"] = _percentiles(samples)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    """Prints the ratio of each timing against a previous results file."""
+    for size, scenarios in current["results"].items():
+        old_scenarios = previous.get("results", {}).get(size, {})
+        for name, values in scenarios.items():
+            if not isinstance(values, dict) or name not in old_scenarios:
+                continue
+            for key in ("seconds", "p50_ms", "p95_ms"):
+                if key in values and old_scenarios[name].get(key):
+                    ratio = values[key] / old_scenarios[name][key]
+                    flag = "  <-- slower" if ratio > 1.2 else ""
+                    print(f"{size:>7} {name:<26} {key:<8} x{ratio:.2f}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the prompt library.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--jobs", type=int, default=1, help="Workers for cold index.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON to this file.")
+    parser.add_argument("--compare", help="Previous results JSON to compare against.")
+    parser.add_argument("--keep", action="store_true", help="Keep generated libraries.")
+    args = parser.parse_args()
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {},
+    }
+    for size in args.sizes:
+        root = tempfile.mkdtemp(prefix=f"prompt-bench-{size}-")
+        try:
+            print(f"Generating {size} prompts in {root}...")
+            paths = generate_library(root, size, args.seed)
+            core.PROJECT_ROOT = root
+            report["results"][str(size)] = run_scenarios(
+                root, paths, jobs=args.jobs, queries=args.queries, seed=args.seed
+            )
+            print(json.dumps(report["results"][str(size)], indent=2))
+        finally:
+            if not args.keep:
+                shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
@@ -0,0 +1,36 @@
+"""
+Prompt library: indexing, search, validation and rendering of the prompt
+files under PROMPT_DIRS. scripts/prompt_manager.py is the command-line front
+end; other callers import the functions below.
+"""
+
+from .api import get, get_body, index, render, search, validate
+from .core import PROMPT_DIRS, capture_output
+from .frontmatter import extract_front_matter, read_front_matter
+from .indexer import generate_prompt_index, update_prompt_index
+from .prompt_index import load_prompt_index
+from .readmes import update_category_readmes
+from .schema import PROMPT_SCHEMA, check_prompt_metadata, has_errors
+from .search_index import find_prompts, format_search_results
+
+__all__ = [
+    "PROMPT_DIRS",
+    "PROMPT_SCHEMA",
+    "capture_output",
+    "check_prompt_metadata",
+    "extract_front_matter",
+    "find_prompts",
+    "format_search_results",
+    "generate_prompt_index",
+    "get",
+    "get_body",
+    "has_errors",
+    "index",
+    "load_prompt_index",
+    "read_front_matter",
+    "render",
+    "search",
+    "update_category_readmes",
+    "update_prompt_index",
+    "validate",
+]
@@ -0,0 +1,202 @@
+"""Cross-prompt checks: duplicate and near-duplicate bodies, agent references."""
+
+import base64
+import hashlib
+import os
+import re
+import zlib
+from array import array
+
+from .core import TOKEN_RE
+from .schema import diagnostic
+
+# plan_steps[].agent_name must name a prompt in this directory.
+AGENT_ROLES_DIR = os.path.join("development", "agent_roles")
+# Near-duplicate detection: one-permutation MinHash over word shingles, split
+# into LSH bands so only prompts sharing a band are ever compared.
+SHINGLE_SIZE = 3
+MINHASH_BINS = 64
+LSH_BANDS = 16
+NEAR_DUPLICATE_THRESHOLD = 0.8
+_BIN_SHIFT = 32 - (MINHASH_BINS - 1).bit_length()
+_VALUE_MASK = (1 << _BIN_SHIFT) - 1
+_EMPTY_BIN = 0xFFFFFFFF
+
+
+def minhash_signature(tokens):
+    """
+    One-permutation MinHash of the token shingles: each shingle is hashed once,
+    the top bits pick a bin and each bin keeps its smallest value. Empty bins
+    borrow from the next filled bin so short bodies still compare bin by bin.
+    Returns MINHASH_BINS 32-bit values, or None if there are no tokens.
+    """
+    if not tokens:
+        return None
+    sig = [_EMPTY_BIN] * MINHASH_BINS
+    width = min(SHINGLE_SIZE, len(tokens))
+    for i in range(len(tokens) - width + 1):
+        h = (
+            zlib.crc32(" ".join(tokens[i : i + width]).encode()) * 0x9E3779B1
+        ) & 0xFFFFFFFF
+        b = h >> _BIN_SHIFT
+        v = h & _VALUE_MASK
+        if v < sig[b]:
+            sig[b] = v
+    for b in range(MINHASH_BINS):
+        if sig[b] == _EMPTY_BIN:
+            for step in range(1, MINHASH_BINS):
+                borrowed = sig[(b + step) % MINHASH_BINS]
+                if borrowed <= _VALUE_MASK:
+                    sig[b] = borrowed | (step << _BIN_SHIFT)
+                    break
+    return sig
+
+
+def body_fingerprint(body):
+    """
+    Returns (body_sha256, minhash) for a prompt body, where the hash ignores
+    whitespace differences and minhash is a base64-packed minhash_signature().
+    Both are None for an empty body.
+    """
+    tokens = TOKEN_RE.findall(body.lower())
+    if not tokens:
+        return None, None
+    body_hash = hashlib.sha256(" ".join(body.split()).encode("utf-8")).hexdigest()
+    packed = array("I", minhash_signature(tokens)).tobytes()
+    return body_hash, base64.b64encode(packed).decode("ascii")
+
+
+def _normalize_name(name):
+    return re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-")
+
+
+def _agent_role_names(manifest):
+    """
+    Returns the normalized ids, titles and file stems of agent-role prompts.
+    """
+    prefix = AGENT_ROLES_DIR + os.sep
+    names = set()
+    for rel, entry in manifest.items():
+        metadata = entry.get("metadata")
+        if not rel.startswith(prefix) or not metadata:
+            continue
+        names.add(_normalize_name(os.path.splitext(os.path.basename(rel))[0]))
+        for key in ("id", "title"):
+            if metadata.get(key):
+                names.add(_normalize_name(metadata[key]))
+    return names
+
+
+def _find_root(parent, x):
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def analyze_prompt_library(manifest, report_paths=None):
+    """
+    Cross-prompt checks over the manifest: identical bodies (grouped by hash),
+    near-duplicate bodies (MinHash + LSH) and plan_steps agent_name values that
+    do not match an agent-role prompt. Every step is linear in the number of
+    prompts: near-duplicates are only compared within shared LSH buckets, and
+    each bucket member only against the bucket's first member.
+    Returns warnings for files in report_paths (all files when None); the
+    per-file agent_name check only runs for those.
+    """
+    out = []
+    rels = [rel for rel, entry in manifest.items() if entry.get("metadata")]
+
+    by_hash = {}
+    for rel in rels:
+        body_hash = manifest[rel].get("body_sha256")
+        if body_hash:
+            by_hash.setdefault(body_hash, []).append(rel)
+    for group in by_hash.values():
+        for rel in group[1:]:
+            if report_paths is not None and rel not in report_paths:
+                continue
+            out.append(
+                diagnostic(
+                    rel,
+                    "duplicate-body",
+                    f"Body of {rel} is identical to {group[0]}",
+                    severity="warning",
+                )
+            )
+
+    # One representative per identical body; bucket the rest by LSH band.
+    representatives = [group[0] for group in by_hash.values()]
+    signatures = {
+        rel: array("I", base64.b64decode(manifest[rel]["minhash"]))
+        for rel in representatives
+        if manifest[rel].get("minhash")
+    }
+    rows = MINHASH_BINS // LSH_BANDS
+    width = rows * 4
+    parent = {rel: rel for rel in signatures}
+    buckets = {}
+    for rel in signatures:
+        packed = signatures[rel].tobytes()
+        for band in range(LSH_BANDS):
+            key = (band, packed[band * width : (band + 1) * width])
+            anchor = buckets.setdefault(key, rel)
+            if anchor == rel:
+                continue
+            root, other = _find_root(parent, anchor), _find_root(parent, rel)
+            if root == other:
+                continue
+            a, b = signatures[anchor], signatures[rel]
+            if (
+                sum(x == y for x, y in zip(a, b, strict=True))
+                >= NEAR_DUPLICATE_THRESHOLD * MINHASH_BINS
+            ):
+                parent[other] = root
+    order = {rel: i for i, rel in enumerate(rels)}
+    clusters = {}
+    for rel in signatures:
+        clusters.setdefault(_find_root(parent, rel), []).append(rel)
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=order.__getitem__)
+        first = signatures[members[0]]
+        for rel in members[1:]:
+            if report_paths is not None and rel not in report_paths:
+                continue
+            similarity = (
+                sum(x == y for x, y in zip(first, signatures[rel], strict=True))
+                / MINHASH_BINS
+            )
+            out.append(
+                diagnostic(
+                    rel,
+                    "near-duplicate",
+                    f"Body of {rel} is ~{similarity:.0%} similar to {members[0]}",
+                    severity="warning",
+                )
+            )
+
+    agent_names = _agent_role_names(manifest)
+    if report_paths is not None:
+        rels = [rel for rel in rels if rel in report_paths]
+    for rel in rels:
+        steps = manifest[rel]["metadata"].get("plan_steps")
+        if not isinstance(steps, list):
+            continue
+        for i, step in enumerate(steps):
+            name = step.get("agent_name") if isinstance(step, dict) else None
+            if isinstance(name, str) and _normalize_name(name) not in agent_names:
+                out.append(
+                    diagnostic(
+                        rel,
+                        "dangling-agent-reference",
+                        f"plan_steps[{i}].agent_name '{name}' in {rel} does not match "
+                        f"any prompt in {AGENT_ROLES_DIR}",
+                        severity="warning",
+                        field="plan_steps",
+                    )
+                )
+
+    out.sort(key=lambda d: order[d["file"]])
+    return out
@@ -0,0 +1,89 @@
+"""
+Importable entry points returning structured data instead of printing, for
+callers such as agent_system.tools.prompt_tools.PromptManager. Each takes an
+optional project_root; paths resolve against PROJECT_ROOT when it is None.
+"""
+
+import os
+
+from .core import PROMPT_INDEX_FILE, _root, _use_root, capture_output
+from .indexer import generate_prompt_index
+from .prompt_index import load_prompt_index
+from .search_index import find_prompts
+from .templates import load_prompt_template, resolve_parameters
+from .validation import validate_prompt_files
+
+
+def index(full=False, jobs=1, project_root=None):
+    """
+    Runs the incremental index. Returns the generate_prompt_index() summary
+    with its diagnostics and progress messages under 'log' (a list of lines).
+    """
+    with _use_root(project_root), capture_output() as lines:
+        summary = generate_prompt_index(full=full, jobs=jobs)
+    return {**summary, "log": lines}
+
+
+def search(query, top_k=10, page=1, semantic=False, filters=None, project_root=None):
+    """
+    Returns one page of ranked matches with facet counts; see find_prompts().
+    """
+    with _use_root(project_root):
+        return find_prompts(
+            query, top_k=top_k, page=page, semantic=semantic, filters=filters
+        )
+
+
+_prompts_by_id_cache = {}
+
+
+def get(prompt_id, project_root=None):
+    """
+    Returns the index entry for prompt_id, or None if no indexed prompt has
+    that id. Raises FileNotFoundError if no index has been generated.
+    The id map is rebuilt only when prompt_index.yaml changes.
+    """
+    with _use_root(project_root):
+        index_file_path = os.path.join(_root(), PROMPT_INDEX_FILE)
+        st = os.stat(index_file_path)
+        key = (st.st_mtime_ns, st.st_size)
+        cached = _prompts_by_id_cache.get(index_file_path)
+        if not cached or cached[0] != key:
+            cached = (key, {p.get("id"): p for p in load_prompt_index()})
+            _prompts_by_id_cache[index_file_path] = cached
+    return cached[1].get(prompt_id)
+
+
+def validate(paths=None, jobs=1, project_root=None):
+    """
+    Validates prompt files; see validate_prompt_files().
+    """
+    with _use_root(project_root):
+        return validate_prompt_files(paths, jobs=jobs)
+
+
+def get_body(prompt_id, project_root=None):
+    """
+    Returns the Markdown body (without front matter) of prompt_id.
+    Raises KeyError if no indexed prompt has that id, and FileNotFoundError
+    if no index has been generated.
+    """
+    with _use_root(project_root):
+        prompt = get(prompt_id)
+        if prompt is None:
+            raise KeyError(prompt_id)
+        return load_prompt_template(prompt["file_path"]).body
+
+
+def render(prompt_id, params=None, project_root=None):
+    """
+    Returns the body of prompt_id with its declared parameters substituted.
+    Raises KeyError for an unknown id, ValueError for missing parameters and
+    FileNotFoundError if no index has been generated.
+    """
+    with _use_root(project_root):
+        prompt = get(prompt_id)
+        if prompt is None:
+            raise KeyError(prompt_id)
+        template = load_prompt_template(prompt["file_path"])
+    return template.render(resolve_parameters(prompt.get("parameters"), params or {}))
@@ -0,0 +1,153 @@
+"""Library configuration and the helpers every other module shares."""
+
+import contextlib
+import os
+import re
+import threading
+
+import yaml
+
+PROMPT_DIRS = [
+    "analysis",
+    "trading",
+    "utilities",
+    "development",
+    "content",
+]  # Directories to scan for prompts
+METADATA_DIR = "metadata"
+PROMPT_INDEX_FILE = os.path.join(METADATA_DIR, "prompt_index.yaml")
+DOC_FILES = ("README.md", "changelog.md")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+# libyaml's C loader is much faster when PyYAML was built with it.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+_output = threading.local()
+_root_override = threading.local()
+
+
+def _root():
+    """
+    Returns the library root paths are resolved against: the project_root a
+    library call was given (see _use_root()), else PROJECT_ROOT.
+    """
+    return getattr(_root_override, "path", None) or PROJECT_ROOT
+
+
+@contextlib.contextmanager
+def _use_root(project_root):
+    """
+    Resolves paths against project_root (if given) in this thread for the
+    duration of the block, so callers with different roots can share the module.
+    """
+    previous = getattr(_root_override, "path", None)
+    if project_root is not None:
+        _root_override.path = os.path.abspath(project_root)
+    try:
+        yield
+    finally:
+        _root_override.path = previous
+
+
+def emit(message=""):
+    """
+    Prints a progress or diagnostic line, or appends it to the calling
+    thread's list inside capture_output(). Library and daemon callers capture
+    this way instead of swapping sys.stdout, which is shared by all threads.
+    """
+    lines = getattr(_output, "lines", None)
+    if lines is None:
+        print(message)
+    else:
+        lines.extend(str(message).splitlines())
+
+
+@contextlib.contextmanager
+def capture_output():
+    """
+    Collects the lines emit() produces in this thread; yields the list.
+    """
+    previous = getattr(_output, "lines", None)
+    _output.lines = lines = []
+    try:
+        yield lines
+    finally:
+        _output.lines = previous
+
+
+def _read_text(path):
+    """
+    Returns the text content of path, or None if it does not exist.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_atomic(path, content):
+    """
+    Writes content to path via a temporary file and rename.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def iter_prompt_files():
+    """
+    Yields (file_path_abs, file_path_rel) for every prompt file under PROMPT_DIRS.
+    Directories and files are visited in sorted order so the index is deterministic.
+    """
+    project_root = _root()
+    for prompt_dir in PROMPT_DIRS:
+        full_prompt_dir_path = os.path.join(project_root, prompt_dir)
+        if not os.path.isdir(full_prompt_dir_path):
+            emit(f"Warning: Prompt directory '{prompt_dir}' not found. Skipping.")
+            continue
+
+        for root, dirs, files in os.walk(full_prompt_dir_path):
+            dirs.sort()
+            for file_name in sorted(files):
+                if not file_name.endswith(".md"):
+                    continue
+                if file_name in DOC_FILES:
+                    continue
+                file_path_abs = os.path.join(root, file_name)
+                yield file_path_abs, os.path.relpath(file_path_abs, project_root)
+
+
+def _walk_order_key(file_path_rel):
+    """
+    Sort key reproducing iter_prompt_files() order: PROMPT_DIRS order, then at
+    each level a directory's own files (sorted) before its subdirectories.
+    """
+    parts = file_path_rel.split(os.sep)
+    top = PROMPT_DIRS.index(parts[0]) if parts[0] in PROMPT_DIRS else len(PROMPT_DIRS)
+    return (top, [(1, d) for d in parts[1:-1]] + [(0, parts[-1])])
+
+
+def _is_prompt_path(file_path_rel):
+    parts = file_path_rel.split(os.sep)
+    return (
+        len(parts) > 1
+        and parts[0] in PROMPT_DIRS
+        and parts[-1].endswith(".md")
+        and parts[-1] not in DOC_FILES
+    )
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase alphanumeric tokens.
+    """
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def _field_text(prompt, field):
+    value = prompt.get(field, "")
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return "" if value is None else str(value)
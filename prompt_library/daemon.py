@@ -0,0 +1,195 @@
+"""The prompt-library daemon: an in-memory index behind a local JSON API."""
+
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from .api import index
+from .core import _root, capture_output
+from .facets import SEARCH_FACETS
+from .indexer import generate_prompt_index, update_prompt_index
+from .prompt_index import _index_sha256, load_prompt_index
+from .search_index import (
+    _prepare_search_index,
+    build_search_index,
+    find_prompts,
+    format_search_results,
+    load_search_index,
+)
+from .validation import validate_prompt_files
+from .watcher import watch_prompt_dirs
+
+# Local query API served by `serve`.
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+
+
+class PromptLibraryState:
+    """
+    In-memory copy of the prompt index and search index shared by the daemon's
+    request threads. reload() swaps both in atomically; reindex() serializes
+    index runs triggered by the watcher and by clients.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index_lock = threading.Lock()
+        self.prompts = []
+        self.by_id = {}
+        self.search_index = None
+        self.loaded_at = None
+
+    def reload(self):
+        prompts = load_prompt_index()
+        # The file written by the last index run, unless it is missing or stale.
+        search_index = load_search_index()
+        if search_index is None or search_index.get("source_sha256") != _index_sha256():
+            search_index = _prepare_search_index(build_search_index(prompts))
+        with self.lock:
+            self.prompts = prompts
+            self.by_id = {p.get("id"): p for p in prompts}
+            self.search_index = search_index
+            self.loaded_at = datetime.now().isoformat()
+
+    def reindex(self, changed_paths=None):
+        """
+        Re-indexes (only changed_paths when given) and reloads. Returns the
+        index summary with its log lines.
+        """
+        with self.index_lock:
+            if changed_paths is None:
+                summary = index()
+            else:
+                with capture_output() as lines:
+                    summary = update_prompt_index(changed_paths)
+                summary["log"] = lines
+            self.reload()
+        return summary
+
+    def snapshot(self):
+        with self.lock:
+            return self.prompts, self.by_id, self.search_index
+
+
+class PromptLibraryHandler(BaseHTTPRequestHandler):
+    """
+    JSON query API served by the daemon:
+      GET  /health
+      GET  /search?q=...&top_k=10&page=1&semantic=1&status=active&tags=...
+      GET  /prompts/<id>
+      GET  /validate
+      POST /index
+    """
+
+    state = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        prompts, by_id, search_index = self.state.snapshot()
+
+        if url.path == "/health":
+            self._send_json(
+                200,
+                {
+                    "status": "ok",
+                    "prompts": len(prompts),
+                    "loaded_at": self.state.loaded_at,
+                    "project_root": _root(),
+                },
+            )
+        elif url.path == "/search":
+            query = params.get("q", [""])[0]
+            try:
+                top_k = int(params.get("top_k", ["10"])[0])
+                page = int(params.get("page", ["1"])[0])
+            except ValueError:
+                self._send_json(400, {"error": "top_k and page must be integers"})
+                return
+            semantic = params.get("semantic", ["0"])[0].lower() in ("1", "true", "yes")
+            filters = {
+                field: params[field] for field in SEARCH_FACETS if field in params
+            }
+            found = find_prompts(
+                query,
+                top_k=top_k,
+                page=page,
+                search_index=search_index,
+                semantic=semantic,
+                filters=filters,
+            )
+            found["text"] = format_search_results(found, top_k=top_k)
+            self._send_json(200, found)
+        elif url.path.startswith("/prompts/"):
+            prompt = by_id.get(unquote(url.path[len("/prompts/") :]))
+            if prompt is None:
+                self._send_json(404, {"error": "prompt not found"})
+            else:
+                self._send_json(200, prompt)
+        elif url.path == "/validate":
+            self._send_json(200, validate_prompt_files())
+        else:
+            self._send_json(404, {"error": "unknown endpoint"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/index":
+            self._send_json(404, {"error": "unknown endpoint"})
+            return
+        self._send_json(200, self.state.reindex())
+
+    def log_message(self, format, *args):
+        pass  # Keep the daemon's console for change notifications
+
+
+def serve(host=DAEMON_HOST, port=DAEMON_PORT, poll_interval=1.0):
+    """
+    Runs the prompt-library daemon: keeps the parsed index in memory, applies
+    file changes incrementally (see watch_prompt_dirs) and answers JSON queries on http://host:port.
+    """
+    state = PromptLibraryState()
+    try:
+        state.reload()
+    except FileNotFoundError:
+        print("No index found; generating one...")
+        generate_prompt_index()
+        state.reload()
+
+    def on_change(changed_paths):
+        try:
+            state.reindex(changed_paths)
+        except Exception as e:
+            print(f"Error re-indexing: {e}")
+            return
+        print(f"Change detected; re-indexed {len(state.prompts)} prompts.")
+
+    stop_event = threading.Event()
+    watcher = threading.Thread(
+        target=watch_prompt_dirs,
+        args=(on_change,),
+        kwargs={"poll_interval": poll_interval, "stop_event": stop_event},
+        daemon=True,
+    )
+    watcher.start()
+
+    handler = type("Handler", (PromptLibraryHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(
+        f"Serving prompt library on http://{host}:{port} ({len(state.prompts)} prompts)"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        stop_event.set()
+        server.server_close()
@@ -0,0 +1,102 @@
+"""Facet postings and the int bitmaps search filters and counts use."""
+
+# Fields search results can be filtered and counted by. Prompts listing
+# the wildcard model are compatible with every model filter.
+SEARCH_FACETS = (
+    "category",
+    "sub_category",
+    "status",
+    "tags",
+    "llm_model_compatibility",
+)
+ANY_MODEL = "any"
+
+
+def _facet_values(prompt, field):
+    value = prompt.get(field)
+    values = value if isinstance(value, list) else [value]
+    return {str(v).lower() for v in values if v is not None and v != ""}
+
+
+def build_facet_postings(all_prompts_metadata):
+    """
+    Returns {field: {value: [doc ids]}} for SEARCH_FACETS; values are lowercased.
+    """
+    facets = {field: {} for field in SEARCH_FACETS}
+    for doc_id, prompt in enumerate(all_prompts_metadata):
+        for field in SEARCH_FACETS:
+            for value in _facet_values(prompt, field):
+                facets[field].setdefault(value, []).append(doc_id)
+    return {field: dict(sorted(values.items())) for field, values in facets.items()}
+
+
+def _bitmap(doc_ids):
+    """
+    Packs doc ids into an int with bit i set for doc i.
+    """
+    if not doc_ids:
+        return 0
+    bits = bytearray(max(doc_ids) // 8 + 1)
+    for doc_id in doc_ids:
+        bits[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _bitmap_ids(bitmap):
+    """
+    Returns the doc ids set in bitmap, in ascending order.
+    """
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            ids.append(byte_index * 8 + low.bit_length() - 1)
+            byte ^= low
+    return ids
+
+
+def facet_bitmaps(facet_postings):
+    return {
+        field: {value: _bitmap(doc_ids) for value, doc_ids in values.items()}
+        for field, values in facet_postings.items()
+    }
+
+
+def filter_bitmap(bitmaps, filters):
+    """
+    Returns the bitmap of docs matching filters ({field: [values]}): any of a
+    field's values may match, and every filtered field must match. Returns
+    None when there are no filters.
+    """
+    allowed = None
+    for field, values in (filters or {}).items():
+        if not values:
+            continue
+        field_bitmaps = bitmaps.get(field, {})
+        wanted = {str(v).lower() for v in values}
+        if field == "llm_model_compatibility":
+            wanted.add(ANY_MODEL)
+        matched = 0
+        for value in wanted:
+            matched |= field_bitmaps.get(value, 0)
+        allowed = matched if allowed is None else allowed & matched
+    return allowed
+
+
+def facet_counts(bitmaps, matched):
+    """
+    Counts the docs of the matched bitmap per facet value, most common first.
+    """
+    counts = {}
+    for field, values in bitmaps.items():
+        field_counts = [
+            (value, (bitmap & matched).bit_count()) for value, bitmap in values.items()
+        ]
+        counts[field] = dict(
+            sorted(
+                ((v, c) for v, c in field_counts if c),
+                key=lambda item: (-item[1], item[0]),
+            )
+        )
+    return counts
@@ -0,0 +1,109 @@
+"""Reading the YAML front matter and the body of prompt files."""
+
+import yaml
+
+from .core import YAML_LOADER, emit
+
+
+def _iter_lines(text):
+    """
+    Lazily yields the lines of text (with line endings) without splitting the
+    whole string, so a consumer that stops early never copies the rest.
+    """
+    pos = 0
+    length = len(text)
+    while pos < length:
+        end = text.find("\n", pos)
+        end = length if end == -1 else end + 1
+        yield text[pos:end]
+        pos = end
+
+
+def _skip_blank_lines(text, pos=0):
+    """
+    Returns the offset of the first non-blank line at or after pos.
+    """
+    while True:
+        end = text.find("\n", pos)
+        if end == -1 or text[pos:end].strip():
+            return pos
+        pos = end + 1
+
+
+def split_front_matter(lines):
+    """
+    Reads a front matter block from an iterator of lines (a file object or
+    _iter_lines()), consuming only up to the closing '---'. The block starts
+    at the first non-blank line, which must be '---'.
+    Returns (front_matter_str, consumed_chars), or (None, 0) if there is none.
+    """
+    consumed = 0
+    for line in lines:
+        consumed += len(line)
+        if line.strip():
+            break
+    else:
+        return None, 0
+    if line.strip() != "---":
+        return None, 0
+
+    front_matter_lines = []
+    for line in lines:
+        consumed += len(line)
+        if line.strip() == "---":
+            return "".join(front_matter_lines), consumed
+        front_matter_lines.append(line)
+    return None, 0  # Unterminated block
+
+
+def parse_front_matter(front_matter_str):
+    """
+    Parses a front matter block with the fastest available safe loader.
+    Returns the parsed value, or None (with a printed error) on invalid YAML.
+    """
+    try:
+        return yaml.load(front_matter_str, Loader=YAML_LOADER)
+    except yaml.YAMLError as e:
+        emit(f"Error parsing YAML front matter: {e}")
+        return None
+
+
+def read_front_matter(file_path):
+    """
+    Returns the parsed front matter of a Markdown file, reading it line by line
+    only until the closing '---'; the body is never loaded. None if absent.
+    """
+    with open(file_path, encoding="utf-8") as f:
+        front_matter_str, _ = split_front_matter(f)
+    if front_matter_str is None:
+        return None
+    return parse_front_matter(front_matter_str)
+
+
+def extract_front_matter(md_content):
+    """
+    Extracts YAML front matter from Markdown content.
+    Returns (front_matter_dict, content_without_front_matter).
+    """
+    front_matter_str, body_start = split_front_matter(_iter_lines(md_content))
+    if front_matter_str is None:
+        return None, md_content
+
+    front_matter_dict = parse_front_matter(front_matter_str)
+    if front_matter_dict is None:
+        return None, md_content
+    return front_matter_dict, md_content[_skip_blank_lines(md_content, body_start) :]
+
+
+def read_prompt_body(file_path_abs):
+    """
+    Returns the Markdown body of a prompt file, reading past the front matter
+    line by line instead of parsing it.
+    """
+    with open(file_path_abs, encoding="utf-8") as f:
+        front_matter_str, _ = split_front_matter(f)
+        if front_matter_str is None:
+            f.seek(0)
+            return f.read()
+        body = f.read()
+    return body[_skip_blank_lines(body) :]
@@ -0,0 +1,291 @@
+"""Full and incremental runs that write prompt_index.yaml and its sidecars."""
+
+import hashlib
+import os
+import time
+
+import yaml
+
+from .analysis import analyze_prompt_library
+from .core import (
+    METADATA_DIR,
+    PROMPT_INDEX_FILE,
+    _is_prompt_path,
+    _read_text,
+    _root,
+    _walk_order_key,
+    emit,
+    iter_prompt_files,
+)
+from .manifest import (
+    _index_metadata,
+    _process_prompt_files,
+    load_manifest,
+    process_prompt_file,
+    save_manifest,
+)
+from .prompt_index import load_prompt_index, write_index_sidecar
+from .readmes import update_category_readmes
+from .schema import check_unique_ids, has_errors, print_diagnostics
+from .search_index import write_search_index
+from .semantic import write_semantic_index
+
+
+def _previous_index_entries():
+    """
+    Returns {file_path: entry} from the existing prompt_index.yaml, or {} if
+    there is none; used to carry last_modified over when the manifest is missing.
+    """
+    try:
+        prompts = load_prompt_index()
+    except (OSError, yaml.YAMLError):
+        return {}
+    if not isinstance(prompts, list):
+        return {}
+    return {
+        p["file_path"]: p for p in prompts if isinstance(p, dict) and "file_path" in p
+    }
+
+
+def generate_prompt_index(full=False, jobs=1):
+    """
+    Scans specified directories for prompt files, extracts and validates their
+    front matter, and generates the prompt_index.yaml file.
+
+    Only files that were added or changed since the last run (according to the
+    manifest) are re-parsed; pass full=True to re-parse everything. Both modes
+    produce byte-identical output. With jobs > 1 parsing runs in a process pool;
+    results are merged in scan order so the output does not depend on jobs.
+
+    Returns a summary dict: 'written' (index generated), 'changed' (YAML
+    content differed), 'prompt_count', 'scanned', 'reparsed', 'removed',
+    'skipped' (files left out as invalid) and 'elapsed' seconds.
+    """
+    all_prompts_metadata = []
+    started = time.perf_counter()
+
+    # Ensure metadata directory exists
+    os.makedirs(os.path.join(_root(), METADATA_DIR), exist_ok=True)
+
+    old_manifest = load_manifest()
+    new_manifest = {}
+    reparsed = 0
+    skipped = []
+
+    files = list(iter_prompt_files())
+    # Files missing from the manifest (e.g. a fresh checkout) take their
+    # last_modified from the existing index while their front matter matches.
+    previous = {}
+    if any(rel not in old_manifest for _, rel in files):
+        previous = _previous_index_entries()
+    tasks = [
+        (
+            file_path_abs,
+            file_path_rel,
+            old_manifest.get(file_path_rel),
+            full,
+            previous.get(file_path_rel),
+        )
+        for file_path_abs, file_path_rel in files
+    ]
+    results = _process_prompt_files(tasks, jobs)
+
+    for task, (entry, metadata, diagnostics, was_reread, messages) in zip(
+        tasks, results, strict=True
+    ):
+        for line in messages:
+            emit(line)
+        if was_reread:
+            reparsed += 1
+        new_manifest[task[1]] = entry
+
+        if metadata is not None and not has_errors(diagnostics):
+            all_prompts_metadata.append(metadata)
+        else:
+            skipped.append(task[1])
+        # Invalid prompts are left out of the index; their errors were
+        # reported with the file's messages above.
+
+    deleted = len(old_manifest.keys() - new_manifest.keys())
+    elapsed = time.perf_counter() - started
+    rate = len(tasks) / elapsed if elapsed > 0 else float("inf")
+    emit(
+        f"Scanned {len(new_manifest)} files: {reparsed} re-read, {deleted} removed "
+        f"in {elapsed:.2f}s ({rate:.0f} files/sec, jobs={jobs})."
+    )
+    summary = {
+        "written": False,
+        "changed": False,
+        "prompt_count": len(all_prompts_metadata),
+        "scanned": len(new_manifest),
+        "reparsed": reparsed,
+        "removed": deleted,
+        "skipped": skipped,
+        "elapsed": elapsed,
+    }
+
+    return _write_index(all_prompts_metadata, new_manifest, summary, full=full)
+
+
+def _write_index(
+    all_prompts_metadata,
+    manifest,
+    summary,
+    readme_dirs=None,
+    changed_paths=None,
+    full=False,
+    previous=None,
+):
+    """
+    Runs cross-cutting validations and, if they pass, writes prompt_index.yaml,
+    its sidecars and the manifest, then refreshes category READMEs (only those
+    in readme_dirs when given). Cross-prompt warnings are only printed for
+    changed_paths when given; full=True rebuilds the semantic index from
+    scratch. previous maps changed_paths to their manifest entries before the
+    update; with it the JSON sidecar and search index are patched instead of
+    rebuilt. Updates and returns summary.
+    """
+    overall_valid = True  # Initialize overall validity flag
+
+    # After collecting all metadata, perform cross-cutting validations
+    if not check_unique_ids(all_prompts_metadata):
+        overall_valid = False
+
+    cross_diagnostics = analyze_prompt_library(manifest, changed_paths)
+    print_diagnostics(cross_diagnostics)
+    if has_errors(cross_diagnostics):
+        overall_valid = False
+
+    if not overall_valid:
+        emit("Error: Prompt index generation halted due to critical validation errors.")
+        return summary  # Do not write the index if critical errors exist
+
+    # Write the aggregated metadata to prompt_index.yaml
+    index_file_path = os.path.join(_root(), PROMPT_INDEX_FILE)
+    try:
+        index_content = _dump_index_yaml(all_prompts_metadata, manifest)
+        old_content = _read_text(index_file_path)
+        summary["changed"] = old_content != index_content
+        if summary["changed"]:
+            with open(index_file_path, "w", encoding="utf-8") as f:
+                f.write(index_content)
+            emit(
+                f"Successfully generated {index_file_path} with {len(all_prompts_metadata)} prompts."
+            )
+        else:
+            emit(
+                f"{index_file_path} is up to date ({len(all_prompts_metadata)} prompts)."
+            )
+        save_manifest(manifest)
+        base_sha256 = None
+        if previous is not None and old_content is not None:
+            base_sha256 = hashlib.sha256(old_content.encode("utf-8")).hexdigest()
+        write_index_sidecar(
+            all_prompts_metadata, index_content, manifest, base_sha256, previous
+        )
+        write_search_index(all_prompts_metadata, index_content, base_sha256, previous)
+        write_semantic_index(all_prompts_metadata, manifest, full)
+
+        # Update READMEs after successful indexing
+        update_category_readmes(all_prompts_metadata, readme_dirs)
+        summary["written"] = True
+
+    except Exception as e:
+        emit(f"Error writing prompt index file: {e}")
+    return summary
+
+
+class _IndexDumper(yaml.Dumper):
+    """
+    Dumper that never emits anchors and aliases. Objects shared through YAML
+    aliases in a file's front matter are separate copies once read back from
+    the manifest's JSON, so anchors would make an entry's YAML (and its
+    &id00N numbering) depend on whether the run was cold or warm.
+    """
+
+    def ignore_aliases(self, data):
+        return True
+
+
+def _dump_index_yaml(all_prompts_metadata, manifest):
+    """
+    Serializes the index. A top-level block sequence is the concatenation of
+    its items' dumps, so each entry's YAML is cached in its manifest entry and
+    only changed prompts are re-emitted.
+    """
+    if not all_prompts_metadata:
+        return yaml.dump([], default_flow_style=False)
+    parts = []
+    for metadata in all_prompts_metadata:
+        entry = manifest[metadata["file_path"]]
+        if "yaml" not in entry:
+            entry["yaml"] = yaml.dump(
+                [metadata],
+                Dumper=_IndexDumper,
+                sort_keys=False,
+                indent=2,
+                default_flow_style=False,
+            )
+        parts.append(entry["yaml"])
+    return "".join(parts)
+
+
+def update_prompt_index(changed_paths):
+    """
+    Applies changes to specific prompt files (relative paths that were added,
+    modified or deleted) without rescanning the library: only those files are
+    re-read and validated, the search index and JSON sidecar are patched for
+    them, and only the READMEs of their directories are refreshed.
+    Returns the same summary dict as generate_prompt_index().
+    """
+    started = time.perf_counter()
+    manifest = load_manifest()
+    if not manifest:
+        return generate_prompt_index()
+
+    changed = {p for p in changed_paths if _is_prompt_path(p)}
+    # The entries the existing index files were built from, for patching them.
+    previous = {p: manifest.get(p) for p in changed}
+    reparsed = 0
+    removed = 0
+    for file_path_rel in sorted(changed, key=_walk_order_key):
+        file_path_abs = os.path.join(_root(), file_path_rel)
+        if not os.path.isfile(file_path_abs):
+            removed += manifest.pop(file_path_rel, None) is not None
+            continue
+        task = (file_path_abs, file_path_rel, manifest.get(file_path_rel), False, None)
+        entry, _, _, was_reread, messages = process_prompt_file(task)
+        for line in messages:
+            emit(line)
+        reparsed += was_reread
+        manifest[file_path_rel] = entry
+
+    manifest = {rel: manifest[rel] for rel in sorted(manifest, key=_walk_order_key)}
+    all_prompts_metadata = []
+    skipped = []
+    for file_path_rel, entry in manifest.items():
+        # Unchanged files keep the result of their last validation.
+        if entry["valid"]:
+            all_prompts_metadata.append(_index_metadata(file_path_rel, entry))
+        else:
+            skipped.append(file_path_rel)
+
+    elapsed = time.perf_counter() - started
+    emit(
+        f"Applied {len(changed)} changed files: {reparsed} re-read, {removed} removed "
+        f"in {elapsed:.3f}s."
+    )
+    summary = {
+        "written": False,
+        "changed": False,
+        "prompt_count": len(all_prompts_metadata),
+        "scanned": len(changed),
+        "reparsed": reparsed,
+        "removed": removed,
+        "skipped": skipped,
+        "elapsed": elapsed,
+    }
+    readme_dirs = {os.path.dirname(os.path.join(_root(), p)) for p in changed}
+    return _write_index(
+        all_prompts_metadata, manifest, summary, readme_dirs, changed, previous=previous
+    )
@@ -0,0 +1,211 @@
+"""The index manifest: cached stat, hash and front matter per prompt file."""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from .analysis import body_fingerprint
+from .core import METADATA_DIR, _root, capture_output
+from .frontmatter import _iter_lines, parse_front_matter, split_front_matter
+from .schema import check_prompt_metadata, diagnostic, format_diagnostics, has_errors
+
+# Local cache of (mtime, size, content hash, parsed front matter) per prompt file.
+# Machine-specific, so it is not committed.
+MANIFEST_FILE = os.path.join(METADATA_DIR, "prompt_manifest.json")
+MANIFEST_VERSION = 5
+
+
+def load_manifest():
+    """
+    Loads the index manifest. Returns an empty dict if it is missing, unreadable,
+    or was written by an incompatible version.
+    """
+    manifest_path = os.path.join(_root(), MANIFEST_FILE)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(files):
+    """
+    Writes the index manifest atomically.
+    """
+    manifest_path = os.path.join(_root(), MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        # json.dumps uses the C encoder; json.dump streams through the pure-Python one.
+        f.write(json.dumps({"version": MANIFEST_VERSION, "files": files}))
+    os.replace(tmp_path, manifest_path)
+
+
+def _is_json_safe(value):
+    """
+    Returns True if value survives a JSON round trip unchanged (YAML may yield dates etc.).
+    """
+    try:
+        return json.loads(json.dumps(value)) == value
+    except (TypeError, ValueError):
+        return False
+
+
+def scan_prompt_file(
+    file_path_abs, file_path_rel, cached=None, full=False, previous=None
+):
+    """
+    Returns a manifest entry for a prompt file, re-reading and re-parsing it only
+    if its stat or content hash differs from the cached entry (unless full=True).
+
+    last_modified is only stamped (with the file's mtime) when the content
+    changes, so it does not follow checkout times. Without a cached entry it is
+    carried over from previous, the file's entry in the existing index, when
+    the front matter is unchanged (the index records no content hash).
+    """
+    st = os.stat(file_path_abs)
+    if (
+        not full
+        and cached
+        and cached.get("cacheable")
+        and cached["mtime_ns"] == st.st_mtime_ns
+        and cached["size"] == st.st_size
+    ):
+        return cached
+
+    with open(file_path_abs, "rb") as f:
+        raw = f.read()
+    content_hash = hashlib.sha256(raw).hexdigest()
+
+    last_modified = None
+    if cached and cached["sha256"] == content_hash:
+        # Touched but unchanged: keep the original modification stamp.
+        last_modified = cached["last_modified"]
+        if not full and cached.get("cacheable"):
+            return {**cached, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    text = raw.decode("utf-8")
+    front_matter_str, consumed = split_front_matter(_iter_lines(text))
+    body_hash, minhash = body_fingerprint(text[consumed:])
+    metadata = None
+    if front_matter_str is not None:
+        metadata = parse_front_matter(front_matter_str)
+    if metadata is not None and not isinstance(metadata, dict):
+        metadata = None
+    if last_modified is None:
+        if (
+            not cached
+            and previous
+            and metadata is not None
+            and _same_front_matter(previous, metadata)
+        ):
+            last_modified = previous["last_modified"]
+        else:
+            last_modified = datetime.fromtimestamp(st.st_mtime).isoformat()
+
+    return {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": content_hash,
+        "last_modified": last_modified,
+        "metadata": metadata,
+        "cacheable": _is_json_safe(metadata),
+        "body_sha256": body_hash,
+        "minhash": minhash,
+    }
+
+
+def _same_front_matter(index_entry, metadata):
+    """
+    Returns True if an index entry holds exactly this front matter.
+    """
+    if "last_modified" not in index_entry:
+        return False
+    stored = {
+        k: v for k, v in index_entry.items() if k not in ("last_modified", "file_path")
+    }
+    return stored == metadata
+
+
+def _is_unchanged(file_path_abs, cached):
+    """
+    Returns True if the manifest entry can be reused without reading the file.
+    """
+    if not cached or not cached.get("cacheable"):
+        return False
+    st = os.stat(file_path_abs)
+    return cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size
+
+
+def process_prompt_file(task):
+    """
+    Scans and validates a single prompt file without printing. Takes a
+    (file_path_abs, file_path_rel, cached, full, previous) tuple (see
+    scan_prompt_file()) so it can run in a worker process.
+    Returns (entry, metadata_or_None, diagnostics, was_reread, messages), where
+    messages are the lines the caller should report for this file.
+    """
+    file_path_abs, file_path_rel, cached, full, previous = task
+    with capture_output() as messages:
+        entry = scan_prompt_file(file_path_abs, file_path_rel, cached, full, previous)
+    metadata = None
+    if entry["metadata"]:
+        metadata = _index_metadata(file_path_rel, entry)
+        diagnostics = check_prompt_metadata(metadata, file_path_rel)
+        messages.extend(format_diagnostics(diagnostics))
+    else:
+        diagnostics = [
+            diagnostic(
+                file_path_rel,
+                "front-matter",
+                f"No valid YAML front matter found in {file_path_rel}",
+            )
+        ]
+        messages.append(
+            f"Warning: No YAML front matter found in {file_path_rel}. Skipping."
+        )
+    # Recorded so later updates need not re-validate files that did not change.
+    entry["valid"] = metadata is not None and not has_errors(diagnostics)
+    return entry, metadata, diagnostics, entry is not cached, messages
+
+
+def _index_metadata(file_path_rel, entry):
+    """
+    Returns the index entry for a manifest entry: its front matter plus
+    last_modified and the relative file path.
+    """
+    metadata = dict(entry["metadata"])
+    metadata["last_modified"] = entry["last_modified"]
+    metadata["file_path"] = file_path_rel
+    return metadata
+
+
+def _process_prompt_files(tasks, jobs):
+    """
+    Runs process_prompt_file over tasks, fanning files that need re-parsing out
+    to a process pool when jobs > 1. Results are returned in task order.
+    """
+    if jobs <= 1:
+        return [process_prompt_file(task) for task in tasks]
+
+    results = [None] * len(tasks)
+    stale = []
+    for i, task in enumerate(tasks):
+        if not task[3] and _is_unchanged(task[0], task[2]):
+            results[i] = process_prompt_file(task)
+        else:
+            stale.append(i)
+
+    if stale:
+        chunksize = max(1, len(stale) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            parsed = executor.map(
+                process_prompt_file, [tasks[i] for i in stale], chunksize=chunksize
+            )
+            for i, result in zip(stale, parsed, strict=True):
+                results[i] = result
+    return results
@@ -0,0 +1,202 @@
+"""The columnar JSON sidecar of prompt_index.yaml, and loading the index."""
+
+import hashlib
+import json
+import os
+
+import yaml
+
+from .core import METADATA_DIR, PROMPT_INDEX_FILE, YAML_LOADER, _read_text, _root, emit
+
+# Columnar JSON copy of prompt_index.yaml for fast loading; the YAML stays the
+# human-facing artifact and the sidecar is ignored when it does not match it.
+PROMPT_INDEX_SIDECAR_FILE = os.path.join(METADATA_DIR, "prompt_index.json")
+SIDECAR_VERSION = 1
+
+
+def build_index_sidecar(all_prompts_metadata, index_content):
+    """
+    Builds the columnar sidecar: one value list per field, plus a table of key
+    orders so each prompt dict can be rebuilt exactly. source_sha256 ties the
+    sidecar to the YAML it was generated with.
+    """
+    schemas = []
+    schema_ids = {}
+    row_schemas = []
+    columns = {}
+    n_rows = len(all_prompts_metadata)
+    for row, prompt in enumerate(all_prompts_metadata):
+        keys = tuple(prompt)
+        if keys not in schema_ids:
+            schema_ids[keys] = len(schemas)
+            schemas.append(list(keys))
+        row_schemas.append(schema_ids[keys])
+        for key, value in prompt.items():
+            if key not in columns:
+                columns[key] = [None] * n_rows
+            columns[key][row] = value
+
+    return {
+        "version": SIDECAR_VERSION,
+        "source_sha256": hashlib.sha256(index_content.encode("utf-8")).hexdigest(),
+        "count": n_rows,
+        "schemas": schemas,
+        "row_schemas": row_schemas,
+        "columns": columns,
+    }
+
+
+def _patch_positions(old_paths, new_paths, changed):
+    """
+    Returns (removed, added) for turning a positional list built for old_paths
+    into one for new_paths when only the rows of changed paths differ: the old
+    positions to delete (descending) and the new positions to insert
+    (ascending). Returns None if the other rows did not keep their order.
+    """
+    kept = [path for path in old_paths if path not in changed]
+    if kept != [path for path in new_paths if path not in changed]:
+        return None
+    removed = [i for i, path in enumerate(old_paths) if path in changed]
+    added = [i for i, path in enumerate(new_paths) if path in changed]
+    return removed[::-1], added
+
+
+def patch_index_sidecar(sidecar, all_prompts_metadata, index_content, changed):
+    """
+    Updates a sidecar built by build_index_sidecar() in place so that it
+    matches all_prompts_metadata, replacing only the rows of changed file
+    paths. Returns False if the sidecar's rows do not line up with the index.
+    """
+    columns = sidecar["columns"]
+    row_schemas = sidecar["row_schemas"]
+    positions = _patch_positions(
+        columns.get("file_path", []),
+        [prompt["file_path"] for prompt in all_prompts_metadata],
+        changed,
+    )
+    if positions is None:
+        return False
+    removed, added = positions
+
+    for row in removed:
+        del row_schemas[row]
+        for values in columns.values():
+            del values[row]
+    schemas = sidecar["schemas"]
+    schema_ids = {tuple(keys): i for i, keys in enumerate(schemas)}
+    for row in added:
+        prompt = all_prompts_metadata[row]
+        keys = tuple(prompt)
+        if keys not in schema_ids:
+            schema_ids[keys] = len(schemas)
+            schemas.append(list(keys))
+        for key in keys:
+            if key not in columns:
+                columns[key] = [None] * len(row_schemas)
+        row_schemas.insert(row, schema_ids[keys])
+        for key, values in columns.items():
+            values.insert(row, prompt.get(key))
+
+    # Number schemas and order columns by first use, as build_index_sidecar() does.
+    used = list(dict.fromkeys(row_schemas))
+    if used != list(range(len(schemas))):
+        renumber = {old: new for new, old in enumerate(used)}
+        sidecar["row_schemas"] = [renumber[schema_id] for schema_id in row_schemas]
+        sidecar["schemas"] = schemas = [schemas[schema_id] for schema_id in used]
+    keys = dict.fromkeys(key for keys in schemas for key in keys)
+    sidecar["columns"] = {key: columns[key] for key in keys}
+    sidecar["count"] = len(all_prompts_metadata)
+    sidecar["source_sha256"] = hashlib.sha256(index_content.encode("utf-8")).hexdigest()
+    return True
+
+
+def write_index_sidecar(
+    all_prompts_metadata, index_content, manifest, base_sha256=None, changed=None
+):
+    """
+    Writes the JSON sidecar of the prompt index (only if changed). If the
+    metadata holds values JSON cannot represent, the sidecar is removed so
+    readers fall back to the YAML.
+
+    When the existing sidecar was built from the index whose YAML hashes to
+    base_sha256, only the rows of the changed paths are replaced.
+    """
+    sidecar_path = os.path.join(_root(), PROMPT_INDEX_SIDECAR_FILE)
+    # Index entries add only strings to the front matter checked by scan_prompt_file().
+    if not all(manifest[p["file_path"]]["cacheable"] for p in all_prompts_metadata):
+        if os.path.exists(sidecar_path):
+            os.remove(sidecar_path)
+        emit("Warning: Index holds non-JSON values; skipping JSON sidecar.")
+        return
+    old_content = _read_text(sidecar_path)
+    sidecar = None
+    if base_sha256 is not None and old_content is not None:
+        try:
+            sidecar = json.loads(old_content)
+        except ValueError:
+            sidecar = None
+        if (
+            not sidecar
+            or sidecar.get("version") != SIDECAR_VERSION
+            or sidecar.get("source_sha256") != base_sha256
+            or not patch_index_sidecar(
+                sidecar, all_prompts_metadata, index_content, changed
+            )
+        ):
+            sidecar = None
+    if sidecar is None:
+        sidecar = build_index_sidecar(all_prompts_metadata, index_content)
+    content = json.dumps(sidecar, separators=(",", ":"))
+    if old_content == content:
+        return
+    tmp_path = f"{sidecar_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, sidecar_path)
+    emit(f"Updated {os.path.relpath(sidecar_path, _root())}")
+
+
+def _sidecar_rows(sidecar):
+    columns = sidecar["columns"]
+    schemas = sidecar["schemas"]
+    return [
+        {key: columns[key][row] for key in schemas[schema_id]}
+        for row, schema_id in enumerate(sidecar["row_schemas"])
+    ]
+
+
+def load_prompt_index():
+    """
+    Returns the list of prompt metadata dicts from the index. Reads the JSON
+    sidecar when it matches prompt_index.yaml, otherwise parses the YAML.
+    Raises FileNotFoundError if no index has been generated.
+    """
+    index_file_path = os.path.join(_root(), PROMPT_INDEX_FILE)
+    sidecar_path = os.path.join(_root(), PROMPT_INDEX_SIDECAR_FILE)
+    with open(index_file_path, "rb") as f:
+        raw = f.read()
+
+    try:
+        with open(sidecar_path, encoding="utf-8") as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        sidecar = None
+    if (
+        sidecar
+        and sidecar.get("version") == SIDECAR_VERSION
+        and sidecar.get("source_sha256") == hashlib.sha256(raw).hexdigest()
+    ):
+        return _sidecar_rows(sidecar)
+
+    return yaml.load(raw, Loader=YAML_LOADER) or []
+
+
+def _index_sha256():
+    """
+    Returns the sha256 of prompt_index.yaml, or None if it does not exist.
+    """
+    try:
+        with open(os.path.join(_root(), PROMPT_INDEX_FILE), "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,164 @@
+"""The automated prompt lists in category READMEs."""
+
+import hashlib
+import json
+import os
+
+from .core import METADATA_DIR, _read_text, _root, _write_atomic, emit
+
+# Rendered-list hash and mtime per category README, so unchanged ones are skipped.
+README_STATE_FILE = os.path.join(METADATA_DIR, "readme_state.json")
+
+
+def render_prompt_list(prompts):
+    """
+    Renders the automated prompt list block for one directory's README.
+    """
+    parts = ["\n"]
+    for p in sorted(prompts, key=lambda x: x.get("title", "Untitled")):
+        rel_link = os.path.basename(p["file_path"])
+        desc = p.get("description", "No description.")
+        parts.append(f"### [{p.get('title', 'Untitled')}]({rel_link})\n{desc}\n\n")
+        # Add metadata badges/bullets
+        meta_items = []
+        if "version" in p:
+            meta_items.append(f"**Version:** {p['version']}")
+        if "tags" in p:
+            meta_items.append(f"**Tags:** {', '.join(p['tags'])}")
+        if meta_items:
+            parts.append(f"- {' | '.join(meta_items)}\n\n")
+        parts.append("---\n\n")
+    return "".join(parts)
+
+
+def _prompt_list_hash(prompts):
+    """
+    Hashes the fields render_prompt_list() reads, so an unchanged list can be
+    recognized without rendering it.
+    """
+    rows = [
+        (
+            p.get("title", "Untitled"),
+            os.path.basename(p["file_path"]),
+            p.get("description", "No description."),
+            "version" in p,
+            p.get("version"),
+            "tags" in p,
+            p.get("tags"),
+        )
+        for p in prompts
+    ]
+    return hashlib.sha256(json.dumps(rows, default=str).encode("utf-8")).hexdigest()
+
+
+def _load_readme_state():
+    try:
+        with open(os.path.join(_root(), README_STATE_FILE), encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def update_category_readmes(all_prompts_metadata, dirs=None):
+    """
+    Updates README.md files in each category directory with a list of prompts.
+    If dirs (absolute directory paths) is given, only those READMEs are considered.
+
+    A README's list is only rendered, and the README read and rewritten,
+    when the prompt fields the list shows differ from the last run or the
+    README itself was modified since (tracked in README_STATE_FILE).
+    """
+    emit("Updating category READMEs...")
+    project_root = _root()
+
+    # Group prompts by directory
+    prompts_by_dir = {dir_path: [] for dir_path in dirs or ()}
+    for prompt in all_prompts_metadata:
+        file_path_rel = prompt.get("file_path")
+        if not file_path_rel:
+            continue
+
+        dir_path = os.path.dirname(os.path.join(project_root, file_path_rel))
+        if dirs is not None and dir_path not in dirs:
+            continue
+        if dir_path not in prompts_by_dir:
+            prompts_by_dir[dir_path] = []
+        prompts_by_dir[dir_path].append(prompt)
+
+    # Markers
+    START_MARKER = "<!-- AUTOMATED_PROMPTS_LIST_START -->"
+    END_MARKER = "<!-- AUTOMATED_PROMPTS_LIST_END -->"
+
+    old_state = _load_readme_state()
+    # Directories not considered this run keep their recorded state.
+    new_state = {}
+    if dirs is not None:
+        new_state = {
+            dir_rel: entry
+            for dir_rel, entry in old_state.items()
+            if os.path.join(project_root, dir_rel) not in prompts_by_dir
+        }
+    updated = 0
+    clean = 0
+
+    for dir_path, prompts in prompts_by_dir.items():
+        readme_path = os.path.join(dir_path, "README.md")
+        readme_rel = os.path.relpath(readme_path, project_root)
+        dir_rel = os.path.relpath(dir_path, project_root)
+
+        # Skip if README doesn't exist (we don't create new READMEs, only update existing)
+        try:
+            readme_mtime_ns = os.stat(readme_path).st_mtime_ns
+        except FileNotFoundError:
+            continue
+
+        rows_hash = _prompt_list_hash(prompts)
+        if old_state.get(dir_rel) == [rows_hash, readme_mtime_ns]:
+            new_state[dir_rel] = old_state[dir_rel]
+            clean += 1
+            continue
+
+        # Generate list content
+        list_content = render_prompt_list(prompts)
+        content = _read_text(readme_path)
+
+        # Check for markers
+        start = content.find(START_MARKER)
+        end = content.find(END_MARKER, start) if start != -1 else -1
+        if start != -1 and end != -1:
+            # Replace existing block
+            new_content = "".join(
+                (
+                    content[:start],
+                    START_MARKER,
+                    "\n",
+                    list_content,
+                    content[end:],
+                )
+            )
+        else:
+            # Append markers to the end, with a header unless one exists
+            header = (
+                "\n## Available Prompts\n"
+                if "## Prompts" not in content and "## Available Prompts" not in content
+                else "\n"
+            )
+            new_content = (
+                f"{content}{header}{START_MARKER}\n{list_content}{END_MARKER}\n"
+            )
+
+        if new_content != content:
+            _write_atomic(readme_path, new_content)
+            readme_mtime_ns = os.stat(readme_path).st_mtime_ns
+            updated += 1
+            emit(f"Updated {readme_rel}")
+        else:
+            clean += 1
+            emit(f"No changes needed for {readme_rel}")
+        new_state[dir_rel] = [rows_hash, readme_mtime_ns]
+
+    if new_state != old_state:
+        state_path = os.path.join(project_root, README_STATE_FILE)
+        _write_atomic(state_path, json.dumps(new_state, sort_keys=True))
+    emit(f"READMEs: {updated} updated, {clean} unchanged.")
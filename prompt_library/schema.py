@@ -0,0 +1,362 @@
+"""The front matter schema and per-file checks against it."""
+
+import os
+import re
+
+from .core import emit
+
+# Declarative schema for prompt front matter. "required" and type mismatches
+# are errors (the prompt is left out of the index); "enum", "pattern" and
+# nested item checks report at the field's "severity" (default "warning").
+
+
+PROMPT_SCHEMA = {
+    "id": {
+        "type": "string",
+        "required": True,
+        "pattern": r"^[a-z0-9]+([-_][a-z0-9]+)*$",
+    },
+    "title": {"type": "string", "required": True},
+    "description": {"type": "string", "required": True},
+    "category": {"type": "string", "required": True},
+    "sub_category": {"type": "string"},
+    "tags": {"type": "list", "required": True, "items": {"type": "string"}},
+    "version": {
+        "type": "scalar",
+        "required": True,
+        "pattern": r"^\d+\.\d+\.\d+(-[0-9A-Za-z.-]+)?(\+[0-9A-Za-z.-]+)?$",
+        "pattern_message": "should be a semantic version (MAJOR.MINOR.PATCH)",
+    },
+    "status": {
+        "type": "string",
+        "required": True,
+        "enum": ["active", "draft", "deprecated", "experimental"],
+    },
+    "llm_model_compatibility": {
+        "type": "list",
+        "required": True,
+        "items": {"type": "string"},
+    },
+    "parameters": {
+        "type": "list",
+        "items": {
+            "type": "dict",
+            "fields": {
+                "name": {"type": "string", "required": True},
+                "type": {
+                    "type": "string",
+                    "enum": [
+                        "string",
+                        "number",
+                        "integer",
+                        "boolean",
+                        "array",
+                        "object",
+                    ],
+                },
+                "description": {"type": "string"},
+                "optional": {"type": "bool"},
+            },
+        },
+    },
+    "plan_task": {"type": "string"},
+    "plan_steps": {
+        "type": "list",
+        "items": {
+            "type": "dict",
+            "fields": {
+                "title": {"type": "string", "required": True},
+                "details": {"type": "string"},
+                "agent_name": {"type": "string"},
+            },
+        },
+    },
+}
+
+
+RULE_DESCRIPTIONS = {
+    "required": "Required front matter field is missing",
+    "type": "Front matter field has the wrong type",
+    "enum": "Front matter field has an unexpected value",
+    "pattern": "Front matter field does not match the expected format",
+    "path-category": "category/sub_category do not match the file's location",
+    "front-matter": "File has no valid YAML front matter",
+    "duplicate-id": "Prompt id is used by more than one file",
+    "duplicate-body": "Prompt body is identical to another prompt's",
+    "near-duplicate": "Prompt body is nearly identical to another prompt's",
+    "dangling-agent-reference": "plan_steps agent_name does not match an agent-role prompt",
+}
+
+
+REQUIRED_FIELDS = [name for name, spec in PROMPT_SCHEMA.items() if spec.get("required")]
+
+
+SCHEMA_TYPES = {
+    "string": (str,),
+    "list": (list,),
+    "dict": (dict,),
+    "bool": (bool,),
+    "scalar": (str, int, float),
+}
+
+
+TYPE_MESSAGES = {
+    "string": "should be a string",
+    "list": "should be a list",
+    "dict": "should be a dictionary",
+    "bool": "should be true or false",
+    "scalar": "should be a string",
+}
+
+
+def diagnostic(file_path_rel, rule, message, severity="error", field=None):
+    """
+    Builds one structured validation finding.
+    """
+    return {
+        "file": file_path_rel,
+        "rule": rule,
+        "severity": severity,
+        "field": field,
+        "message": message,
+    }
+
+
+def _compile_field(name, spec, label):
+    """
+    Compiles one field spec into a check(value, file_path_rel, out) closure
+    that appends diagnostics for a present value.
+    """
+    types = SCHEMA_TYPES[spec["type"]]
+    severity = spec.get("severity", "warning")
+    type_message = TYPE_MESSAGES[spec["type"]]
+    if spec["type"] == "list" and spec.get("items", {}).get("type") == "dict":
+        type_message = "should be a list of dictionaries"
+    enum = frozenset(spec["enum"]) if "enum" in spec else None
+    enum_text = ", ".join(spec.get("enum", []))
+    pattern = re.compile(spec["pattern"]).match if "pattern" in spec else None
+    pattern_message = spec.get("pattern_message", f"should match {spec.get('pattern')}")
+    item_check = (
+        _compile_field(name, spec["items"], f"{label}[]") if "items" in spec else None
+    )
+    field_checks = _compile_fields(spec["fields"], label) if "fields" in spec else None
+
+    def check(value, file_path_rel, out):
+        # bool is an int subclass; keep it out of "scalar"
+        if not isinstance(value, types) or (
+            isinstance(value, bool) and bool not in types
+        ):
+            out.append(
+                diagnostic(
+                    file_path_rel,
+                    "type",
+                    f"'{label}' field in {file_path_rel} {type_message}.",
+                    "error",
+                    name,
+                )
+            )
+            return
+        if enum is not None and value not in enum:
+            out.append(
+                diagnostic(
+                    file_path_rel,
+                    "enum",
+                    f"'{label}' in {file_path_rel} is '{value}'; expected one of: {enum_text}.",
+                    severity,
+                    name,
+                )
+            )
+        if pattern is not None and not pattern(str(value)):
+            out.append(
+                diagnostic(
+                    file_path_rel,
+                    "pattern",
+                    f"'{label}' in {file_path_rel} ('{value}') {pattern_message}.",
+                    severity,
+                    name,
+                )
+            )
+        if item_check is not None:
+            for item in value:
+                item_out = []
+                item_check(item, file_path_rel, item_out)
+                # A malformed item is reported at warning level, not as a hard error.
+                for d in item_out:
+                    d["severity"] = "warning"
+                out.extend(item_out)
+        if field_checks is not None:
+            field_checks(value, file_path_rel, out)
+
+    return check
+
+
+def _compile_fields(fields, parent=None):
+    """
+    Compiles a {field: spec} mapping into one check(mapping, file_path_rel, out).
+    """
+    compiled = []
+    for name, spec in fields.items():
+        label = f"{parent}.{name}" if parent else name
+        compiled.append(
+            (
+                name,
+                label,
+                spec.get("required", False),
+                _compile_field(name, spec, label),
+            )
+        )
+
+    def check(mapping, file_path_rel, out):
+        for name, label, required, field_check in compiled:
+            if name in mapping:
+                field_check(mapping[name], file_path_rel, out)
+            elif required:
+                out.append(
+                    diagnostic(
+                        file_path_rel,
+                        "required",
+                        f"'{label}' missing in {file_path_rel}",
+                        "error",
+                        name,
+                    )
+                )
+
+    return check
+
+
+_check_schema = _compile_fields(PROMPT_SCHEMA)
+
+
+def check_prompt_metadata(metadata, file_path_rel):
+    """
+    Validates front matter against PROMPT_SCHEMA and the file's location.
+    Returns a list of diagnostics (see diagnostic()).
+    """
+    out = []
+    _check_schema(metadata, file_path_rel, out)
+    out.extend(path_category_diagnostics(metadata, file_path_rel))
+    return out
+
+
+def has_errors(diagnostics):
+    return any(d["severity"] == "error" for d in diagnostics)
+
+
+def format_diagnostics(diagnostics):
+    return [f"{d['severity'].capitalize()}: {d['message']}" for d in diagnostics]
+
+
+def print_diagnostics(diagnostics):
+    for line in format_diagnostics(diagnostics):
+        emit(line)
+
+
+def validate_front_matter(metadata, file_path_rel):
+    """
+    Validates the extracted front matter for required fields and consistency,
+    printing any findings. Returns True if there are no errors.
+    """
+    diagnostics = check_prompt_metadata(metadata, file_path_rel)
+    print_diagnostics(diagnostics)
+    return not has_errors(diagnostics)
+
+
+def path_category_diagnostics(metadata, file_path_rel):
+    """
+    Checks if metadata 'category' and 'sub_category' align with the file path.
+    Returns a list of diagnostics.
+    """
+    out = []
+    path_parts = file_path_rel.split(os.sep)
+
+    # file_path_rel is like 'category/sub_category/file.md'
+    # so path_parts[0] should be category, path_parts[1] should be sub_category
+
+    # Check primary category
+    if len(path_parts) > 0 and path_parts[0] != metadata.get("category"):
+        out.append(
+            diagnostic(
+                file_path_rel,
+                "path-category",
+                f"Category '{metadata.get('category')}' in metadata does not match "
+                f"first path part '{path_parts[0]}' for {file_path_rel}",
+                field="category",
+            )
+        )
+
+    # Check sub_category if present in metadata and path
+    if "sub_category" in metadata:
+        if len(path_parts) > 1 and path_parts[1] != metadata["sub_category"]:
+            out.append(
+                diagnostic(
+                    file_path_rel,
+                    "path-category",
+                    f"Sub-category '{metadata['sub_category']}' in metadata does not match "
+                    f"second path part '{path_parts[1]}' for {file_path_rel}",
+                    field="sub_category",
+                )
+            )
+        # If sub_category is in metadata but no sub_dir in path (e.g., 'category/file.md')
+        elif len(path_parts) <= 1 or (
+            len(path_parts) > 1 and path_parts[1].endswith(".md")
+        ):
+            out.append(
+                diagnostic(
+                    file_path_rel,
+                    "path-category",
+                    f"Sub-category '{metadata['sub_category']}' in metadata found, "
+                    f"but no corresponding sub-directory in path for {file_path_rel}",
+                    field="sub_category",
+                )
+            )
+    # If sub_directory is in path but no sub_category in metadata (and it's not a root file like README)
+    elif len(path_parts) > 1 and not path_parts[1].endswith(".md"):
+        out.append(
+            diagnostic(
+                file_path_rel,
+                "path-category",
+                f"Sub-directory '{path_parts[1]}' found in path, but no 'sub_category' "
+                f"in metadata for {file_path_rel}. Consider adding 'sub_category'.",
+            )
+        )
+
+    return out
+
+
+def check_path_category_consistency(metadata, file_path_rel):
+    """
+    Checks if metadata 'category' and 'sub_category' align with the file path.
+    Returns True if consistent, False otherwise.
+    """
+    diagnostics = path_category_diagnostics(metadata, file_path_rel)
+    print_diagnostics(diagnostics)
+    return not diagnostics
+
+
+def check_unique_ids(all_prompts_metadata):
+    """
+    Checks for unique 'id' values across all collected prompt metadata.
+    Returns True if all IDs are unique, False otherwise.
+    """
+    ids = {}
+    is_unique = True
+    for meta in all_prompts_metadata:
+        prompt_id = meta.get("id")
+        file_path = meta.get("file_path", "unknown_file")
+        if prompt_id:
+            if prompt_id in ids:
+                emit(
+                    f"Error: Duplicate ID '{prompt_id}' found. "
+                    f"First instance in {ids[prompt_id]}, duplicate in {file_path}"
+                )
+                is_unique = False
+            else:
+                ids[prompt_id] = file_path
+        else:
+            # This case is already covered by REQUIRED_FIELDS check, but good to note.
+            emit(
+                f"Error: Prompt in {file_path} is missing an 'id'. Cannot check for uniqueness."
+            )
+            is_unique = False  # If ID is missing, it's not uniquely identifiable
+
+    return is_unique
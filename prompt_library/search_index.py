@@ -0,0 +1,442 @@
+"""The BM25 inverted search index and keyword search."""
+
+import bisect
+import hashlib
+import json
+import math
+import os
+
+from .core import METADATA_DIR, _field_text, _read_text, _root, emit, tokenize
+from .facets import (
+    SEARCH_FACETS,
+    _bitmap,
+    _facet_values,
+    build_facet_postings,
+    facet_bitmaps,
+    facet_counts,
+    filter_bitmap,
+)
+from .manifest import _index_metadata
+from .prompt_index import _patch_positions, load_prompt_index
+from .semantic import _semantic_matches, load_semantic_index
+
+# Precomputed inverted index used by `search`; rebuilt by `index`.
+SEARCH_INDEX_FILE = os.path.join(METADATA_DIR, "search_index.json")
+SEARCH_INDEX_VERSION = 3
+# Per-field weights for BM25F-style scoring.
+SEARCH_FIELD_WEIGHTS = {
+    "id": 3.0,
+    "title": 3.0,
+    "tags": 2.0,
+    "category": 1.0,
+    "sub_category": 1.0,
+    "description": 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _search_doc(prompt):
+    """
+    Returns (doc, doc_len, weighted_tf) for one prompt: its result summary,
+    its field-weighted length and the field-weighted frequency of each token.
+    """
+    doc = {
+        "id": prompt.get("id"),
+        "title": prompt.get("title"),
+        "file_path": prompt.get("file_path"),
+        "description": prompt.get("description"),
+        "tags": prompt.get("tags", []),
+    }
+    weighted_tf = {}
+    doc_len = 0.0
+    for field, weight in SEARCH_FIELD_WEIGHTS.items():
+        tokens = tokenize(_field_text(prompt, field))
+        doc_len += weight * len(tokens)
+        for token in tokens:
+            weighted_tf[token] = weighted_tf.get(token, 0.0) + weight
+    return doc, doc_len, weighted_tf
+
+
+def build_search_index(all_prompts_metadata):
+    """
+    Builds an inverted index over the weighted fields in SEARCH_FIELD_WEIGHTS.
+    Postings store the field-weighted term frequency per document; facet
+    postings list the documents per SEARCH_FACETS value.
+    """
+    docs = []
+    doc_lens = []
+    postings = {}
+    for doc_id, prompt in enumerate(all_prompts_metadata):
+        doc, doc_len, weighted_tf = _search_doc(prompt)
+        docs.append(doc)
+        doc_lens.append(doc_len)
+        for token, tf in weighted_tf.items():
+            postings.setdefault(token, [[], []])
+            postings[token][0].append(doc_id)
+            postings[token][1].append(tf)
+
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "fields": SEARCH_FIELD_WEIGHTS,
+        "avg_len": (sum(doc_lens) / len(doc_lens)) if doc_lens else 0.0,
+        "doc_lens": doc_lens,
+        "docs": docs,
+        "postings": dict(sorted(postings.items())),
+        "facets": build_facet_postings(all_prompts_metadata),
+    }
+
+
+def _remove_doc_id(lists, doc_id):
+    """
+    Removes doc_id from sorted id lists ([ids] or [ids, values] pairs kept in
+    step). Returns False if it is not there.
+    """
+    ids = lists[0]
+    i = bisect.bisect_left(ids, doc_id)
+    if i == len(ids) or ids[i] != doc_id:
+        return False
+    for values in lists:
+        del values[i]
+    return True
+
+
+def patch_search_index(index, all_prompts_metadata, previous):
+    """
+    Updates a search index built by build_search_index() in place so that it
+    matches all_prompts_metadata, re-indexing only the documents of the paths
+    in previous. previous maps those paths to the manifest entries the index
+    was built from. Returns False if the index does not line up with them.
+    """
+    if index.get("fields") != SEARCH_FIELD_WEIGHTS:
+        return False
+    docs = index["docs"]
+    doc_lens = index["doc_lens"]
+    postings = index["postings"]
+    facets = index["facets"]
+    old_paths = [doc["file_path"] for doc in docs]
+    positions = _patch_positions(
+        old_paths, [prompt["file_path"] for prompt in all_prompts_metadata], previous
+    )
+    if positions is None:
+        return False
+    removed, added = positions
+
+    for doc_id in removed:
+        entry = previous[old_paths[doc_id]]
+        if not entry or not entry["metadata"]:
+            return False
+        prompt = _index_metadata(old_paths[doc_id], entry)
+        for token in _search_doc(prompt)[2]:
+            if not _remove_doc_id(postings.get(token, [[]]), doc_id):
+                return False
+            if not postings[token][0]:
+                del postings[token]
+        for field in SEARCH_FACETS:
+            for value in _facet_values(prompt, field):
+                if not _remove_doc_id([facets[field].get(value, [])], doc_id):
+                    return False
+                if not facets[field][value]:
+                    del facets[field][value]
+        del docs[doc_id]
+        del doc_lens[doc_id]
+
+    # Renumber the remaining documents from the first one that moved.
+    removed_ids = set(removed)
+    added_ids = set(added)
+    kept_old = [i for i in range(len(old_paths)) if i not in removed_ids]
+    kept_new = [i for i in range(len(all_prompts_metadata)) if i not in added_ids]
+    remap = dict(zip(kept_old, kept_new, strict=True))
+    moved = [old_id for old_id, new_id in remap.items() if old_id != new_id]
+    if moved:
+        id_lists = [ids for ids, _ in postings.values()]
+        id_lists += [ids for values in facets.values() for ids in values.values()]
+        for ids in id_lists:
+            start = bisect.bisect_left(ids, moved[0])
+            ids[start:] = [remap[doc_id] for doc_id in ids[start:]]
+
+    new_terms = False
+    resort = set()
+    for doc_id in added:
+        prompt = all_prompts_metadata[doc_id]
+        doc, doc_len, weighted_tf = _search_doc(prompt)
+        docs.insert(doc_id, doc)
+        doc_lens.insert(doc_id, doc_len)
+        for token, tf in weighted_tf.items():
+            if token not in postings:
+                postings[token] = [[], []]
+                new_terms = True
+            ids, tfs = postings[token]
+            i = bisect.bisect_left(ids, doc_id)
+            ids.insert(i, doc_id)
+            tfs.insert(i, tf)
+        for field in SEARCH_FACETS:
+            for value in _facet_values(prompt, field):
+                if value not in facets[field]:
+                    facets[field][value] = []
+                    resort.add(field)
+                bisect.insort(facets[field][value], doc_id)
+
+    if new_terms:
+        index["postings"] = dict(sorted(postings.items()))
+    for field in resort:
+        facets[field] = dict(sorted(facets[field].items()))
+    index["avg_len"] = (sum(doc_lens) / len(doc_lens)) if doc_lens else 0.0
+    return True
+
+
+def write_search_index(
+    all_prompts_metadata, index_content, base_sha256=None, previous=None
+):
+    """
+    Writes the inverted search index next to prompt_index.yaml (only if changed).
+    source_sha256 ties it to the YAML it was built with.
+
+    When the existing file was built from the index whose YAML hashes to
+    base_sha256, only the documents of the paths in previous (see
+    patch_search_index()) are re-indexed.
+    """
+    index_path = os.path.join(_root(), SEARCH_INDEX_FILE)
+    old_content = _read_text(index_path)
+    index = None
+    if base_sha256 is not None and old_content is not None:
+        try:
+            index = json.loads(old_content)
+        except ValueError:
+            index = None
+        if (
+            not index
+            or index.get("version") != SEARCH_INDEX_VERSION
+            or index.get("source_sha256") != base_sha256
+            or not patch_search_index(index, all_prompts_metadata, previous)
+        ):
+            index = None
+    if index is None:
+        index = build_search_index(all_prompts_metadata)
+    index["source_sha256"] = hashlib.sha256(index_content.encode("utf-8")).hexdigest()
+    content = json.dumps(index, separators=(",", ":"))
+    if old_content == content:
+        return
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, index_path)
+    emit(f"Updated {os.path.relpath(index_path, _root())}")
+
+
+def _prepare_search_index(index):
+    """
+    Adds the query-time lookups derived from a built search index.
+    """
+    index["terms"] = list(index["postings"])
+    index["facet_bitmaps"] = facet_bitmaps(index["facets"])
+    return index
+
+
+_search_index_cache = {}
+
+
+def load_search_index():
+    """
+    Loads the inverted search index, reusing the parsed copy while the file is
+    unchanged. Facet postings are turned into int bitmaps once, on load.
+    Returns None if it is missing or outdated.
+    """
+    index_path = os.path.join(_root(), SEARCH_INDEX_FILE)
+    try:
+        mtime_ns = os.stat(index_path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _search_index_cache.get(index_path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != SEARCH_INDEX_VERSION:
+        return None
+    _prepare_search_index(index)
+    _search_index_cache[index_path] = (mtime_ns, index)
+    return index
+
+
+def _expand_term(index, token):
+    """
+    Returns the indexed terms a query token matches: the exact term if present,
+    otherwise every term it is a prefix of.
+    """
+    if token in index["postings"]:
+        return [token]
+    terms = index["terms"]
+    start = bisect.bisect_left(terms, token)
+    matches = []
+    for term in terms[start:]:
+        if not term.startswith(token):
+            break
+        matches.append(term)
+    return matches
+
+
+def rank_prompts(index, query):
+    """
+    Scores documents against query with BM25 over field-weighted term
+    frequencies. Every query token must match (AND semantics).
+    Returns a list of (score, doc_id) sorted by descending score.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    n_docs = len(index["docs"])
+    avg_len = index["avg_len"] or 1.0
+    doc_lens = index["doc_lens"]
+    scores = None
+
+    for token in dict.fromkeys(tokens):
+        token_scores = {}
+        for term in _expand_term(index, token):
+            doc_ids, tfs = index["postings"][term]
+            df = len(doc_ids)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in zip(doc_ids, tfs, strict=True):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lens[doc_id] / avg_len)
+                score = idf * tf * (BM25_K1 + 1) / (tf + norm)
+                if score > token_scores.get(doc_id, 0.0):
+                    token_scores[doc_id] = score
+        if scores is None:
+            scores = token_scores
+        else:
+            scores = {
+                doc_id: score + token_scores[doc_id]
+                for doc_id, score in scores.items()
+                if doc_id in token_scores
+            }
+        if not scores:
+            return []
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(score, doc_id) for doc_id, score in ranked]
+
+
+def _scan_prompts(all_prompts, query):
+    """
+    Linear substring scan over the prompt index; used when no search index exists.
+    Returns (None, doc_id) pairs in index order.
+    """
+    query = query.lower()
+    matches = []
+
+    for doc_id, prompt in enumerate(all_prompts):
+        # Check text fields
+        searchable_text = (
+            f"{prompt.get('id', '')} "
+            f"{prompt.get('title', '')} "
+            f"{prompt.get('description', '')} "
+            f"{prompt.get('category', '')} "
+            f"{prompt.get('sub_category', '')}"
+        ).lower()
+
+        # Check tags
+        tags = [t.lower() for t in prompt.get("tags", [])]
+
+        if query in searchable_text or any(query in t for t in tags):
+            matches.append((None, doc_id))
+    return matches
+
+
+def find_prompts(
+    query,
+    top_k=10,
+    page=1,
+    search_index=None,
+    all_prompts=None,
+    semantic=False,
+    filters=None,
+):
+    """
+    Returns one page of ranked matches for query as a dict with 'query',
+    'total', 'page', 'results' (each result is a doc dict plus 'score'),
+    'semantic' and 'facets' (per SEARCH_FACETS value, the number of matches).
+    Uses the given or on-disk search index (BM25), falling back to a substring
+    scan of the prompt index; with semantic=True the semantic index is used
+    when available. filters ({field: [values]}, see filter_bitmap()) restrict
+    the matches; an empty query matches every prompt.
+    Raises FileNotFoundError if nothing is indexed.
+    """
+    if search_index is None and all_prompts is None:
+        search_index = load_search_index()
+    if search_index is not None:
+        docs = search_index["docs"]
+        bitmaps = search_index["facet_bitmaps"]
+    else:
+        if all_prompts is None:
+            all_prompts = load_prompt_index()
+        docs = all_prompts
+        bitmaps = facet_bitmaps(build_facet_postings(all_prompts))
+    allowed = filter_bitmap(bitmaps, filters)
+    start = max(page - 1, 0) * top_k
+
+    semantic_index = load_semantic_index() if semantic and tokenize(query) else None
+    if semantic_index is not None:
+        hits, matched = _semantic_matches(
+            semantic_index, query, start + top_k, docs, allowed
+        )
+    else:
+        if not tokenize(query):
+            ranked = [(None, doc_id) for doc_id in range(len(docs))]
+        elif search_index is not None:
+            ranked = rank_prompts(search_index, query)
+        else:
+            ranked = _scan_prompts(all_prompts, query)
+        if allowed is not None:
+            mask = allowed.to_bytes(len(docs) // 8 + 1, "little")
+            ranked = [(score, i) for score, i in ranked if mask[i >> 3] >> (i & 7) & 1]
+        hits = [(score, docs[i]) for score, i in ranked[: start + top_k]]
+        matched = [i for _, i in ranked]
+
+    results = [{**doc, "score": score} for score, doc in hits[start:]]
+    return {
+        "query": query,
+        "total": len(matched),
+        "page": page,
+        "results": results,
+        "semantic": semantic_index is not None,
+        "facets": facet_counts(bitmaps, _bitmap(matched)),
+    }
+
+
+def format_search_results(found, top_k=10):
+    """
+    Renders a find_prompts() result as the text printed by the search command.
+    """
+    subject = f" for '{found['query']}'" if found["query"] else ""
+    lines = [f"\nFound {found['total']} matches{subject}:\n"]
+    start = max(found["page"] - 1, 0) * top_k
+    if found["results"]:
+        lines.append(
+            f"Showing {start + 1}-{start + len(found['results'])} (page {found['page']})\n"
+        )
+    elif found["total"]:
+        lines.append(f"No results on page {found['page']}.")
+    for p in found["results"]:
+        lines.append(f"ID:          {p.get('id')}")
+        lines.append(f"Title:       {p.get('title')}")
+        lines.append(f"Path:        {p.get('file_path')}")
+        lines.append(f"Description: {p.get('description')}")
+        lines.append(f"Tags:        {', '.join(p.get('tags', []))}")
+        if p.get("score") is not None:
+            lines.append(f"Score:       {p['score']:.3f}")
+        lines.append("-" * 40)
+    facets = {
+        field: counts for field, counts in found.get("facets", {}).items() if counts
+    }
+    if facets:
+        lines.append("\nFacets:")
+        for field, counts in facets.items():
+            shown = ", ".join(
+                f"{value} ({count})" for value, count in list(counts.items())[:10]
+            )
+            more = f", +{len(counts) - 10} more" if len(counts) > 10 else ""
+            lines.append(f"  {field}: {shown}{more}")
+    return "\n".join(lines)
@@ -0,0 +1,363 @@
+"""Optional semantic index: prompt embeddings searched through IVF lists."""
+
+import json
+import math
+import os
+import zlib
+from collections import Counter
+
+from .core import METADATA_DIR, _field_text, _root, _write_atomic, emit, tokenize
+from .facets import _bitmap_ids
+from .frontmatter import read_prompt_body
+
+try:
+    import numpy as np
+except ImportError:  # Only needed for the optional semantic index.
+    np = None
+
+# A float32 embedding matrix that is memory-mapped at query time, partitioned
+# into inverted lists (IVF) around k-means centroids; a query only scores the
+# rows of its closest lists.
+SEMANTIC_INDEX_FILE = os.path.join(METADATA_DIR, "semantic_index.json")
+SEMANTIC_VECTORS_FILE = os.path.join(METADATA_DIR, "semantic_vectors.f32")
+SEMANTIC_CENTROIDS_FILE = os.path.join(METADATA_DIR, "semantic_centroids.f32")
+SEMANTIC_LISTS_FILE = os.path.join(METADATA_DIR, "semantic_lists.i32")
+SEMANTIC_INDEX_VERSION = 1
+SEMANTIC_MODEL = "hashed-tfidf"
+SEMANTIC_DIM = 512
+SEMANTIC_NPROBE = 8
+# Libraries up to this size are scored exhaustively instead of through IVF.
+SEMANTIC_EXACT_LIMIT = 5000
+
+
+class HashedTfidfEmbedder:
+    """
+    Offline embedding model: word tokens and their character trigrams are
+    hashed into `dim` signed buckets, weighted by sublinear TF and smoothed
+    IDF, and L2-normalized, so cosine similarity is a dot product.
+
+    Models registered in EMBEDDING_MODELS provide the same interface: fit(texts)
+    and embed(texts) return float32 matrices, state() returns JSON-safe data
+    and from_state(state) restores a fitted model.
+    """
+
+    name = "hashed-tfidf"
+
+    def __init__(self, dim=SEMANTIC_DIM, idf=None):
+        self.dim = dim
+        self.idf = (
+            np.ones(dim, np.float32) if idf is None else np.asarray(idf, np.float32)
+        )
+        self._slots = {}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["dim"], state["idf"])
+
+    def state(self):
+        return {"dim": self.dim, "idf": self.idf.tolist()}
+
+    def _features(self, word):
+        """
+        Returns the hashed (bucket, sign) features of a word and its trigrams.
+        """
+        features = self._slots.get(word)
+        if features is None:
+            padded = f"#{word}#"
+            grams = [word] + [padded[i : i + 3] for i in range(len(padded) - 2)]
+            features = []
+            for gram in grams:
+                h = zlib.crc32(gram.encode("utf-8"))
+                features.append((h % self.dim, -1.0 if h & 0x80000000 else 1.0, gram))
+            self._slots[word] = features
+        return features
+
+    def _term_frequencies(self, texts):
+        matrix = np.zeros((len(texts), self.dim), np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            slots = {}
+            for word, n in Counter(tokenize(text)).items():
+                for bucket, sign, gram in self._features(word):
+                    counts[gram] = counts.get(gram, 0) + n
+                    slots[gram] = (bucket, sign)
+            if not counts:
+                continue
+            matrix[row] = np.bincount(
+                [slots[gram][0] for gram in counts],
+                weights=[
+                    slots[gram][1] * (1.0 + math.log(n)) for gram, n in counts.items()
+                ],
+                minlength=self.dim,
+            )
+        return matrix
+
+    def _normalize(self, matrix):
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    def fit(self, texts):
+        matrix = self._term_frequencies(texts)
+        df = np.count_nonzero(matrix, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        return self._normalize(matrix)
+
+    def embed(self, texts):
+        return self._normalize(self._term_frequencies(texts))
+
+
+EMBEDDING_MODELS = {HashedTfidfEmbedder.name: HashedTfidfEmbedder}
+
+
+def _semantic_text(prompt, body):
+    return " ".join(
+        [_field_text(prompt, field) for field in ("title", "description", "tags")]
+        + [body]
+    )
+
+
+def _train_centroids(vectors, seed=0, iterations=10):
+    """
+    Spherical k-means over a sample of the rows, giving about sqrt(n) inverted
+    lists for the approximate nearest-neighbour lookup.
+    """
+    rng = np.random.default_rng(seed)
+    n_lists = max(1, int(math.sqrt(len(vectors))))
+    sample = vectors[
+        rng.choice(len(vectors), min(len(vectors), n_lists * 40), replace=False)
+    ]
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        for i in range(n_lists):
+            total = sample[assignments == i].sum(axis=0)
+            norm = np.linalg.norm(total)
+            if norm > 0:
+                centroids[i] = total / norm
+    return centroids
+
+
+def _assign_lists(vectors, centroids):
+    if not len(centroids):
+        return np.zeros(len(vectors), np.int32)
+    return np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+
+
+def _write_array_atomic(path, array_):
+    tmp_path = f"{path}.tmp"
+    array_.tofile(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_semantic_index(all_prompts_metadata, manifest, full=False):
+    """
+    Builds the semantic index when numpy is installed: a float32 matrix of
+    prompt embeddings (title, description, tags and body), an inverted-file
+    (IVF) partition of its rows for approximate nearest-neighbour lookup, and
+    a JSON header. Rows of prompts whose file hash is unchanged are reused and
+    new rows join the nearest existing list; the model and the lists are only
+    refit on a first or full build. Returns True if anything was written.
+    """
+    if np is None:
+        return False
+    keys = [
+        [p["file_path"], manifest[p["file_path"]]["sha256"]]
+        for p in all_prompts_metadata
+    ]
+    old = None if full else load_semantic_index()
+    if old is not None and old["model_name"] != SEMANTIC_MODEL:
+        old = None
+    if old is not None and old["keys"] == keys:
+        return False
+
+    def texts(prompts):
+        return [
+            _semantic_text(p, read_prompt_body(os.path.join(_root(), p["file_path"])))
+            for p in prompts
+        ]
+
+    if old is None or not len(old["centroids"]):
+        model = EMBEDDING_MODELS[SEMANTIC_MODEL]()
+        vectors = model.fit(texts(all_prompts_metadata))
+        centroids = (
+            _train_centroids(vectors)
+            if len(vectors)
+            else np.empty((0, model.dim), np.float32)
+        )
+        lists = _assign_lists(vectors, centroids)
+    else:
+        model = old["model"]
+        centroids = np.array(old["centroids"])
+        old_rows = {tuple(key): row for row, key in enumerate(old["keys"])}
+        reused = [
+            (row, old_rows[tuple(key)])
+            for row, key in enumerate(keys)
+            if tuple(key) in old_rows
+        ]
+        stale = [row for row, key in enumerate(keys) if tuple(key) not in old_rows]
+        vectors = np.empty((len(keys), model.dim), np.float32)
+        lists = np.empty(len(keys), np.int32)
+        if reused:
+            new_rows, previous = (list(column) for column in zip(*reused, strict=True))
+            vectors[new_rows] = old["vectors"][previous]
+            lists[new_rows] = old["lists"][previous]
+        if stale:
+            vectors[stale] = model.embed(
+                texts([all_prompts_metadata[row] for row in stale])
+            )
+            lists[stale] = _assign_lists(vectors[stale], centroids)
+
+    header = {
+        "version": SEMANTIC_INDEX_VERSION,
+        "model": {"name": SEMANTIC_MODEL, "state": model.state()},
+        "lists": len(centroids),
+        "keys": keys,
+        "docs": [
+            {
+                "id": p.get("id"),
+                "title": p.get("title"),
+                "file_path": p.get("file_path"),
+                "description": p.get("description"),
+                "tags": p.get("tags", []),
+            }
+            for p in all_prompts_metadata
+        ],
+    }
+    _write_array_atomic(os.path.join(_root(), SEMANTIC_VECTORS_FILE), vectors)
+    _write_array_atomic(os.path.join(_root(), SEMANTIC_CENTROIDS_FILE), centroids)
+    _write_array_atomic(os.path.join(_root(), SEMANTIC_LISTS_FILE), lists)
+    _write_atomic(os.path.join(_root(), SEMANTIC_INDEX_FILE), json.dumps(header))
+    emit(f"Updated {SEMANTIC_INDEX_FILE} ({len(keys)} prompts).")
+    return True
+
+
+_semantic_index_cache = {}
+
+
+def load_semantic_index():
+    """
+    Loads the semantic index with its vectors memory-mapped, reusing the loaded
+    copy while the header is unchanged. Returns None if numpy is missing or
+    the index is missing, outdated or inconsistent.
+    """
+    if np is None:
+        return None
+    header_path = os.path.join(_root(), SEMANTIC_INDEX_FILE)
+    try:
+        mtime_ns = os.stat(header_path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _semantic_index_cache.get(header_path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    try:
+        with open(header_path, encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("version") != SEMANTIC_INDEX_VERSION:
+            return None
+        model = EMBEDDING_MODELS[header["model"]["name"]].from_state(
+            header["model"]["state"]
+        )
+        rows = len(header["keys"])
+        vectors_path = os.path.join(_root(), SEMANTIC_VECTORS_FILE)
+        if os.path.getsize(vectors_path) != rows * model.dim * 4:
+            return None
+        vectors = (
+            np.memmap(vectors_path, np.float32, "r", shape=(rows, model.dim))
+            if rows
+            else np.empty((0, model.dim), np.float32)
+        )
+        centroids = np.fromfile(
+            os.path.join(_root(), SEMANTIC_CENTROIDS_FILE), np.float32
+        )
+        centroids = centroids.reshape(header["lists"], model.dim)
+        lists = np.fromfile(os.path.join(_root(), SEMANTIC_LISTS_FILE), np.int32)
+    except (OSError, ValueError, KeyError):
+        return None
+    if len(lists) != rows:
+        return None
+    order = np.argsort(lists, kind="stable")
+    index = {
+        "model_name": header["model"]["name"],
+        "model": model,
+        "keys": header["keys"],
+        "docs": header["docs"],
+        "vectors": vectors,
+        "centroids": centroids,
+        "lists": lists,
+        "order": order,
+        "bounds": np.searchsorted(lists[order], np.arange(len(centroids) + 1)),
+    }
+    _semantic_index_cache[header_path] = (mtime_ns, index)
+    return index
+
+
+def _ivf_candidates(index, query_vector):
+    """
+    Returns the rows of the SEMANTIC_NPROBE lists whose centroids are closest
+    to the query.
+    """
+    centroid_scores = index["centroids"] @ query_vector
+    if len(centroid_scores) > SEMANTIC_NPROBE:
+        probes = np.argpartition(-centroid_scores, SEMANTIC_NPROBE - 1)[
+            :SEMANTIC_NPROBE
+        ]
+    else:
+        probes = np.arange(len(centroid_scores))
+    order, bounds = index["order"], index["bounds"]
+    return np.sort(np.concatenate([order[bounds[i] : bounds[i + 1]] for i in probes]))
+
+
+def rank_semantic(index, query, limit, mask=None):
+    """
+    Scores prompts against query by cosine similarity, over the rows allowed
+    by the boolean mask when given. Small libraries are scored exhaustively;
+    larger ones only over the rows of the closest IVF lists, unless too few
+    are found. Returns (scores, rows, matched): the best `limit` rows with
+    positive scores, best first, and every row that scored above zero.
+    """
+    query_vector = index["model"].embed([query])[0]
+    vectors = index["vectors"]
+    rows = None
+    if len(vectors) > SEMANTIC_EXACT_LIMIT:
+        rows = _ivf_candidates(index, query_vector)
+        if mask is not None:
+            rows = rows[mask[rows]]
+        if len(rows) < limit:
+            rows = None
+    if rows is None:
+        rows = np.arange(len(vectors)) if mask is None else np.flatnonzero(mask)
+    scores = vectors[rows] @ query_vector
+    keep = scores > 0
+    rows, scores = rows[keep], scores[keep]
+    top = np.arange(len(scores))
+    if len(scores) > limit > 0:
+        top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.lexsort((rows[top], -scores[top]))][:limit]
+    return scores[top], rows[top], rows
+
+
+def _semantic_matches(index, query, limit, docs, allowed):
+    """
+    Runs rank_semantic() for find_prompts(), translating between semantic
+    index rows and the doc ids of docs (matched by file path).
+    Returns ([(score, doc)] for the best `limit` rows, matched doc ids).
+    """
+    paths = [key[0] for key in index["keys"]]
+    mask = None
+    if allowed is not None:
+        allowed_paths = {docs[i]["file_path"] for i in _bitmap_ids(allowed)}
+        mask = np.fromiter((path in allowed_paths for path in paths), bool, len(paths))
+    scores, rows, matched_rows = rank_semantic(index, query, limit, mask)
+    doc_ids = {doc["file_path"]: i for i, doc in enumerate(docs)}
+    matched = [
+        doc_ids[paths[row]] for row in matched_rows.tolist() if paths[row] in doc_ids
+    ]
+    hits = [
+        (float(score), index["docs"][row])
+        for score, row in zip(scores, rows, strict=True)
+    ]
+    return hits, matched
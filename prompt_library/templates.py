@@ -0,0 +1,109 @@
+"""Prompt bodies as cached templates with {{name}} placeholders."""
+
+import hashlib
+import os
+import re
+from collections import OrderedDict
+
+from .core import _root
+from .frontmatter import read_prompt_body
+
+# {{name}} placeholders substituted by `render`.
+PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+TEMPLATE_CACHE_SIZE = 256
+
+
+class PromptTemplate:
+    """
+    A prompt body split once into literal text and {{name}} placeholders, so
+    rendering is a single join.
+    """
+
+    __slots__ = ("body", "segments", "placeholders")
+
+    def __init__(self, body):
+        self.body = body
+        segments = []
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(body):
+            segments.append((body[pos : match.start()], match.group(1), match.group(0)))
+            pos = match.end()
+        segments.append((body[pos:], None, ""))
+        self.segments = tuple(segments)
+        self.placeholders = frozenset(name for _, name, _ in segments if name)
+
+    def render(self, values):
+        """
+        Substitutes values by placeholder name; unknown placeholders are kept.
+        """
+        parts = []
+        for literal, name, raw in self.segments:
+            parts.append(literal)
+            if name is not None:
+                parts.append(values.get(name, raw))
+        return "".join(parts)
+
+
+_file_hashes = {}
+_template_cache = OrderedDict()
+
+
+def load_prompt_template(file_path_rel):
+    """
+    Returns the PromptTemplate for a prompt file. Templates are kept in an LRU
+    keyed on the file's content hash; the hash itself is reused while the
+    file's mtime and size are unchanged, so a warm lookup is a single stat.
+    """
+    file_path_abs = os.path.join(_root(), file_path_rel)
+    st = os.stat(file_path_abs)
+    known = _file_hashes.get(file_path_abs)
+    if known and known[0] == (st.st_mtime_ns, st.st_size):
+        template = _template_cache.get(known[1])
+        if template is not None:
+            _template_cache.move_to_end(known[1])
+            return template
+
+    with open(file_path_abs, "rb") as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+    _file_hashes[file_path_abs] = ((st.st_mtime_ns, st.st_size), content_hash)
+    template = _template_cache.get(content_hash)
+    if template is None:
+        template = PromptTemplate(read_prompt_body(file_path_abs))
+        _template_cache[content_hash] = template
+        if len(_template_cache) > TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+    else:
+        _template_cache.move_to_end(content_hash)
+    return template
+
+
+def _format_param_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "" if value is None else str(value)
+
+
+def resolve_parameters(declared, params):
+    """
+    Resolves the values to substitute for a prompt's declared `parameters`:
+    given values win, then `default`, and `optional: true` parameters fall back
+    to an empty string. Raises ValueError listing missing required parameters.
+    Values for undeclared names are passed through unchanged.
+    """
+    values = {name: _format_param_value(value) for name, value in params.items()}
+    missing = []
+    for param in declared or []:
+        if not isinstance(param, dict) or "name" not in param:
+            continue
+        name = param["name"]
+        if name in values:
+            continue
+        if "default" in param:
+            values[name] = _format_param_value(param["default"])
+        elif param.get("optional"):
+            values[name] = ""
+        else:
+            missing.append(name)
+    if missing:
+        raise ValueError(f"Missing required parameter(s): {', '.join(missing)}")
+    return values
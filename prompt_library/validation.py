@@ -0,0 +1,172 @@
+"""Validating prompt files without indexing them, and SARIF output."""
+
+import os
+import subprocess
+
+from .analysis import analyze_prompt_library
+from .core import _is_prompt_path, _root, _walk_order_key, iter_prompt_files
+from .manifest import _process_prompt_files, load_manifest
+from .schema import RULE_DESCRIPTIONS, diagnostic, has_errors
+
+
+def validate_prompt_files(paths=None, jobs=1):
+    """
+    Validates prompt files (all of them, or only the given relative paths)
+    against the schema, in a process pool when jobs > 1. Duplicate ids are
+    checked against the rest of the library via the manifest, so validating a
+    handful of changed files still catches collisions; the same goes for the
+    cross-prompt checks of analyze_prompt_library().
+    Returns {file_path_rel: {"valid": bool, "diagnostics": [...], "messages": [...]}}.
+    """
+    manifest = load_manifest()
+    project_root = _root()
+    if paths is None:
+        targets = list(iter_prompt_files())
+    else:
+        targets = [
+            (os.path.join(project_root, rel), rel)
+            for rel in sorted(set(paths), key=_walk_order_key)
+            if _is_prompt_path(rel) and os.path.isfile(os.path.join(project_root, rel))
+        ]
+    tasks = [
+        (abs_path, rel, manifest.get(rel), False, None) for abs_path, rel in targets
+    ]
+    results = _process_prompt_files(tasks, jobs)
+
+    target_paths = {rel for _, rel in targets}
+    # Entries of renamed or deleted files would clash with their new copies,
+    # both as duplicate ids and as duplicate or near-duplicate bodies.
+    present = {
+        rel: entry
+        for rel, entry in manifest.items()
+        if rel in target_paths or os.path.isfile(os.path.join(project_root, rel))
+    }
+    ids = {}
+    for rel, entry in present.items():
+        if rel not in target_paths and entry.get("metadata"):
+            ids.setdefault(entry["metadata"].get("id"), rel)
+
+    library = dict(present) if paths is not None else {}
+    for task, result in zip(tasks, results, strict=True):
+        library[task[1]] = result[0]
+    cross = {}
+    for d in analyze_prompt_library(library, target_paths):
+        cross.setdefault(d["file"], []).append(d)
+
+    report = {}
+    for task, (_, metadata, diagnostics, _, messages) in zip(
+        tasks, results, strict=True
+    ):
+        rel = task[1]
+        diagnostics.extend(cross.get(rel, ()))
+        prompt_id = metadata.get("id") if metadata else None
+        if prompt_id is not None:
+            if prompt_id in ids and ids[prompt_id] != rel:
+                diagnostics.append(
+                    diagnostic(
+                        rel,
+                        "duplicate-id",
+                        f"Duplicate ID '{prompt_id}' found. First instance in "
+                        f"{ids[prompt_id]}, duplicate in {rel}",
+                        field="id",
+                    )
+                )
+            ids.setdefault(prompt_id, rel)
+        report[rel] = {
+            "valid": metadata is not None and not has_errors(diagnostics),
+            "diagnostics": diagnostics,
+            "messages": messages,
+        }
+    return report
+
+
+def _front_matter_key_lines(file_path_abs):
+    """
+    Returns {top-level key: line number} for a file's front matter.
+    """
+    lines = {}
+    with open(file_path_abs, encoding="utf-8") as f:
+        in_block = False
+        for number, line in enumerate(f, start=1):
+            if line.strip() == "---":
+                if in_block:
+                    break
+                in_block = True
+                continue
+            if in_block and line[:1] not in (" ", "\t", "-", "#") and ":" in line:
+                lines.setdefault(line.split(":", 1)[0].strip(), number)
+    return lines
+
+
+def to_sarif(report):
+    """
+    Converts a validate_prompt_files() report into a SARIF 2.1.0 log.
+    """
+    rules = {}
+    results = []
+    for rel, file_report in report.items():
+        key_lines = None
+        for d in file_report["diagnostics"]:
+            rules.setdefault(
+                d["rule"],
+                {
+                    "id": d["rule"],
+                    "shortDescription": {
+                        "text": RULE_DESCRIPTIONS.get(d["rule"], d["rule"])
+                    },
+                },
+            )
+            if key_lines is None:
+                try:
+                    key_lines = _front_matter_key_lines(os.path.join(_root(), rel))
+                except OSError:
+                    key_lines = {}
+            results.append(
+                {
+                    "ruleId": d["rule"],
+                    "level": d["severity"],
+                    "message": {"text": d["message"]},
+                    "locations": [
+                        {
+                            "physicalLocation": {
+                                "artifactLocation": {"uri": rel.replace(os.sep, "/")},
+                                "region": {"startLine": key_lines.get(d["field"], 1)},
+                            }
+                        }
+                    ],
+                }
+            )
+    return {
+        "version": "2.1.0",
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "runs": [
+            {
+                "tool": {
+                    "driver": {
+                        "name": "prompt_manager",
+                        "rules": list(rules.values()),
+                    }
+                },
+                "results": results,
+            }
+        ],
+    }
+
+
+def git_changed_prompt_files(staged):
+    """
+    Returns prompt paths changed in the git working tree (or index, if staged).
+    The working tree includes untracked files that are not ignored.
+    """
+    cmd = ["git", "diff", "--name-only", "--diff-filter=ACMR"]
+    cmd += ["--cached"] if staged else ["HEAD"]
+    commands = [cmd]
+    if not staged:
+        commands.append(["git", "ls-files", "--others", "--exclude-standard"])
+    paths = []
+    for cmd in commands:
+        result = subprocess.run(
+            cmd, cwd=_root(), capture_output=True, text=True, check=True
+        )
+        paths += [os.path.normpath(line) for line in result.stdout.splitlines() if line]
+    return paths
@@ -0,0 +1,212 @@
+"""Watching the prompt directories for edits, via inotify or polling."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from .core import PROMPT_DIRS, _is_prompt_path, _root, capture_output, iter_prompt_files
+from .indexer import generate_prompt_index, update_prompt_index
+from .manifest import load_manifest
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+
+INOTIFY_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+
+
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Recursive watch of PROMPT_DIRS using Linux inotify through ctypes.
+    poll() returns the set of relative paths touched since the last call, or
+    None if the kernel queue overflowed and a full rescan is needed.
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name or "libc.so.6", use_errno=True)
+        self.libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs_by_wd = {}
+        for prompt_dir in PROMPT_DIRS:
+            full_prompt_dir_path = os.path.join(_root(), prompt_dir)
+            if os.path.isdir(full_prompt_dir_path):
+                self._add_tree(full_prompt_dir_path)
+
+    def _add_tree(self, dir_path):
+        """
+        Watches dir_path and its subdirectories; returns the prompt files found.
+        """
+        found = set()
+        for root, _, files in os.walk(dir_path):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), INOTIFY_MASK)
+            if wd < 0:
+                raise OSError(
+                    ctypes.get_errno(), f"inotify_add_watch failed for {root}"
+                )
+            self.dirs_by_wd[wd] = root
+            for file_name in files:
+                found.add(os.path.relpath(os.path.join(root, file_name), _root()))
+        return found
+
+    def poll(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset : offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if mask & IN_Q_OVERFLOW:
+                return None
+            dir_path = self.dirs_by_wd.get(wd)
+            if dir_path is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                del self.dirs_by_wd[wd]
+                continue
+            path = os.path.join(dir_path, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and os.path.isdir(path):
+                    changed |= self._add_tree(path)
+                elif mask & IN_MOVED_FROM:
+                    # A moved-away directory takes its files with it.
+                    return None
+                continue
+            changed.add(os.path.relpath(path, _root()))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Portable fallback that diffs (mtime, size) snapshots of the prompt files.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.snapshot = self._stat_prompt_files()
+
+    @staticmethod
+    def _stat_prompt_files():
+        snapshot = {}
+        with capture_output():
+            for file_path_abs, file_path_rel in iter_prompt_files():
+                try:
+                    st = os.stat(file_path_abs)
+                except OSError:
+                    continue
+                snapshot[file_path_rel] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        current = self._stat_prompt_files()
+        changed = {
+            rel
+            for rel in current.keys() | self.snapshot.keys()
+            if current.get(rel) != self.snapshot.get(rel)
+        }
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(poll_interval=1.0):
+    """
+    Returns an InotifyWatcher where inotify is available, else a PollingWatcher.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); falling back to polling.")
+    return PollingWatcher(poll_interval)
+
+
+def watch_prompt_dirs(on_change, debounce=0.2, poll_interval=1.0, stop_event=None):
+    """
+    Calls on_change(changed_paths) after each burst of edits under PROMPT_DIRS
+    settles for `debounce` seconds. changed_paths is None when the watcher lost
+    track of events and a full re-index is required.
+    """
+    watcher = make_watcher(poll_interval)
+    pending = set()
+    overflow = False
+    try:
+        while stop_event is None or not stop_event.is_set():
+            changed = watcher.poll(debounce if pending or overflow else 0.5)
+            if changed is None:
+                overflow = True
+            elif changed:
+                # READMEs, editor swap files etc. do not affect the index.
+                pending |= {p for p in changed if _is_prompt_path(p)}
+            elif pending or overflow:
+                # Quiet for a full debounce window: flush the burst.
+                on_change(None if overflow else pending)
+                pending = set()
+                overflow = False
+    finally:
+        watcher.close()
+
+
+def watch(debounce=0.2, poll_interval=1.0):
+    """
+    Keeps the index, sidecars and affected category READMEs up to date as
+    prompt files are edited. Runs until interrupted.
+    """
+
+    def on_change(changed_paths):
+        if changed_paths is None:
+            generate_prompt_index()
+        else:
+            print(f"Changed: {', '.join(sorted(changed_paths))}")
+            update_prompt_index(changed_paths)
+
+    if not load_manifest():
+        generate_prompt_index()
+    print(f"Watching {', '.join(PROMPT_DIRS)} (Ctrl+C to stop)...")
+    try:
+        watch_prompt_dirs(on_change, debounce=debounce, poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
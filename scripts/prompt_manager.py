@@ -1,332 +1,31 @@
-import os
-import re
-import yaml
-from datetime import datetime
-import argparse  # Added argparse
-
-# --- Configuration ---
-PROMPT_DIRS = [
-    "analysis",
-    "trading",
-    "utilities",
-    "development",
-    "content",
-]  # Directories to scan for prompts
-METADATA_DIR = "metadata"
-PROMPT_INDEX_FILE = os.path.join(METADATA_DIR, "prompt_index.yaml")
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-
-REQUIRED_FIELDS = [
-    "id",
-    "title",
-    "description",
-    "category",
-    "tags",
-    "version",
-    "status",
-    "llm_model_compatibility",
-]
-
-
-# --- Helper Functions ---
-def extract_front_matter(md_content):
-    """
-    Extracts YAML front matter from Markdown content.
-    Returns (front_matter_dict, content_without_front_matter).
-    """
-    match = re.match(r"^\s*---\s*\n(.*?)\n\s*---\s*\n(.*)", md_content, re.DOTALL)
-    if not match:
-        return None, md_content
-
-    front_matter_str = match.group(1)
-    content_without_front_matter = match.group(2)
-    try:
-        front_matter_dict = yaml.safe_load(front_matter_str)
-        return front_matter_dict, content_without_front_matter
-    except yaml.YAMLError as e:
-        print(f"Error parsing YAML front matter: {e}")
-        return None, md_content
-
-
-def validate_front_matter(metadata, file_path_rel):
-    """
-    Validates the extracted front matter for required fields and consistency.
-    Returns True if valid, False otherwise.
-    """
-    is_valid = True
-    for field in REQUIRED_FIELDS:
-        if field not in metadata:
-            print(f"Warning: '{field}' missing in {file_path_rel}")
-            is_valid = False
-
-    if not isinstance(metadata.get("tags"), list):
-        print(f"Warning: 'tags' field in {file_path_rel} should be a list.")
-        is_valid = False
-    if not isinstance(metadata.get("llm_model_compatibility"), list):
-        print(
-            f"Warning: 'llm_model_compatibility' field in {file_path_rel} should be a list."
-        )
-        is_valid = False
-    if "parameters" in metadata and not isinstance(metadata["parameters"], list):
-        print(
-            f"Warning: 'parameters' field in {file_path_rel} should be a list of dictionaries."
-        )
-        is_valid = False
-    if "plan_steps" in metadata and not isinstance(metadata["plan_steps"], list):
-        print(
-            f"Warning: 'plan_steps' field in {file_path_rel} should be a list of dictionaries."
-        )
-        is_valid = False
-
-    # New check for path-category consistency
-    if not check_path_category_consistency(metadata, file_path_rel):
-        is_valid = False
-
-    return is_valid
-
-
-def check_path_category_consistency(metadata, file_path_rel):
-    """
-    Checks if metadata 'category' and 'sub_category' align with the file path.
-    Returns True if consistent, False otherwise.
-    """
-    is_consistent = True
-    path_parts = file_path_rel.split(os.sep)
-
-    # file_path_rel is like 'category/sub_category/file.md'
-    # so path_parts[0] should be category, path_parts[1] should be sub_category
-
-    # Check primary category
-    if len(path_parts) > 0 and path_parts[0] != metadata.get("category"):
-        print(
-            f"Error: Category '{metadata.get('category')}' in metadata does not match "
-            f"first path part '{path_parts[0]}' for {file_path_rel}"
-        )
-        is_consistent = False
-
-    # Check sub_category if present in metadata and path
-    if "sub_category" in metadata:
-        if len(path_parts) > 1 and path_parts[1] != metadata["sub_category"]:
-            print(
-                f"Error: Sub-category '{metadata['sub_category']}' in metadata does not match "
-                f"second path part '{path_parts[1]}' for {file_path_rel}"
-            )
-            is_consistent = False
-        # If sub_category is in metadata but no sub_dir in path (e.g., 'category/file.md')
-        elif len(path_parts) <= 1 or (
-            len(path_parts) > 1 and path_parts[1].endswith(".md")
-        ):
-            print(
-                f"Error: Sub-category '{metadata['sub_category']}' in metadata found, "
-                f"but no corresponding sub-directory in path for {file_path_rel}"
-            )
-            is_consistent = False
-    # If sub_directory is in path but no sub_category in metadata (and it's not a root file like README)
-    elif len(path_parts) > 1 and not path_parts[1].endswith(".md"):
-        print(
-            f"Error: Sub-directory '{path_parts[1]}' found in path, but no 'sub_category' "
-            f"in metadata for {file_path_rel}. Consider adding 'sub_category'."
-        )
-        is_consistent = False  # This is now a hard failure for consistency
-
-    return is_consistent
-
-
-def check_unique_ids(all_prompts_metadata):
-    """
-    Checks for unique 'id' values across all collected prompt metadata.
-    Returns True if all IDs are unique, False otherwise.
-    """
-    ids = {}
-    is_unique = True
-    for meta in all_prompts_metadata:
-        prompt_id = meta.get("id")
-        file_path = meta.get("file_path", "unknown_file")
-        if prompt_id:
-            if prompt_id in ids:
-                print(
-                    f"Error: Duplicate ID '{prompt_id}' found. "
-                    f"First instance in {ids[prompt_id]}, duplicate in {file_path}"
-                )
-                is_unique = False
-            else:
-                ids[prompt_id] = file_path
-        else:
-            # This case is already covered by REQUIRED_FIELDS check, but good to note.
-            print(
-                f"Error: Prompt in {file_path} is missing an 'id'. Cannot check for uniqueness."
-            )
-            is_unique = False  # If ID is missing, it's not uniquely identifiable
-
-    return is_unique
-
-
-def generate_prompt_index():
-    """
-    Scans specified directories for prompt files, extracts and validates their
-    front matter, and generates the prompt_index.yaml file.
-    """
-    all_prompts_metadata = []
-
-    # Ensure metadata directory exists
-    os.makedirs(os.path.join(PROJECT_ROOT, METADATA_DIR), exist_ok=True)
-
-    for prompt_dir in PROMPT_DIRS:
-        full_prompt_dir_path = os.path.join(PROJECT_ROOT, prompt_dir)
-        if not os.path.isdir(full_prompt_dir_path):
-            print(f"Warning: Prompt directory '{prompt_dir}' not found. Skipping.")
-            continue
-
-        for root, _, files in os.walk(full_prompt_dir_path):
-            for file_name in files:
-                if file_name.endswith(".md"):
-                    if file_name == "README.md" or file_name == "changelog.md":
-                        print(f"Skipping documentation file: {file_name}")
-                        continue
-
-                    file_path_abs = os.path.join(root, file_name)
-                    file_path_rel = os.path.relpath(file_path_abs, PROJECT_ROOT)
-
-                    with open(file_path_abs, "r", encoding="utf-8") as f:
-                        content = f.read()
-
-                    metadata, _ = extract_front_matter(content)
-
-                    if metadata:
-                        # Add / update last_modified timestamp
-                        metadata["last_modified"] = datetime.now().isoformat()
-                        # Add relative file path
-                        metadata["file_path"] = file_path_rel
-                        if validate_front_matter(metadata, file_path_rel):
-                            all_prompts_metadata.append(metadata)
-                        else:
-                            # If validate_front_matter returns False, it means there was a critical error for that prompt
-                            # We still append to all_prompts_metadata so check_unique_ids can report on it,
-                            # but we will fail the overall_validity.
-                            pass  # Individual errors are printed in validate_front_matter
-                    else:
-                        print(
-                            f"Warning: No YAML front matter found in {file_path_rel}. Skipping."
-                        )
-
-    overall_valid = True  # Initialize overall validity flag
-
-    # After collecting all metadata, perform cross-cutting validations
-    if not check_unique_ids(all_prompts_metadata):
-        overall_valid = False
-
-    # if other cross-cutting validations were added, they would go here
-    # e.g., if not check_semantic_versioning(all_prompts_metadata): overall_valid = False
-
-    if not overall_valid:
-        print(
-            "Error: Prompt index generation halted due to critical validation errors."
-        )
-        return  # Do not write the index if critical errors exist
-
-    # Write the aggregated metadata to prompt_index.yaml
-    index_file_path = os.path.join(PROJECT_ROOT, PROMPT_INDEX_FILE)
-    try:
-        with open(index_file_path, "w", encoding="utf-8") as f:
-            yaml.dump(
-                all_prompts_metadata,
-                f,
-                sort_keys=False,
-                indent=2,
-                default_flow_style=False,
-            )
-        print(
-            f"Successfully generated {index_file_path} with {len(all_prompts_metadata)} prompts."
-        )
-
-        # Update READMEs after successful indexing
-        update_category_readmes(all_prompts_metadata)
+"""
+Command-line front end of the prompt_library package: index, search,
+validate, render, watch and serve the prompt library of this checkout.
+"""
 
-    except Exception as e:
-        print(f"Error writing prompt index file: {e}")
+import argparse
+import json
+import os
+import sys
+import time
 
+import yaml
 
-def update_category_readmes(all_prompts_metadata):
-    """
-    Updates README.md files in each category directory with a list of prompts.
-    """
-    print("Updating category READMEs...")
-
-    # Group prompts by directory
-    prompts_by_dir = {}
-    for prompt in all_prompts_metadata:
-        file_path_rel = prompt.get("file_path")
-        if not file_path_rel:
-            continue
-
-        dir_path = os.path.dirname(os.path.join(PROJECT_ROOT, file_path_rel))
-        if dir_path not in prompts_by_dir:
-            prompts_by_dir[dir_path] = []
-        prompts_by_dir[dir_path].append(prompt)
-
-    # Markers
-    START_MARKER = "<!-- AUTOMATED_PROMPTS_LIST_START -->"
-    END_MARKER = "<!-- AUTOMATED_PROMPTS_LIST_END -->"
-
-    for dir_path, prompts in prompts_by_dir.items():
-        readme_path = os.path.join(dir_path, "README.md")
-
-        # Skip if README doesn't exist (we don't create new READMEs, only update existing)
-        if not os.path.exists(readme_path):
-            continue
-
-        with open(readme_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # Generate list content
-        list_content = "\n"
-        for p in sorted(prompts, key=lambda x: x.get("title", "Untitled")):
-            rel_link = os.path.basename(p["file_path"])
-            desc = p.get("description", "No description.")
-            list_content += f"### [{p.get('title', 'Untitled')}]({rel_link})\n"
-            list_content += f"{desc}\n\n"
-            # Add metadata badges/bullets
-            meta_items = []
-            if "version" in p:
-                meta_items.append(f"**Version:** {p['version']}")
-            if "tags" in p:
-                meta_items.append(f"**Tags:** {', '.join(p['tags'])}")
-            if meta_items:
-                list_content += f"- {' | '.join(meta_items)}\n\n"
-            list_content += "---\n\n"
-
-        # Check for markers
-        if START_MARKER in content and END_MARKER in content:
-            # Replace existing block
-            pattern = re.compile(
-                f"{re.escape(START_MARKER)}.*?{re.escape(END_MARKER)}", re.DOTALL
-            )
-            new_block = f"{START_MARKER}\n{list_content}{END_MARKER}"
-            new_content = pattern.sub(new_block, content)
-        else:
-            # Append markers
-            # Try to find a logical place
-            if "## Prompts" in content:
-                # Insert after ## Prompts header if strictly no markers found yet
-                # This is a bit complex regex, simpler to just append or replace
-                pass
-
-            # Simple strategy: If no markers, append to end or find ## Prompts
-            # Let's append to the end for now if not found, with a header
-            header = (
-                "\n## Available Prompts\n"
-                if "## Prompts" not in content and "## Available Prompts" not in content
-                else "\n"
-            )
-            new_block = f"{header}{START_MARKER}\n{list_content}{END_MARKER}\n"
-            new_content = content + new_block
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-        if new_content != content:
-            with open(readme_path, "w", encoding="utf-8") as f:
-                f.write(new_content)
-            print(f"Updated {os.path.relpath(readme_path, PROJECT_ROOT)}")
-        else:
-            print(f"No changes needed for {os.path.relpath(readme_path, PROJECT_ROOT)}")
+from prompt_library import core  # noqa: E402
+from prompt_library.api import get_body, render  # noqa: E402
+from prompt_library.core import PROMPT_DIRS, PROMPT_INDEX_FILE, _root  # noqa: E402
+from prompt_library.daemon import DAEMON_HOST, DAEMON_PORT, serve  # noqa: E402
+from prompt_library.facets import SEARCH_FACETS  # noqa: E402
+from prompt_library.indexer import generate_prompt_index  # noqa: E402
+from prompt_library.search_index import find_prompts, format_search_results  # noqa: E402
+from prompt_library.validation import (  # noqa: E402
+    git_changed_prompt_files,
+    to_sarif,
+    validate_prompt_files,
+)
+from prompt_library.watcher import watch  # noqa: E402
 
 
 def create_new_prompt(args):
@@ -432,7 +131,7 @@ def create_new_prompt(args):
     # 2. Construct file path
     file_name = f"{prompt_metadata['id']}.md"
     target_dir = os.path.join(
-        PROJECT_ROOT,
+        _root(),
         prompt_metadata["category"],
         prompt_metadata["sub_category"] if prompt_metadata["sub_category"] else "",
     )
@@ -468,11 +167,15 @@ def create_new_prompt(args):
         print(f"Error creating prompt file: {e}")
 
 
-def search_prompts(query):
+def search_prompts(query, top_k=10, page=1, semantic=False, filters=None):
     """
-    Searches for prompts in the prompt_index.yaml file based on a query string.
+    Searches for prompts matching a query string and prints ranked results
+    with facet counts. Uses the precomputed search index (BM25), falling back
+    to a substring scan of the prompt index if the search index has not been
+    built. With semantic=True, ranks by embedding similarity when a semantic
+    index exists. filters is passed on to find_prompts().
     """
-    index_file_path = os.path.join(PROJECT_ROOT, PROMPT_INDEX_FILE)
+    index_file_path = os.path.join(_root(), PROMPT_INDEX_FILE)
     if not os.path.exists(index_file_path):
         print(
             f"Error: Index file not found at {index_file_path}. Run 'index' command first."
@@ -480,50 +183,74 @@ def search_prompts(query):
         return
 
     try:
-        with open(index_file_path, "r", encoding="utf-8") as f:
-            all_prompts = yaml.safe_load(f) or []
+        found = find_prompts(
+            query, top_k=top_k, page=page, semantic=semantic, filters=filters
+        )
     except Exception as e:
         print(f"Error reading index file: {e}")
         return
+    if semantic and not found["semantic"]:
+        print(
+            "Note: no semantic index (it needs numpy and an 'index' run); "
+            "using keyword search."
+        )
+    print(format_search_results(found, top_k=top_k))
 
-    query = query.lower()
-    matches = []
-
-    for prompt in all_prompts:
-        # Check text fields
-        searchable_text = (
-            f"{prompt.get('id', '')} "
-            f"{prompt.get('title', '')} "
-            f"{prompt.get('description', '')} "
-            f"{prompt.get('category', '')} "
-            f"{prompt.get('sub_category', '')}"
-        ).lower()
-
-        # Check tags
-        tags = [t.lower() for t in prompt.get("tags", [])]
 
-        if query in searchable_text or any(query in t for t in tags):
-            matches.append(prompt)
+def run_validate(paths=None, output_format="text", jobs=1, strict=False):
+    """
+    Validates the library (or the given paths) and prints the findings in the
+    requested format. Returns the process exit code: 1 if any file has errors
+    (or warnings, when strict), else 0.
+    """
+    started = time.perf_counter()
+    report = validate_prompt_files(paths, jobs=jobs)
+    diagnostics = [
+        d for file_report in report.values() for d in file_report["diagnostics"]
+    ]
+    failing = {"error", "warning"} if strict else {"error"}
+    exit_code = int(any(d["severity"] in failing for d in diagnostics))
 
-    print(f"\nFound {len(matches)} matches for '{query}':\n")
-    for p in matches:
-        print(f"ID:          {p.get('id')}")
-        print(f"Title:       {p.get('title')}")
-        print(f"Path:        {p.get('file_path')}")
-        print(f"Description: {p.get('description')}")
-        print(f"Tags:        {', '.join(p.get('tags', []))}")
-        print("-" * 40)
+    if output_format == "json":
+        print(json.dumps({"files": len(report), "diagnostics": diagnostics}, indent=2))
+    elif output_format == "sarif":
+        print(json.dumps(to_sarif(report), indent=2))
+    else:
+        for d in diagnostics:
+            print(f"{d['file']}: {d['severity']}: [{d['rule']}] {d['message']}")
+        errors = sum(d["severity"] == "error" for d in diagnostics)
+        print(
+            f"Validated {len(report)} files in {time.perf_counter() - started:.2f}s: "
+            f"{errors} errors, {len(diagnostics) - errors} warnings."
+        )
+    return exit_code
 
 
 # --- Main Execution ---
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Manage your prompt library.")
+    parser.add_argument(
+        "--project-root",
+        help="Library checkout to work on (default: the one this script is in).",
+    )
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Index command
     index_parser = subparsers.add_parser(
         "index", help="Generate/update the prompt index."
     )
+    index_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-parse every prompt file instead of only changed ones.",
+    )
+    index_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of worker processes for parsing (0 = one per CPU).",
+    )
 
     # New prompt command
     new_prompt_parser = subparsers.add_parser(
@@ -534,17 +261,168 @@ if __name__ == "__main__":
     # Search command
     search_parser = subparsers.add_parser("search", help="Search for prompts.")
     search_parser.add_argument(
-        "query", help="Keyword to search for (id, title, tags, etc.)"
+        "query",
+        nargs="?",
+        default="",
+        help="Keyword to search for (id, title, tags, etc.); omit to list every match of the filters.",
+    )
+    search_parser.add_argument(
+        "--top-k", type=int, default=10, help="Results per page (default 10)."
+    )
+    search_parser.add_argument(
+        "--page", type=int, default=1, help="Page of results to show (default 1)."
+    )
+    search_parser.add_argument(
+        "--semantic",
+        action="store_true",
+        help="Rank by embedding similarity (needs numpy and a semantic index).",
+    )
+    for flag, dest, help_text in (
+        ("--tag", "tags", "Only prompts with this tag."),
+        ("--status", "status", "Only prompts with this status."),
+        (
+            "--model",
+            "llm_model_compatibility",
+            "Only prompts compatible with this model.",
+        ),
+        ("--category", "category", "Only prompts in this category."),
+        ("--sub-category", "sub_category", "Only prompts in this sub-category."),
+    ):
+        search_parser.add_argument(
+            flag,
+            dest=dest,
+            action="append",
+            help=help_text + " Repeat to allow several values.",
+        )
+
+    # Validate command
+    validate_parser = subparsers.add_parser(
+        "validate", help="Validate prompt front matter against the schema."
+    )
+    validate_parser.add_argument(
+        "paths", nargs="*", help="Prompt files to check (default: the whole library)."
+    )
+    validate_parser.add_argument(
+        "--format", choices=["text", "json", "sarif"], default="text"
+    )
+    validate_parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="Worker processes (0 = one per CPU)."
+    )
+    validate_parser.add_argument(
+        "--strict", action="store_true", help="Fail on warnings as well as errors."
+    )
+    changed_group = validate_parser.add_mutually_exclusive_group()
+    changed_group.add_argument(
+        "--changed", action="store_true", help="Only files changed since HEAD."
+    )
+    changed_group.add_argument(
+        "--staged", action="store_true", help="Only files staged for commit."
+    )
+
+    # Get command
+    get_parser = subparsers.add_parser("get", help="Print a prompt's body by id.")
+    get_parser.add_argument("id", help="Prompt id")
+
+    # Render command
+    render_parser = subparsers.add_parser(
+        "render", help="Print a prompt's body with its parameters filled in."
+    )
+    render_parser.add_argument("id", help="Prompt id")
+    render_parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Parameter value (repeatable).",
+    )
+
+    # Serve command
+    serve_parser = subparsers.add_parser(
+        "serve", help="Run a daemon that serves queries from an in-memory index."
+    )
+    serve_parser.add_argument("--host", default=DAEMON_HOST)
+    serve_parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    serve_parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks when inotify is unavailable.",
+    )
+
+    # Watch command
+    watch_parser = subparsers.add_parser(
+        "watch", help="Keep the index and category READMEs updated as prompts change."
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.2,
+        help="Seconds of quiet before a burst of edits is applied (default 0.2).",
+    )
+    watch_parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks when inotify is unavailable.",
     )
 
     args = parser.parse_args()
+    if args.project_root:
+        core.PROJECT_ROOT = os.path.abspath(args.project_root)
 
     if args.command == "index":
         print("Generating prompt index...")
-        generate_prompt_index()
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        generate_prompt_index(full=args.full, jobs=jobs)
     elif args.command == "new-prompt":
         create_new_prompt(args)
     elif args.command == "search":
-        search_prompts(args.query)
+        filters = {field: getattr(args, field) for field in SEARCH_FACETS}
+        search_prompts(
+            args.query,
+            top_k=args.top_k,
+            page=args.page,
+            semantic=args.semantic,
+            filters=filters,
+        )
+    elif args.command == "validate":
+        paths = [os.path.relpath(os.path.abspath(p), _root()) for p in args.paths]
+        if args.changed or args.staged:
+            paths += git_changed_prompt_files(staged=args.staged)
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        sys.exit(
+            run_validate(
+                paths if (paths or args.changed or args.staged) else None,
+                output_format=args.format,
+                jobs=jobs,
+                strict=args.strict,
+            )
+        )
+    elif args.command in ("get", "render"):
+        try:
+            if args.command == "get":
+                output = get_body(args.id)
+            else:
+                params = {}
+                for item in args.param:
+                    name, sep, value = item.partition("=")
+                    if not sep:
+                        parser.error(f"--param expects NAME=VALUE, got '{item}'")
+                    params[name.strip()] = value
+                output = render(args.id, params)
+        except FileNotFoundError as e:
+            print(f"Error: {e}. Run 'index' command first.")
+            sys.exit(1)
+        except KeyError:
+            print(f"Error: No prompt with id '{args.id}' in the index.")
+            sys.exit(1)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(output, end="")
+    elif args.command == "watch":
+        watch(debounce=args.debounce, poll_interval=args.poll_interval)
+    elif args.command == "serve":
+        serve(host=args.host, port=args.port, poll_interval=args.poll_interval)
     else:
         parser.print_help()
@@ -0,0 +1,194 @@
+"""ArxivIntegrator against canned Atom pages served from localhost; needs the arxiv package."""
+
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import pairwise
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import pytest
+
+pytest.importorskip("arxiv")
+
+from agent_system.tools.arxiv_integrator import ArxivIntegrator, RateLimiter  # noqa: E402
+
+NOW = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+
+def make_papers(count: int, newest: datetime.datetime = NOW) -> list[dict]:
+    """Papers 2402.00001.. published an hour apart, newest first."""
+    return [
+        {
+            "id": f"2402.{i + 1:05d}",
+            "published": newest - datetime.timedelta(hours=i),
+            "title": f"Paper {i + 1}",
+        }
+        for i in range(count)
+    ]
+
+
+def atom_page(papers: list[dict], total: int, start: int) -> bytes:
+    entries = []
+    for paper in papers:
+        stamp = paper["published"].strftime("%Y-%m-%dT%H:%M:%SZ")
+        entries.append(
+            f"<entry><id>http://arxiv.org/abs/{paper['id']}v1</id>"
+            f"<updated>{stamp}</updated><published>{stamp}</published>"
+            f"<title>{escape(paper['title'])}</title><summary>About {escape(paper['title'])}.</summary>"
+            "<author><name>Ada Lovelace</name></author>"
+            f'<link href="http://arxiv.org/pdf/{paper["id"]}v1" title="pdf" rel="related"/>'
+            '<category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/></entry>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+        f"<title>canned</title><id>canned</id><updated>{NOW.isoformat()}</updated>"
+        f"<opensearch:totalResults>{total}</opensearch:totalResults>"
+        f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+        f"<opensearch:itemsPerPage>{len(papers)}</opensearch:itemsPerPage>"
+        f"{''.join(entries)}</feed>"
+    ).encode()
+
+
+class FakeArxiv:
+    """Serves `papers` newest first, honouring start/max_results like the arXiv API."""
+
+    def __init__(self):
+        self.papers: list[dict] = []
+        # Status codes to answer the next requests with before serving pages.
+        self.failures: list[int] = []
+        # (monotonic time, start, max_results, status) per request.
+        self.requests: list[tuple[float, int, int, int]] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                start = int(query.get("start", ["0"])[0])
+                size = int(query.get("max_results", ["10"])[0])
+                status = fake.failures.pop(0) if fake.failures else 200
+                fake.requests.append((time.monotonic(), start, size, status))
+                if status != 200:
+                    self.send_error(status)
+                    return
+                body = atom_page(
+                    fake.papers[start : start + size], len(fake.papers), start
+                )
+                self.send_response(200)
+                self.send_header("Content-Type", "application/atom+xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/query"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_arxiv():
+    fake = FakeArxiv()
+    yield fake
+    fake.close()
+
+
+def make_integrator(tmp_path, fake, interval=0.0, page_size=100):
+    integrator = ArxivIntegrator(
+        tmp_path / "arxiv.sqlite3",
+        cache_ttl_hours=0,
+        api_url=fake.url,
+        rate_limiter=RateLimiter(interval),
+    )
+    integrator.client.page_size = page_size
+    return integrator
+
+
+def test_page_requests_are_spaced_by_the_limiter(tmp_path, fake_arxiv):
+    fake_arxiv.papers = make_papers(6)
+    integrator = make_integrator(tmp_path, fake_arxiv, interval=0.2, page_size=2)
+    papers = integrator.search_by_category("cs.AI", max_results=6, days_back=1)
+    assert len(papers) == 6
+    stamps = [stamp for stamp, *_ in fake_arxiv.requests]
+    assert len(stamps) == 3
+    assert all(b - a >= 0.19 for a, b in pairwise(stamps))
+
+
+def test_pages_come_back_in_order(tmp_path, fake_arxiv):
+    fake_arxiv.papers = make_papers(7)
+    integrator = make_integrator(tmp_path, fake_arxiv, page_size=3)
+    papers = integrator.papers_by_category("cs.AI", max_results=50, days_back=1)
+    assert [paper.paper_id for paper in papers] == [
+        paper["id"] for paper in fake_arxiv.papers
+    ]
+    assert [(start, size) for _, start, size, _ in fake_arxiv.requests] == [
+        (0, 3),
+        (3, 3),
+        (6, 3),
+    ]
+
+
+def test_search_methods_return_plain_dicts(tmp_path, fake_arxiv):
+    fake_arxiv.papers = make_papers(2)
+    integrator = make_integrator(tmp_path, fake_arxiv)
+    papers = integrator.search_by_category("cs.AI", max_results=10, days_back=1)
+    assert [paper["title"] for paper in papers] == ["Paper 1", "Paper 2"]
+    assert papers[0].get("pdf_url") == "http://arxiv.org/pdf/2402.00001v1"
+    json.dumps(papers)
+
+    details = integrator.get_paper_details("2402.00001")
+    assert details == papers[0]
+    assert integrator.papers_by_id(["2402.00001"])[0].to_dict() == details
+
+
+def test_paging_stops_at_the_cutoff(tmp_path, fake_arxiv):
+    fake_arxiv.papers = make_papers(10, newest=NOW - datetime.timedelta(hours=20))
+    integrator = make_integrator(tmp_path, fake_arxiv, page_size=3)
+    papers = integrator.papers_by_category("cs.AI", max_results=50, days_back=1)
+    # Published 20-23 hours ago; the fifth is past the one-day cutoff.
+    assert len(papers) == 4
+    assert len(fake_arxiv.requests) == 2
+
+
+def test_503_is_retried_after_the_interval(tmp_path, fake_arxiv):
+    fake_arxiv.papers = make_papers(3)
+    fake_arxiv.failures = [503, 503]
+    integrator = make_integrator(tmp_path, fake_arxiv, interval=0.1)
+    papers = integrator.search_by_category("cs.AI", max_results=10, days_back=1)
+    assert len(papers) == 3
+    assert [status for *_, status in fake_arxiv.requests] == [503, 503, 200]
+    stamps = [stamp for stamp, *_ in fake_arxiv.requests]
+    assert all(b - a >= 0.09 for a, b in pairwise(stamps))
+
+
+def test_sync_resumes_after_a_truncated_page(tmp_path, fake_arxiv):
+    query = "cat:cs.AI"
+    all_papers = make_papers(10)
+    # The first sync only sees the four oldest papers.
+    fake_arxiv.papers = all_papers[6:]
+    integrator = make_integrator(tmp_path, fake_arxiv)
+    assert len(integrator.sync_query(query, max_results=100, days_back=7)) == 4
+    mark = integrator.store.high_water_mark(query)
+
+    # Six newer papers appear; a sync capped at five leaves 2402.00006 behind.
+    fake_arxiv.papers = all_papers
+    truncated = integrator.sync_query(query, max_results=5, days_back=7)
+    assert [paper.paper_id for paper in truncated] == [
+        f"2402.{i:05d}" for i in range(1, 6)
+    ]
+    assert integrator.store.high_water_mark(query) == mark
+
+    resumed = integrator.sync_query(query, max_results=100, days_back=7)
+    assert [paper.paper_id for paper in resumed] == ["2402.00006"]
+    assert integrator.store.high_water_mark(query) == NOW
+    assert len(integrator.store.get_many([paper["id"] for paper in all_papers])) == 10
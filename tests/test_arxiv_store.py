@@ -0,0 +1,107 @@
+"""ResponseCache, PaperStore and its FTS index; none of it needs the arxiv package."""
+
+import datetime
+import sqlite3
+import threading
+import time
+from itertools import pairwise
+
+from agent_system.tools.arxiv_store import (
+    Paper,
+    PaperStore,
+    RateLimiter,
+    ResponseCache,
+    fts_query,
+)
+
+NOW = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+
+def make_paper(number: int, title: str, summary: str = "", hours_ago: int = 0):
+    published = NOW - datetime.timedelta(hours=hours_ago)
+    return Paper(
+        entry_id=f"http://arxiv.org/abs/2402.{number:05d}v1",
+        title=title,
+        authors=["Ada Lovelace"],
+        published=published.isoformat(),
+        summary=summary or f"About {title}.",
+        pdf_url=f"http://arxiv.org/pdf/2402.{number:05d}v1",
+        categories=["cs.AI"],
+    )
+
+
+def test_rate_limiter_spaces_calls_across_threads():
+    limiter = RateLimiter(0.05)
+    stamps = []
+    threads = [
+        threading.Thread(
+            target=lambda: (limiter.wait(), stamps.append(time.monotonic()))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stamps.sort()
+    assert all(b - a >= 0.045 for a, b in pairwise(stamps))
+
+
+def test_response_cache_round_trips_and_expires(tmp_path):
+    cache = ResponseCache(tmp_path / "arxiv.sqlite3", ttl_seconds=60)
+    papers = [make_paper(1, "Sparse Attention"), make_paper(2, "Dense Retrieval")]
+    cache.put("cat:cs.AI", papers)
+    assert cache.get("cat:cs.AI") == papers
+    assert cache.get("cat:cs.LG") is None
+
+    cache.ttl_seconds = -1
+    assert cache.get("cat:cs.AI") is None
+    assert cache.clear_expired() == 1
+
+
+def test_store_adds_new_papers_and_advances_the_mark(tmp_path):
+    store = PaperStore(tmp_path / "arxiv.sqlite3")
+    older, newer = make_paper(1, "Old", hours_ago=5), make_paper(2, "New")
+    assert store.add_papers([older], "cat:cs.AI") == [older]
+    assert store.add_papers([older, newer], "cat:cs.AI") == [newer]
+    assert store.high_water_mark("cat:cs.AI") == NOW
+    assert store.high_water_mark("cat:cs.LG") is None
+    found = store.get_many(["2402.00002v3", "http://arxiv.org/abs/2402.00001", "x"])
+    assert found == {"2402.00002": newer, "2402.00001": older}
+
+
+def test_fts_ranks_title_matches_first(tmp_path):
+    store = PaperStore(tmp_path / "arxiv.sqlite3")
+    store.add_papers(
+        [
+            make_paper(1, "Graph networks", "We study transformers on graphs."),
+            make_paper(2, "Transformers for retrieval", "A retrieval model."),
+            make_paper(3, "Protein folding", "Nothing related."),
+        ]
+    )
+    ranked = [paper.paper_id for _, paper in store.search(["transformer"])]
+    assert ranked == ["2402.00002", "2402.00001"]
+    assert store.search(["-:*"]) == []
+
+
+def test_match_tags_weights_tags_by_prompt_count(tmp_path):
+    store = PaperStore(tmp_path / "arxiv.sqlite3")
+    store.add_papers(
+        [make_paper(1, "Prompt injection"), make_paper(2, "Retrieval evaluation")]
+    )
+    matches = store.match_tags({"retrieval": ["a", "b", "c"], "injection": ["d"]})
+    assert [match.paper.paper_id for match in matches] == ["2402.00002", "2402.00001"]
+    assert matches[0].tags == ["retrieval"]
+    assert matches[0].prompt_ids == ["a", "b", "c"]
+
+
+def test_fts_query_quotes_terms():
+    assert fts_query(["ml-training", "NEAR", "  "]) == '"ml training" OR "near"'
+
+
+def test_fts_index_is_built_for_an_older_database(tmp_path):
+    path = tmp_path / "arxiv.sqlite3"
+    PaperStore(path).add_papers([make_paper(1, "Speculative decoding")])
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE papers_fts")
+    assert len(PaperStore(path).search(["decoding"])) == 1
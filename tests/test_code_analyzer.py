@@ -0,0 +1,64 @@
+"""CodeAnalyzer result shapes."""
+
+from agent_system.tools.code_analyzer import CodeAnalyzer, analyze_source
+
+SOURCE = b"""
+import os
+from . import sibling
+
+
+class Outer:
+    class Inner:
+        pass
+
+    def method(self):
+        def inner():
+            return os.path.join("a", "b")
+
+        return inner() if self else None
+
+
+async def fetch():
+    pass
+"""
+
+
+def test_analysis_keeps_name_lists_next_to_details():
+    result = analyze_source(SOURCE)
+    assert result["classes"] == ["Outer", "Inner"]
+    assert result["functions"] == ["method", "inner", "fetch"]
+    assert result["imports"] == ["os", ".sibling"]
+    assert [c["name"] for c in result["class_details"]] == ["Outer", "Outer.Inner"]
+    details = {f["name"]: f for f in result["function_details"]}
+    assert list(details) == ["Outer.method", "Outer.method.inner", "fetch"]
+    assert details["Outer.method"]["complexity"] == 2
+    assert details["Outer.method.inner"]["calls"] == ["os.path.join"]
+    assert details["fetch"]["async"]
+
+
+def test_lint_and_format_checks_keep_their_text_results(tmp_path, monkeypatch):
+    analyzer = CodeAnalyzer(tmp_path)
+    finding = {
+        "rule": "F401",
+        "message": "`os` imported but unused",
+        "line": 1,
+        "column": 8,
+    }
+    monkeypatch.setattr(
+        analyzer,
+        "quality_check",
+        lambda *args, **kwargs: {
+            "status": "issues_found",
+            "lint": {"a.py": [finding]},
+            "format": ["b.py"],
+            "errors": {},
+        },
+    )
+    assert analyzer.lint_check() == {
+        "status": "issues_found",
+        "output": "a.py:1:8: F401 `os` imported but unused",
+    }
+    assert analyzer.format_check() == {
+        "status": "needs_formatting",
+        "output": "Would reformat: b.py",
+    }
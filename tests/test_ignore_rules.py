@@ -0,0 +1,99 @@
+"""Gitignore pattern translation and IgnoreMatcher."""
+
+import re
+
+import pytest
+
+from agent_system.tools.ignore_rules import IgnoreMatcher, RuleSet, _translate
+
+
+def matches(pattern: str, name: str) -> bool:
+    return re.match(_translate(pattern) + r"\Z", name, re.DOTALL) is not None
+
+
+@pytest.mark.parametrize(
+    ("pattern", "name", "expected"),
+    [
+        # A "]" right after "[" or "[!" is a class member.
+        ("[]a]", "]", True),
+        ("[]a]", "a", True),
+        ("[]a]", "b", False),
+        ("[!]x]y", "zy", True),
+        ("[!]x]y", "]y", False),
+        ("[!]x]y", "xy", False),
+        ("[^]]", "a", True),
+        # Empty or unclosed classes leave the "[" literal.
+        ("foo[]", "foo[]", True),
+        ("foo[]", "foo", False),
+        ("[]", "[]", True),
+        ("[!]", "[!]", True),
+        ("a[b", "a[b", True),
+        # Ordinary classes and ranges.
+        ("b[!a]c", "bbc", True),
+        ("b[!a]c", "bac", False),
+        ("b[!a]c", "b/c", False),
+        ("file[0-9].txt", "file7.txt", True),
+        ("file[0-9].txt", "filex.txt", False),
+        ("[[]x", "[x", True),
+        ("a[\\]b", "a\\b", True),
+    ],
+)
+def test_bracket_classes(pattern, name, expected):
+    assert matches(pattern, name) is expected
+
+
+@pytest.mark.parametrize(
+    ("pattern", "name", "expected"),
+    [
+        ("*.log", "debug.log", True),
+        ("*.log", "logs/debug.log", False),
+        ("**/build", "a/b/build", True),
+        ("docs/**", "docs/a/b.md", True),
+        ("a/**/b", "a/b", True),
+        ("a/**/b", "a/x/y/b", True),
+        ("?.txt", "a.txt", True),
+        ("?.txt", "/.txt", False),
+        ("\\*.txt", "*.txt", True),
+        ("\\*.txt", "a.txt", False),
+    ],
+)
+def test_globs(pattern, name, expected):
+    assert matches(pattern, name) is expected
+
+
+def test_negation_re_includes():
+    rules = RuleSet(["*.log", "!keep.log", "build/"])
+    assert rules.match("debug.log", False) is True
+    assert rules.match("keep.log", False) is False
+    assert rules.match("build", True) is True
+    assert rules.match("build", False) is None
+
+
+def test_matcher_reads_nested_gitignores(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.tmp\n[]x]\nfoo[]\n", encoding="utf-8")
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / ".gitignore").write_text("!keep.tmp\n/local/\n", encoding="utf-8")
+    for rel in [
+        "a.tmp",
+        "]",
+        "x",
+        "foo[]",
+        "sub/keep.tmp",
+        "sub/b.tmp",
+        "sub/local/c.py",
+        "sub/d.py",
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("", encoding="utf-8")
+
+    matcher = IgnoreMatcher(tmp_path, config_path=tmp_path / "missing.yaml")
+    walked = sorted(
+        f"{dirpath[len(str(tmp_path)) + 1 :]}/{name}".lstrip("/")
+        for dirpath, _, filenames in matcher.walk()
+        for name in filenames
+    )
+    assert walked == ["sub/d.py", "sub/keep.tmp"]
+    assert matcher.is_ignored(tmp_path / "sub" / "local" / "c.py")
+    assert not matcher.is_ignored(tmp_path / "sub" / "keep.tmp")
@@ -0,0 +1,221 @@
+"""Incremental index updates against a from-scratch rebuild."""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import prompt_library
+from prompt_library import core, manifest, prompt_index, readmes, search_index
+from prompt_library.indexer import generate_prompt_index, update_prompt_index
+from prompt_library.validation import git_changed_prompt_files
+
+SCRIPT = os.path.join(
+    os.path.dirname(__file__), os.pardir, "scripts", "prompt_manager.py"
+)
+GENERATED = ("prompt_index.yaml", "prompt_index.json", "search_index.json")
+
+
+def write_prompt(root, rel, prompt_id, title, tags, status="active"):
+    category, sub_category = rel.split("/")[:2]
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        "---\n"
+        f"id: {prompt_id}\n"
+        f"title: {title}\n"
+        f"description: Prompt {prompt_id}.\n"
+        f"category: {category}\n"
+        f"sub_category: {sub_category}\n"
+        f"tags: [{', '.join(tags)}]\n"
+        "version: 1.0.0\n"
+        f"status: {status}\n"
+        "llm_model_compatibility: [any]\n"
+        "---\n"
+        f"# {title}\n\nBody of {prompt_id}.\n",
+        encoding="utf-8",
+    )
+    # Every edit must look changed to the manifest's stat check.
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def index_files(root):
+    return {
+        name: (root / "metadata" / name).read_text(encoding="utf-8")
+        for name in GENERATED
+    }
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch, capsys):
+    root = tmp_path / "library"
+    for i in range(6):
+        write_prompt(
+            root,
+            f"analysis/reports/report-{i}.md",
+            f"report-{i}",
+            f"Report {i}",
+            ["reports", f"tag{i % 2}"],
+        )
+    (root / "metadata").mkdir()
+    monkeypatch.setattr(core, "PROJECT_ROOT", str(root))
+    generate_prompt_index()
+    yield root
+    capsys.readouterr()
+
+
+def rebuilt(root, tmp_path, monkeypatch):
+    """The index files a full run writes for the same prompt files."""
+    fresh = tmp_path / "fresh"
+    shutil.copytree(root, fresh, ignore=shutil.ignore_patterns("metadata"))
+    (fresh / "metadata").mkdir()
+    monkeypatch.setattr(core, "PROJECT_ROOT", str(fresh))
+    generate_prompt_index(full=True)
+    monkeypatch.setattr(core, "PROJECT_ROOT", str(root))
+    return index_files(fresh)
+
+
+@pytest.mark.parametrize(
+    "edit",
+    ["retitle", "new-tag", "add", "delete", "invalidate"],
+)
+def test_update_matches_full_rebuild(library, tmp_path, monkeypatch, edit):
+    rebuilds = []
+    for module, name in (
+        (search_index, "build_search_index"),
+        (prompt_index, "build_index_sidecar"),
+    ):
+        original = getattr(module, name)
+        monkeypatch.setattr(
+            module,
+            name,
+            lambda *args, _name=name, _original=original: (
+                rebuilds.append(_name) or _original(*args)
+            ),
+        )
+
+    rel = "analysis/reports/report-2.md"
+    if edit == "retitle":
+        write_prompt(library, rel, "report-2", "Quarterly Summary", ["reports"])
+    elif edit == "new-tag":
+        write_prompt(library, rel, "report-2", "Report 2", ["reports", "brandnew"])
+    elif edit == "add":
+        rel = "analysis/reports/report-10.md"
+        write_prompt(library, rel, "report-10", "Added Report", ["added"])
+    elif edit == "delete":
+        (library / rel).unlink()
+    else:
+        write_prompt(library, rel, "report-2", "Report 2", ["reports"], status="bogus")
+
+    summary = update_prompt_index([rel])
+    assert summary["written"]
+    assert rebuilds == []
+    patched = index_files(library)
+    assert patched == rebuilt(library, tmp_path, monkeypatch)
+
+
+def test_unchanged_files_are_not_revalidated(library, monkeypatch):
+    checked = []
+    original = manifest.check_prompt_metadata
+    monkeypatch.setattr(
+        manifest,
+        "check_prompt_metadata",
+        lambda metadata, rel: checked.append(rel) or original(metadata, rel),
+    )
+    rel = "analysis/reports/report-4.md"
+    write_prompt(library, rel, "report-4", "Report Four", ["reports"])
+    summary = update_prompt_index([rel])
+    assert checked == [rel]
+    assert summary["prompt_count"] == 6
+
+
+def test_readme_lists_are_only_rendered_for_changed_dirs(library, monkeypatch):
+    for sub_category in ("reports", "charts"):
+        (library / "analysis" / sub_category).mkdir(exist_ok=True)
+        (library / "analysis" / sub_category / "README.md").write_text(
+            f"# {sub_category}\n", encoding="utf-8"
+        )
+    write_prompt(library, "analysis/charts/chart-0.md", "chart-0", "Chart", ["charts"])
+    generate_prompt_index()
+
+    rendered = []
+    original = readmes.render_prompt_list
+    monkeypatch.setattr(
+        readmes,
+        "render_prompt_list",
+        lambda prompts: rendered.append(prompts[0]["file_path"]) or original(prompts),
+    )
+    readmes.update_category_readmes(prompt_library.load_prompt_index())
+    assert rendered == []
+
+    write_prompt(library, "analysis/charts/chart-0.md", "chart-0", "Chart", ["new"])
+    generate_prompt_index()
+    assert rendered == ["analysis/charts/chart-0.md"]
+    readme = (library / "analysis" / "charts" / "README.md").read_text(encoding="utf-8")
+    assert "**Tags:** new" in readme
+
+
+@pytest.mark.parametrize("paths", [None, ["analysis/reports/renamed.md"]])
+def test_validate_ignores_renamed_and_deleted_files(library, paths):
+    (library / "analysis/reports/report-2.md").rename(
+        library / "analysis/reports/renamed.md"
+    )
+    (library / "analysis/reports/report-3.md").unlink()
+    report = prompt_library.validate(paths)
+    assert "analysis/reports/renamed.md" in report
+    for result in report.values():
+        assert "duplicate-id" not in [d["rule"] for d in result["diagnostics"]]
+        assert result["valid"]
+
+
+def test_cross_prompt_checks_skip_deleted_files(library):
+    # A copy with the old path still in the manifest: only live files compare.
+    (library / "analysis/reports/report-2.md").rename(
+        library / "analysis/reports/renamed.md"
+    )
+    report = prompt_library.validate(["analysis/reports/renamed.md"])
+    assert report["analysis/reports/renamed.md"]["diagnostics"] == []
+
+    # Copies of live files are still reported.
+    text = (library / "analysis/reports/report-1.md").read_text(encoding="utf-8")
+    (library / "analysis/reports/copy.md").write_text(
+        text.replace("id: report-1", "id: copy"), encoding="utf-8"
+    )
+    report = prompt_library.validate(["analysis/reports/copy.md"])
+    rules = [d["rule"] for d in report["analysis/reports/copy.md"]["diagnostics"]]
+    assert rules == ["duplicate-body"]
+
+
+def test_changed_files_include_untracked_prompts(library):
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+            cwd=library,
+            check=True,
+            capture_output=True,
+        )
+
+    git("init", "-q")
+    git("add", "-A")
+    git("commit", "-q", "-m", "prompts")
+    write_prompt(library, "analysis/reports/report-1.md", "report-1", "Edited", ["x"])
+    write_prompt(library, "analysis/reports/new.md", "new", "New", ["x"])
+    assert sorted(git_changed_prompt_files(staged=False)) == [
+        os.path.join("analysis", "reports", "new.md"),
+        os.path.join("analysis", "reports", "report-1.md"),
+    ]
+    assert git_changed_prompt_files(staged=True) == []
+
+
+def test_get_and_render_exit_non_zero_on_errors():
+    for command in ("get", "render"):
+        result = subprocess.run(
+            [sys.executable, SCRIPT, command, "no-such-prompt-id"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 1
+        assert result.stdout.startswith("Error: No prompt with id")
@@ -0,0 +1,72 @@
+"""PromptManager's use of the prompt_manager.py serve daemon."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agent_system.tools.prompt_tools import PromptManager
+
+
+class FakeDaemon:
+    """Answers /health for `project_root` and drops every POST /index."""
+
+    def __init__(self, project_root):
+        self.posts = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = json.dumps({"project_root": str(project_root)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                # Accepted, then the connection closes without a response.
+                fake.posts += 1
+                self.close_connection = True
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class NoLibrary:
+    def __getattr__(self, name):
+        raise AssertionError(f"fell back to the in-process library ({name})")
+
+
+def test_index_does_not_fall_back_once_the_daemon_took_it(tmp_path):
+    daemon = FakeDaemon(tmp_path)
+    try:
+        manager = PromptManager(project_root=tmp_path, daemon_url=daemon.url)
+        manager.library = NoLibrary()
+        with pytest.raises(RuntimeError, match="/index"):
+            manager.index()
+        assert daemon.posts == 1
+    finally:
+        daemon.close()
+
+
+def test_index_runs_in_process_without_a_daemon(tmp_path):
+    manager = PromptManager(project_root=tmp_path, daemon_url="http://127.0.0.1:9")
+    calls = []
+
+    class Library:
+        def index(self, **kwargs):
+            calls.append(kwargs)
+            return {"written": True}
+
+    manager.library = Library()
+    assert manager.index() == {"written": True}
+    assert calls == [{"full": False, "jobs": 1, "project_root": tmp_path}]